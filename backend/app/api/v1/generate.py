@@ -1,16 +1,33 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+import json
+import logging
 
-from app.services.ai_generation import AIGenerationService
+from app.models.topic import Topic
+from app.db.connection import get_db
+from app.services.ai_generation import AI_ANALYSIS_SOURCE, AIGenerationService
+from app.core.dependencies import get_ai_generation_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/generate", tags=["generate"])
 
+# Most topics one /analyze/batch request may carry
+ANALYZE_BATCH_MAX_TOPICS = 50
+
 class GenerateRequest(BaseModel):
     topic: str
     count: Optional[int] = 10
     style: Optional[str] = "viral"  # viral, educational, entertaining, etc.
 
+class BatchAnalyzeRequest(BaseModel):
+    topics: List[str]
+
 class GenerateResponse(BaseModel):
     titles: List[dict]
     hashtags: List[str]
@@ -18,27 +35,22 @@ class GenerateResponse(BaseModel):
     provider: Optional[str] = None
 
 @router.post("/", response_model=GenerateResponse)
-async def generate_viral_content(request: GenerateRequest):
+async def generate_viral_content(
+    request: GenerateRequest,
+    ai_service: AIGenerationService = Depends(get_ai_generation_service)
+):
     """Generate viral titles and hashtags for a topic"""
     try:
         if request.count > 20:
             raise HTTPException(status_code=400, detail="Count cannot exceed 20")
         
-        ai_service = AIGenerationService()
-        
-        # Generate viral titles
-        titles = ai_service.generate_viral_titles(
+        # Titles and hashtags from one LLM call (two calls if the combined response is unusable)
+        titles, hashtags = await ai_service.agenerate_content(
             topic=request.topic,
             count=request.count,
             style=request.style
         )
         
-        # Generate hashtags
-        hashtags = ai_service.generate_hashtags(
-            topic=request.topic,
-            titles=titles
-        )
-        
         # Get provider info
         provider_info = ai_service.ai_service.get_provider_info()
         
@@ -53,15 +65,16 @@ async def generate_viral_content(request: GenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/titles")
-async def generate_titles_only(request: GenerateRequest):
+async def generate_titles_only(
+    request: GenerateRequest,
+    ai_service: AIGenerationService = Depends(get_ai_generation_service)
+):
     """Generate only viral titles"""
     try:
         if request.count > 20:
             raise HTTPException(status_code=400, detail="Count cannot exceed 20")
         
-        ai_service = AIGenerationService()
-        
-        titles = ai_service.generate_viral_titles(
+        titles = await ai_service.agenerate_viral_titles(
             topic=request.topic,
             count=request.count,
             style=request.style
@@ -75,13 +88,63 @@ async def generate_titles_only(request: GenerateRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(event: str, data) -> str:
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/titles/stream")
+async def generate_titles_stream(
+    request: GenerateRequest,
+    ai_service: AIGenerationService = Depends(get_ai_generation_service)
+):
+    """Stream viral titles as server-sent events
+    
+    A ``title`` event carries each scored title as soon as its line of the
+    completion is complete, then a ``summary`` event carries all titles
+    ranked by viral score. If generation fails midway an ``error`` event
+    replaces the summary. The stream always ends with a ``done`` event whose
+    ``status`` is ``complete`` or ``error``. EventSource only sends GET, so
+    read the stream with fetch.
+    """
+    if request.count > 20:
+        raise HTTPException(status_code=400, detail="Count cannot exceed 20")
+    
+    async def events() -> AsyncIterator[str]:
+        titles = []
+        status = "complete"
+        try:
+            async for title in ai_service.astream_viral_titles(
+                topic=request.topic,
+                count=request.count,
+                style=request.style
+            ):
+                titles.append(title)
+                yield _sse_event("title", title)
+            
+            titles.sort(key=lambda x: x["viral_score"], reverse=True)
+            yield _sse_event("summary", {"titles": titles, "topic": request.topic})
+        except Exception as e:
+            # Headers are already sent, so the failure is reported in-stream
+            logger.error(f"Title stream for '{request.topic}' failed after {len(titles)} titles: {e}")
+            status = "error"
+            yield _sse_event("error", {"detail": str(e), "titles_sent": len(titles)})
+        yield _sse_event("done", {"status": status})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/hashtags")
-async def generate_hashtags_only(request: GenerateRequest):
+async def generate_hashtags_only(
+    request: GenerateRequest,
+    ai_service: AIGenerationService = Depends(get_ai_generation_service)
+):
     """Generate only hashtags"""
     try:
-        ai_service = AIGenerationService()
-        
-        hashtags = ai_service.generate_hashtags(
+        hashtags = await ai_service.agenerate_hashtags(
             topic=request.topic,
             count=request.count
         )
@@ -95,13 +158,14 @@ async def generate_hashtags_only(request: GenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analyze")
-async def analyze_topic(request: GenerateRequest):
+async def analyze_topic(
+    request: GenerateRequest,
+    ai_service: AIGenerationService = Depends(get_ai_generation_service)
+):
     """Analyze a topic and provide insights"""
     try:
-        ai_service = AIGenerationService()
-        
         # Get topic analysis
-        analysis = ai_service.analyze_topic(
+        analysis = await ai_service.aanalyze_topic(
             topic=request.topic,
             limit=request.count
         )
@@ -116,3 +180,70 @@ async def analyze_topic(request: GenerateRequest):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _save_topic_analyses(db: Session, analyses: Dict[str, Dict]) -> bool:
+    """Write analyses into their Topic rows, creating missing topics; False if the database write failed"""
+    try:
+        existing = {topic.name: topic for topic in db.query(Topic).filter(Topic.name.in_(list(analyses))).all()}
+        for name, analysis in analyses.items():
+            topic = existing.get(name)
+            if topic is None:
+                topic = Topic(name=name)
+                db.add(topic)
+            topic.top_tags = analysis.get("top_tags", [])
+            topic.top_hashtags = analysis.get("top_hashtags", [])
+            topic.viral_patterns = analysis.get("viral_patterns", [])
+        db.commit()
+        return True
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not save topic analyses: {e}")
+        return False
+
+@router.post("/analyze/batch")
+async def analyze_topics_batch(
+    request: BatchAnalyzeRequest,
+    db: Session = Depends(get_db),
+    ai_service: AIGenerationService = Depends(get_ai_generation_service)
+):
+    """Analyze several topics in a few LLM round trips
+    
+    Topics are packed several to a prompt instead of one call each. LLM
+    analyses are stored in the topics' top_tags, top_hashtags and
+    viral_patterns columns; ``saved`` is false if that write failed. Each
+    result's ``source`` is ``ai`` or ``fallback``; fallback analyses (no API
+    key, open circuit, unusable response) are returned but never stored.
+    """
+    topics = list(dict.fromkeys(topic.strip() for topic in request.topics if topic.strip()))
+    if not topics:
+        raise HTTPException(status_code=400, detail="At least one topic is required")
+    if len(topics) > ANALYZE_BATCH_MAX_TOPICS:
+        raise HTTPException(status_code=400, detail=f"Cannot analyze more than {ANALYZE_BATCH_MAX_TOPICS} topics at once")
+    if any(len(topic) > Topic.name.type.length for topic in topics):
+        raise HTTPException(status_code=400, detail=f"Topics cannot exceed {Topic.name.type.length} characters")
+    
+    try:
+        analyses = await ai_service.aanalyze_topics(topics)
+        generated = {
+            topic: analysis for topic, analysis in analyses.items()
+            if analysis.get("source") == AI_ANALYSIS_SOURCE
+        }
+        saved = await run_in_threadpool(_save_topic_analyses, db, generated) if generated else True
+        
+        return {
+            "results": [
+                {
+                    "topic": topic,
+                    "top_tags": analysis.get("top_tags", []),
+                    "top_hashtags": analysis.get("top_hashtags", []),
+                    "viral_patterns": analysis.get("viral_patterns", []),
+                    "trending_keywords": analysis.get("trending_keywords", []),
+                    "source": analysis.get("source")
+                }
+                for topic, analysis in analyses.items()
+            ],
+            "saved": saved
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,74 +1,151 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import heapq
+import json
+import numpy as np
 
 from app.services.scoring import ScoringService
+from app.services.batch_scoring import BatchScoringEngine
+from app.services.score_cache import score_cache
+from app.services.live_scoring import LiveScoringSession
+from app.services.score_batcher import ScoreMicroBatcher
+from app.services.score_percentiles import PercentileIndex, score_percentiles
+from app.core.config import settings
+from app.core.dependencies import get_batch_scoring_engine, get_score_batcher, get_scoring_service
 
 router = APIRouter(prefix="/score", tags=["score"])
 
+# Titles scored per engine call when streaming NDJSON
+STREAM_CHUNK_SIZE = 500
+
 class ScoreRequest(BaseModel):
     title: str
     tags: Optional[List[str]] = []
     hashtags: Optional[List[str]] = []
     topic: Optional[str] = None
 
+class LiveScoreUpdate(BaseModel):
+    """Partial edit sent over the live scoring WebSocket; omitted fields keep their value"""
+    title: Optional[str] = None
+    tags: Optional[List[str]] = None
+    hashtags: Optional[List[str]] = None
+    topic: Optional[str] = None
+
 class ScoreResponse(BaseModel):
     viral_score: float
-    reasons: List[str]
+    reasons: Optional[List[str]] = None
     suggestions: Optional[List[str]] = []
+    # Share of stored videos scoring below this title, in percent (absent until a snapshot exists)
+    percentile: Optional[float] = None
 
-@router.post("/", response_model=ScoreResponse)
-async def get_viral_score(request: ScoreRequest):
+EXPLAIN_DESCRIPTION = "Set to false to return only viral_score, without reasons or suggestions"
+
+@router.post("/", response_model=ScoreResponse, response_model_exclude_none=True)
+async def get_viral_score(
+    request: ScoreRequest,
+    explain: bool = Query(True, description=EXPLAIN_DESCRIPTION),
+    scoring_service: ScoringService = Depends(get_scoring_service),
+    score_batcher: ScoreMicroBatcher = Depends(get_score_batcher)
+):
     """Calculate viral score for a title and tags"""
+    # A reload swaps score_percentiles.index; rank against the snapshot current at request start
+    snapshot = score_percentiles.index
     try:
-        scoring_service = ScoringService()
+        if not explain:
+            # Score-only results skip the cache: a Redis round trip costs more than scoring
+            score = round(scoring_service.calculate_score(request.title, request.tags, request.hashtags, request.topic), 3)
+            return ScoreResponse(viral_score=score, suggestions=None, percentile=snapshot.percentile(score))
         
-        # Calculate viral score
-        score, reasons = scoring_service.calculate_viral_score(
-            title=request.title,
-            tags=request.tags,
-            hashtags=request.hashtags,
-            topic=request.topic
-        )
-        
-        # Generate improvement suggestions
-        suggestions = scoring_service.get_improvement_suggestions(
-            title=request.title,
-            current_score=score
-        )
+        # Concurrent requests are scored together in one batch pass
+        entry = await score_batcher.score(request.title, request.tags, request.hashtags, request.topic)
+        score = round(entry["score"], 3)
         
         return ScoreResponse(
-            viral_score=round(score, 3),
-            reasons=reasons,
-            suggestions=suggestions
+            viral_score=score,
+            reasons=entry["reasons"],
+            suggestions=entry["suggestions"],
+            percentile=snapshot.percentile(score)
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _add_percentiles(results: List[dict], snapshot: PercentileIndex) -> None:
+    """Attach percentile ranks from one snapshot to batch results when it is not empty"""
+    if not len(snapshot):
+        return
+    percentiles = snapshot.percentiles([result["viral_score"] for result in results])
+    for result, percentile in zip(results, percentiles):
+        result["percentile"] = percentile
+
 @router.post("/batch")
-async def score_multiple_titles(titles: List[ScoreRequest]):
+async def score_multiple_titles(
+    titles: List[ScoreRequest],
+    explain: bool = Query(True, description=EXPLAIN_DESCRIPTION),
+    batch_engine: BatchScoringEngine = Depends(get_batch_scoring_engine)
+):
     """Score multiple titles in batch"""
+    # Every result is ranked against this one snapshot, even if a reload lands mid-batch
+    snapshot = score_percentiles.index
     try:
-        scoring_service = ScoringService()
-        results = []
+        if not explain:
+            # The vectorized pass runs in a worker thread so a large batch does not block the loop
+            scores = await asyncio.to_thread(batch_engine.score_values, [
+                (request.title, request.tags, request.hashtags, request.topic) for request in titles
+            ])
+            rounded_scores = [round(score, 3) for score in scores.tolist()]
+            order = np.argsort(-np.array(rounded_scores, dtype=np.float64), kind="stable")
+            results = [
+                {"title": titles[index].title, "viral_score": rounded_scores[index]}
+                for index in order.tolist()
+            ]
+            _add_percentiles(results, snapshot)
+            return {
+                "results": results,
+                "total": len(results)
+            }
         
-        for request in titles:
-            score, reasons = scoring_service.calculate_viral_score(
-                title=request.title,
-                tags=request.tags,
-                hashtags=request.hashtags,
-                topic=request.topic
-            )
-            
-            results.append({
-                "title": request.title,
-                "viral_score": round(score, 3),
-                "reasons": reasons
-            })
+        keys = [
+            score_cache.make_key(request.title, request.tags, request.hashtags, request.topic)
+            for request in titles
+        ]
+        entries = await score_cache.aget_many(keys)
+        
+        # Score each distinct uncached title once
+        missing = {}
+        for index, (key, entry) in enumerate(zip(keys, entries)):
+            if entry is None and key not in missing:
+                missing[key] = index
+        
+        if missing:
+            scores, reasons = await asyncio.to_thread(batch_engine.score_batch, [
+                (titles[index].title, titles[index].tags, titles[index].hashtags, titles[index].topic)
+                for index in missing.values()
+            ])
+            new_entries = {
+                key: {"score": score, "reasons": score_reasons}
+                for key, score, score_reasons in zip(missing, scores.tolist(), reasons)
+            }
+            await score_cache.aset_many(new_entries)
+            entries = [entry if entry is not None else new_entries[key] for key, entry in zip(keys, entries)]
         
-        # Sort by viral score descending
-        results.sort(key=lambda x: x["viral_score"], reverse=True)
+        rounded_scores = [round(entry["score"], 3) for entry in entries]
+        
+        # Sort by viral score descending (stable, like list.sort)
+        order = np.argsort(-np.array(rounded_scores, dtype=np.float64), kind="stable")
+        
+        results = [
+            {
+                "title": titles[index].title,
+                "viral_score": rounded_scores[index],
+                "reasons": entries[index]["reasons"]
+            }
+            for index in order.tolist()
+        ]
+        _add_percentiles(results, snapshot)
         
         return {
             "results": results,
@@ -77,3 +154,143 @@ async def score_multiple_titles(titles: List[ScoreRequest]):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+async def _read_ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield non-empty NDJSON lines from the request body as they arrive"""
+    # Pieces of the line still open; each chunk is split once, so long lines stay linear
+    pending: List[bytes] = []
+    async for chunk in request.stream():
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join(pending) + lines[0]
+            pending = []
+        for line in lines:
+            if line.strip():
+                yield line
+        if rest:
+            pending.append(rest)
+    tail = b"".join(pending)
+    if tail.strip():
+        yield tail
+
+@router.post("/batch/stream")
+async def score_titles_stream(
+    request: Request,
+    top_k: Optional[int] = Query(None, ge=1, description="Only return the k best titles"),
+    explain: bool = Query(True, description=EXPLAIN_DESCRIPTION),
+    batch_engine: BatchScoringEngine = Depends(get_batch_scoring_engine)
+):
+    """Score NDJSON titles incrementally and stream NDJSON results back
+
+    Each request line is a ScoreRequest object. The body is scored chunk by
+    chunk as it arrives, in a worker thread; the response streams once the
+    body has been read. Without ``top_k`` results come in input order. With
+    ``top_k`` only the best k are kept in a bounded heap and emitted, best
+    first (earliest line first on ties). With ``explain=false`` result lines
+    carry only the title and viral_score. Invalid lines produce an error line
+    instead of aborting the stream.
+    """
+    def score_chunk(chunk: List[Tuple[int, ScoreRequest]]) -> List[Tuple[int, dict]]:
+        items = [(item.title, item.tags, item.hashtags, item.topic) for _, item in chunk]
+        if not explain:
+            return [
+                (line_number, {"title": item.title, "viral_score": round(score, 3)})
+                for (line_number, item), score in zip(chunk, batch_engine.score_values(items).tolist())
+            ]
+        scores, reasons = batch_engine.score_batch(items)
+        return [
+            (line_number, {"title": item.title, "viral_score": round(score, 3), "reasons": item_reasons})
+            for (line_number, item), score, item_reasons in zip(chunk, scores.tolist(), reasons)
+        ]
+    
+    # Min-heap of (score, -line_number, result): ties keep the earliest line
+    heap = []
+    outputs: List[str] = []
+    chunk = []
+    line_number = 0
+    
+    async def collect(chunk: List[Tuple[int, ScoreRequest]]) -> None:
+        scored = await asyncio.to_thread(score_chunk, chunk)
+        if top_k is None:
+            outputs.extend(json.dumps(result) + "\n" for _, result in scored)
+            return
+        for scored_line, result in scored:
+            entry = (result["viral_score"], -scored_line, result)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+    
+    async for line in _read_ndjson_lines(request):
+        line_number += 1
+        try:
+            chunk.append((line_number, ScoreRequest.model_validate_json(line)))
+        except ValidationError as e:
+            outputs.append(json.dumps({"line": line_number, "error": e.errors(include_url=False, include_input=False)}, default=str) + "\n")
+            continue
+        
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            await collect(chunk)
+            chunk = []
+    
+    if chunk:
+        await collect(chunk)
+    
+    if top_k is not None:
+        outputs.extend(json.dumps(result) + "\n" for _, _, result in sorted(heap, key=lambda entry: entry[:2], reverse=True))
+    
+    async def emit() -> AsyncIterator[str]:
+        for output in outputs:
+            yield output
+    
+    return StreamingResponse(emit(), media_type="application/x-ndjson")
+
+@router.websocket("/live")
+async def live_score(
+    websocket: WebSocket,
+    scoring_service: ScoringService = Depends(get_scoring_service)
+):
+    """Score a title as it is being typed
+
+    Each message is a JSON LiveScoreUpdate carrying only the fields that
+    changed. Edits arriving within LIVE_SCORE_DEBOUNCE_MS of each other are
+    merged and scored once, but a continuous burst still gets a result every
+    LIVE_SCORE_MAX_DELAY_MS. Each result has the current title, viral_score,
+    reasons and suggestions; an invalid message gets an error reply and is
+    otherwise ignored.
+    """
+    await websocket.accept()
+    session = LiveScoringSession(scoring_service)
+    debounce = settings.LIVE_SCORE_DEBOUNCE_MS / 1000
+    max_delay = settings.LIVE_SCORE_MAX_DELAY_MS / 1000
+    loop = asyncio.get_running_loop()
+    
+    async def apply(message: str) -> bool:
+        try:
+            update = LiveScoreUpdate.model_validate_json(message)
+        except ValidationError as e:
+            await websocket.send_text(json.dumps({"error": e.errors(include_url=False, include_input=False)}, default=str))
+            return False
+        session.update({field: getattr(update, field) for field in update.model_fields_set})
+        return True
+    
+    try:
+        while True:
+            changed = await apply(await websocket.receive_text())
+            deadline = loop.time() + max_delay
+            
+            # Keep absorbing edits until the client pauses or the burst runs too long
+            while True:
+                timeout = min(debounce, deadline - loop.time())
+                if timeout <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(websocket.receive_text(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                changed = await apply(message) or changed
+            
+            if changed:
+                await websocket.send_json({"title": session.title, **session.result()})
+    except WebSocketDisconnect:
+        pass
@@ -7,6 +7,7 @@ from app.models.video import Video
 from app.db.connection import get_db
 from app.services.youtube_fetch import YouTubeService
 from app.services.trend_analysis import TrendAnalysisService
+from app.core.dependencies import get_trend_service, get_youtube_service
 
 router = APIRouter(prefix="/shorts", tags=["shorts"])
 
@@ -15,24 +16,23 @@ async def get_trending_shorts(
     topic: Optional[str] = Query(None, description="Keyword filter"),
     limit: int = Query(20, description="Number of videos to return"),
     region: str = Query("IN", description="Region code"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    youtube_service: YouTubeService = Depends(get_youtube_service)
 ):
     """Get trending video shorts"""
     try:
-        youtube_service = YouTubeService()
-        
         # Use real YouTube API to get trending videos
         if topic:
             # Search for videos with the topic
-            videos = youtube_service.search_shorts(topic, limit, region)
+            videos = await youtube_service.asearch_shorts(topic, limit, region)
         else:
             # Get trending videos
-            videos = youtube_service.get_trending_videos(region, "1")  # Category 1 = Film & Animation
+            videos = await youtube_service.aget_trending_videos(region, "1")  # Category 1 = Film & Animation
         
         # Get detailed information for the videos
         if videos:
             video_ids = [video['video_id'] for video in videos[:limit]]
-            detailed_videos = youtube_service.get_video_details(video_ids)
+            detailed_videos = await youtube_service.aget_video_details(video_ids)
             
             # Format the response
             formatted_videos = []
@@ -58,6 +58,8 @@ async def get_trending_shorts(
             return {
                 "topic": topic or "trending",
                 "videos": formatted_videos,
+                # Videos whose details could not be fetched (their chunk failed)
+                "failed_video_ids": detailed_videos.failed_ids,
                 "source": "youtube_api"
             }
         else:
@@ -84,7 +86,10 @@ async def get_trending_shorts(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analyze")
-async def analyze_topic(request: dict):
+async def analyze_topic(
+    request: dict,
+    trend_service: TrendAnalysisService = Depends(get_trend_service)
+):
     """Analyze a topic and provide insights"""
     try:
         topic = request.get("topic")
@@ -93,8 +98,6 @@ async def analyze_topic(request: dict):
         if not topic:
             raise HTTPException(status_code=400, detail="Topic is required")
         
-        trend_service = TrendAnalysisService()
-        
         # Analyze topic patterns
         analysis = trend_service.analyze_topic(topic, limit)
         
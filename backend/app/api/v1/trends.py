@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from app.models.video import Video
 from app.db.connection import get_db
 from app.services.trend_analysis import TrendAnalysisService
+from app.core.dependencies import get_trend_service
 
 router = APIRouter(prefix="/trends", tags=["trends"])
 
@@ -74,49 +75,13 @@ async def get_trends(
 @router.get("/topics")
 async def get_trending_topics(
     limit: int = Query(10, description="Number of topics to return"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    trend_service: TrendAnalysisService = Depends(get_trend_service)
 ):
     """Get currently trending topics"""
     try:
-        # Get videos from last 7 days
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        
-        # Query for trending topics based on engagement
-        trending_videos = db.query(Video).filter(
-            Video.published_at >= week_ago
-        ).order_by(Video.engagement_rate.desc()).limit(limit * 5).all()
-        
-        # Group by topic and calculate average engagement
-        topic_stats = {}
-        for video in trending_videos:
-            if video.topic:
-                if video.topic not in topic_stats:
-                    topic_stats[video.topic] = {
-                        "total_views": 0,
-                        "total_engagement": 0,
-                        "video_count": 0
-                    }
-                
-                topic_stats[video.topic]["total_views"] += video.views
-                topic_stats[video.topic]["total_engagement"] += video.engagement_rate
-                topic_stats[video.topic]["video_count"] += 1
-        
-        # Calculate averages and sort
-        trending_topics = []
-        for topic, stats in topic_stats.items():
-            avg_engagement = stats["total_engagement"] / stats["video_count"]
-            trending_topics.append({
-                "topic": topic,
-                "avg_engagement": round(avg_engagement, 4),
-                "total_views": stats["total_views"],
-                "video_count": stats["video_count"]
-            })
-        
-        # Sort by average engagement and return top results
-        trending_topics.sort(key=lambda x: x["avg_engagement"], reverse=True)
-        
         return {
-            "trending_topics": trending_topics[:limit]
+            "trending_topics": trend_service.rank_topics_by_engagement(db, limit=limit)
         }
         
     except Exception as e:
@@ -54,11 +54,43 @@ class Settings(BaseSettings):
     
     # YouTube API Configuration
     YOUTUBE_API_KEY: Optional[str] = None
+    YOUTUBE_MAX_CONNECTIONS: int = 20  # Pooled keep-alive connections per worker
+    YOUTUBE_API_RETRIES: int = 2  # Retries of connection errors, timeouts, 429 and 5xx
+    YOUTUBE_RETRY_BACKOFF_MS: float = 250  # Base of the full-jitter exponential backoff
+    YOUTUBE_DETAILS_CONCURRENCY: int = 8  # Video detail chunks (50 IDs each) fetched at once
     
     # AI/ML Configuration
     GOOGLE_AI_API_KEY: Optional[str] = None
     MODEL_NAME: str = "gemini-1.5-flash"
-    AI_PROVIDER: str = "google"
+    AI_PROVIDER: str = "google"  # "local" answers offline with LocalAIProvider (load tests)
+    AI_MAX_CONCURRENCY: int = 8  # Initial in-flight LLM calls per worker; adapted from there (AIMD)
+    AI_LIMITER_MIN_CONCURRENCY: int = 1
+    AI_LIMITER_MAX_CONCURRENCY: int = 64
+    AI_LIMITER_BACKOFF: float = 0.5  # Factor the limit is cut by on a 429, 503, 504 or timeout
+    AI_LIMITER_HEALTHY_LATENCY_MS: float = 5000  # Successes faster than this grow the limit
+    AI_LIMITER_QUEUE_TIMEOUT_SECONDS: float = 10  # Longest a call waits for a slot
+    AI_LIMITER_MAX_QUEUE: int = 256  # Calls waiting beyond this are refused at once
+    AI_COMBINED_GENERATION: bool = True  # Titles and hashtags for /generate/ in one LLM call
+    AI_ROUTING_MODELS: List[str] = []  # Two or more models: route to the fastest healthy one and hedge slow calls
+    AI_ROUTING_WINDOW: int = 200  # Recent calls per model behind its latency percentiles and error rate
+    AI_ROUTING_MAX_ERROR_RATE: float = 0.5  # Models at or above this error rate are only used as a last resort
+    AI_HEDGE_PERCENTILE: float = 90  # Hedge once the primary model is slower than this latency percentile
+    AI_HEDGE_DEFAULT_DELAY_MS: float = 3000  # Hedge delay until a model has enough latency samples
+    AI_ANALYSIS_BATCH_SIZE: int = 10  # Topics packed into one batch analysis prompt
+    AI_ANALYSIS_RETRIES: int = 1  # Extra rounds for topics a batch response left out or garbled
+    AI_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failed AI calls that open the circuit
+    AI_BREAKER_RESET_SECONDS: float = 30  # How long the circuit stays open before a half-open probe
+    AI_BREAKER_HALF_OPEN_PROBES: int = 1  # Calls let through at once while half-open
+    
+    # Local AI Provider (AI_PROVIDER=local)
+    LOCAL_AI_LATENCY_MS: float = 800  # Median simulated call latency
+    LOCAL_AI_LATENCY_SIGMA: float = 0.4  # Lognormal spread of the latency
+    LOCAL_AI_TAIL_RATE: float = 0.0  # Share of calls that take LOCAL_AI_TAIL_MS instead
+    LOCAL_AI_TAIL_MS: float = 5000
+    LOCAL_AI_ERROR_RATE: float = 0.0  # Share of calls that raise
+    LOCAL_AI_CAPACITY: int = 0  # Calls in flight beyond this fail with a simulated 429 (0: unlimited)
+    LOCAL_AI_STREAM_CHUNK_CHARS: int = 24  # Characters per streamed chunk
+    LOCAL_AI_SEED: int = 0
     
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379"
@@ -102,6 +134,41 @@ class Settings(BaseSettings):
     CACHE_TTL: int = 3600  # 1 hour
     CACHE_MAX_SIZE: int = 1000
     
+    # Generation Cache (raw LLM responses)
+    GENERATION_CACHE_TTL: int = 900  # Seconds a cached generation is served as fresh
+    GENERATION_CACHE_STALE_TTL: int = 3600  # Further seconds it is served stale while one refresh runs
+    GENERATION_CACHE_MAX_SIZE: int = 500
+    
+    # Singleflight (coalescing of identical in-flight upstream calls)
+    SINGLEFLIGHT_DISTRIBUTED: bool = False  # Also coalesce across workers through a Redis lock
+    SINGLEFLIGHT_WAIT_SECONDS: float = 30.0  # Longest a worker waits on another worker's call
+    SINGLEFLIGHT_RESULT_TTL: int = 10  # Seconds a published result stays readable by waiting workers
+    
+    # Generation Pre-warming (trending topics)
+    PREWARM_ENABLED: bool = False
+    PREWARM_INTERVAL_SECONDS: int = 600  # Keep below GENERATION_CACHE_TTL so hot entries never go stale
+    PREWARM_TOP_TOPICS: int = 10  # Trending topics pre-warmed per run
+    PREWARM_LLM_BUDGET: int = 30  # Most LLM calls one run may start
+    PREWARM_CONCURRENCY: int = 2  # LLM calls a run keeps in flight at once
+    
+    # Live Scoring (WebSocket)
+    LIVE_SCORE_DEBOUNCE_MS: int = 150  # Quiet period before a burst of edits is scored
+    LIVE_SCORE_MAX_DELAY_MS: int = 1000  # Upper bound on how long a burst can defer a result
+    
+    # Score Micro-batching
+    SCORE_BATCH_MAX_SIZE: int = 64  # Flush as soon as this many /score requests are queued (1 disables batching)
+    SCORE_BATCH_MAX_WAIT_MS: float = 2.0  # Longest a request waits for others to join its batch
+    
+    # Local Title Model (trained on high-engagement titles)
+    TITLE_MODEL_PATH: str = "data/title_model.json.gz"
+    TITLE_MODEL_CANDIDATES: int = 300  # Candidates generated and ranked per request
+    LOCAL_TITLES_MODE: str = "fallback"  # "fallback", "first" (answer misses locally while the LLM fills the cache) or "only"
+    
+    # Score Percentiles
+    SCORE_PERCENTILE_SNAPSHOT: str = "data/score_percentiles.bin"
+    SCORE_PERCENTILE_RELOAD_SECONDS: int = 300  # How often workers check the snapshot for changes
+    SCORE_PERCENTILE_FULL_REBUILD_HOURS: float = 24  # Incremental refreshes still rebuild from the whole table this often
+    
     # Monitoring
     ENABLE_METRICS: bool = False
     METRICS_PORT: int = 9090
@@ -0,0 +1,76 @@
+from fastapi import FastAPI, HTTPException
+from starlette.requests import HTTPConnection
+import logging
+
+from app.services.ai_generation import AIGenerationService
+from app.services.batch_scoring import BatchScoringEngine
+from app.services.score_batcher import ScoreMicroBatcher
+from app.services.scoring import ScoringService
+from app.services.trend_analysis import TrendAnalysisService
+from app.services.youtube_fetch import YouTubeService
+
+logger = logging.getLogger(__name__)
+
+
+def init_services(app: FastAPI) -> None:
+    """Build long-lived services once and store them on app.state"""
+    scoring_service = ScoringService()
+    app.state.scoring_service = scoring_service
+    batch_scoring_engine = BatchScoringEngine(scoring_service)
+    app.state.batch_scoring_engine = batch_scoring_engine
+    app.state.score_batcher = ScoreMicroBatcher(batch_scoring_engine)
+    app.state.youtube_service = YouTubeService()
+    app.state.trend_service = TrendAnalysisService()
+
+    # Keep the API up if the AI service cannot be built; generation endpoints report the error
+    try:
+        app.state.ai_generation_service = AIGenerationService()
+        app.state.ai_generation_error = None
+    except Exception as e:
+        logger.warning(f"AI generation service unavailable: {e}")
+        app.state.ai_generation_service = None
+        app.state.ai_generation_error = str(e)
+
+    app.state.services_ready = True
+    logger.info("Application services initialized")
+
+
+def _state(request: HTTPConnection):
+    """App state with services, initializing lazily if the lifespan did not run"""
+    state = request.app.state
+    if not getattr(state, "services_ready", False):
+        init_services(request.app)
+    return state
+
+
+def get_scoring_service(request: HTTPConnection) -> ScoringService:
+    """Shared ScoringService"""
+    return _state(request).scoring_service
+
+
+def get_batch_scoring_engine(request: HTTPConnection) -> BatchScoringEngine:
+    """Shared BatchScoringEngine"""
+    return _state(request).batch_scoring_engine
+
+
+def get_score_batcher(request: HTTPConnection) -> ScoreMicroBatcher:
+    """Shared ScoreMicroBatcher for single-title scoring"""
+    return _state(request).score_batcher
+
+
+def get_youtube_service(request: HTTPConnection) -> YouTubeService:
+    """Shared YouTubeService"""
+    return _state(request).youtube_service
+
+
+def get_trend_service(request: HTTPConnection) -> TrendAnalysisService:
+    """Shared TrendAnalysisService"""
+    return _state(request).trend_service
+
+
+def get_ai_generation_service(request: HTTPConnection) -> AIGenerationService:
+    """Shared AIGenerationService; 500 with the startup error when it could not be built"""
+    state = _state(request)
+    if state.ai_generation_service is None:
+        raise HTTPException(status_code=500, detail=state.ai_generation_error)
+    return state.ai_generation_service
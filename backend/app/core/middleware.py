@@ -11,6 +11,7 @@ import asyncio
 
 from app.core.config import settings
 from app.core.logging import log_request, get_logger
+from app.services.circuit_breaker import ai_circuit_breaker
 
 logger = get_logger(__name__)
 
@@ -178,7 +179,8 @@ class HealthCheckMiddleware(BaseHTTPMiddleware):
                 content={
                     "status": "healthy",
                     "timestamp": time.time(),
-                    "version": settings.VERSION
+                    "version": settings.VERSION,
+                    "ai_circuit": ai_circuit_breaker.state
                 }
             )
         
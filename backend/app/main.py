@@ -1,3 +1,4 @@
+import asyncio
 import time
 import signal
 import sys
@@ -22,10 +23,34 @@ from app.core.middleware import (
 
 # Import API routers
 from app.api.v1 import shorts, topics, trends, score, generate
+from app.services.score_cache import score_cache
+from app.services.generation_cache import generation_cache
+from app.services.singleflight import singleflight
+from app.services.circuit_breaker import ai_circuit_breaker
+from app.services.concurrency_limiter import ai_concurrency_limiter
+from app.services.score_percentiles import score_percentiles
+from app.services.title_model import local_titles
+from app.services.token_usage import prompt_usage
+from app.services.generation_prewarm import GenerationPrewarmer
+from app.core.dependencies import get_score_batcher, init_services
 
 # Global variables for cleanup
 redis_client = None
 
+async def reload_snapshots():
+    """Pick up percentile snapshots and title models written by the offline jobs"""
+    while True:
+        await asyncio.sleep(settings.SCORE_PERCENTILE_RELOAD_SECONDS)
+        # File reads and parsing run in a worker thread so a large snapshot does not stall requests
+        try:
+            await asyncio.to_thread(score_percentiles.reload_if_changed)
+        except Exception as e:
+            logger.warning(f"Percentile snapshot reload failed: {e}")
+        try:
+            await asyncio.to_thread(local_titles.reload_if_changed)
+        except Exception as e:
+            logger.warning(f"Title model reload failed: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
@@ -47,6 +72,12 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Redis connection failed: {e}")
         redis_client = None
     
+    # Share cached scores and generations across workers when Redis is available
+    score_cache.attach_redis(redis_client)
+    generation_cache.attach_redis(redis_client)
+    if settings.SINGLEFLIGHT_DISTRIBUTED:
+        singleflight.attach_redis(redis_client)
+    
     # Initialize database
     try:
         if init_db():
@@ -56,6 +87,23 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Database initialization error: {e}")
     
+    # Build services once; handlers receive them through dependencies
+    init_services(app)
+    # The YouTube API connection pool lives as long as the app
+    app.state.youtube_service.open()
+    
+    # Percentile ranks and local titles come from files built by offline jobs
+    await asyncio.to_thread(score_percentiles.reload_if_changed)
+    await asyncio.to_thread(local_titles.reload_if_changed)
+    snapshot_reloader = asyncio.create_task(reload_snapshots())
+    
+    # Keep generations for trending topics warm ahead of the requests for them
+    app.state.generation_prewarmer = None
+    prewarm_task = None
+    if settings.PREWARM_ENABLED and app.state.ai_generation_service is not None:
+        app.state.generation_prewarmer = GenerationPrewarmer(app.state.ai_generation_service, app.state.trend_service)
+        prewarm_task = asyncio.create_task(app.state.generation_prewarmer.run_forever())
+    
     logger.info("ReelRanker API started successfully")
     
     yield
@@ -63,10 +111,20 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down ReelRanker API...")
     
+    snapshot_reloader.cancel()
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+    
+    # Close the YouTube API connection pool
+    await app.state.youtube_service.aclose()
+    
     # Close database connections
     close_db_connections()
     
     # Close Redis connection
+    score_cache.attach_redis(None)
+    generation_cache.attach_redis(None)
+    singleflight.attach_redis(None)
     if redis_client:
         redis_client.close()
         logger.info("Redis connection closed")
@@ -158,6 +216,10 @@ async def health_check():
         health_status["services"]["redis"] = "unhealthy"
         logger.error(f"Redis health check failed: {e}")
     
+    # An open AI circuit degrades generation to fallbacks but does not make the API unhealthy
+    health_status["ai_circuit"] = ai_circuit_breaker.stats()
+    health_status["ai_concurrency"] = ai_concurrency_limiter.stats()
+    
     # Determine overall health
     overall_healthy = all(
         status in ["healthy", "not_configured"] 
@@ -187,11 +249,13 @@ async def readiness_check():
     return {"status": "ready"}
 
 @app.get("/metrics")
-async def metrics():
+async def metrics(request: Request):
     """Basic metrics endpoint"""
     if not settings.ENABLE_METRICS:
         raise HTTPException(status_code=404, detail="Metrics not enabled")
     
+    prewarmer = getattr(request.app.state, "generation_prewarmer", None)
+    
     # Basic application metrics
     metrics_data = {
         "app": {
@@ -204,7 +268,18 @@ async def metrics():
         },
         "redis": {
             "connected": redis_client is not None and redis_client.ping()
-        }
+        },
+        "score_cache": score_cache.stats(),
+        "generation_cache": generation_cache.stats(),
+        "singleflight": singleflight.stats(),
+        "ai_circuit": ai_circuit_breaker.stats(),
+        "ai_concurrency": ai_concurrency_limiter.stats(),
+        "score_batcher": get_score_batcher(request).stats(),
+        "score_percentiles": score_percentiles.stats(),
+        "title_model": local_titles.stats(),
+        "prompt_usage": prompt_usage.stats(),
+        "youtube": request.app.state.youtube_service.stats(),
+        "generation_prewarm": prewarmer.stats() if prewarmer is not None else None
     }
     
     return metrics_data
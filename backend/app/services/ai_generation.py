@@ -1,163 +1,540 @@
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Set, Tuple, TypeVar
+import asyncio
+import functools
+import json
 import logging
 import re
 
 from app.core.config import settings
 from app.core.constants import VIRAL_TITLE_PATTERNS, HASHTAG_CATEGORIES
 from app.services.ai_provider import AIService
+from app.services.generation_cache import GenerationCache, generation_cache, normalize_prompt_text
+from app.services.prompt_templates import PROMPTS, PromptMessages
+from app.services.singleflight import SingleFlight, singleflight
+from app.services.title_model import LocalTitleGenerator, local_titles
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Output budget per topic in a batched analysis prompt (capped at the model's output limit)
+ANALYSIS_TOKENS_PER_TOPIC = 400
+MAX_OUTPUT_TOKENS = 8192
+
+# Analysis fields, with the key naming each object item (None: items are plain strings)
+ANALYSIS_FIELDS = {"top_tags": "tag", "top_hashtags": "hashtag", "viral_patterns": None, "trending_keywords": None}
+# Older prompts did not always produce this one; it defaults to empty
+OPTIONAL_ANALYSIS_FIELDS = {"trending_keywords"}
+# "source" of an analysis: generated by the LLM, or made up from the topic's words
+AI_ANALYSIS_SOURCE = "ai"
+FALLBACK_ANALYSIS_SOURCE = "fallback"
+
 class AIGenerationService:
-    def __init__(self):
+    def __init__(self, cache: GenerationCache = generation_cache, flights: SingleFlight = singleflight,
+                 titles: LocalTitleGenerator = local_titles):
         self.ai_service = AIService()
         self.provider_info = self.ai_service.get_provider_info()
+        self.cache = cache
+        # Concurrent cache misses for the same key share one LLM call
+        self.flights = flights
+        # Corpus-trained title model; the fallback, or a tier before the LLM (LOCAL_TITLES_MODE)
+        self.local_titles = titles
+        # Background refreshes of stale cache entries; referenced so they are not garbage collected
+        self._refresh_tasks: Set[asyncio.Task] = set()
     
-    def generate_viral_titles(self, topic: str, count: int = 10, style: str = "viral") -> List[Dict]:
+    async def agenerate_viral_titles(self, topic: str, count: int = 10, style: str = "viral") -> List[Dict]:
         """Generate viral titles for a given topic"""
         try:
+            if self._local_titles_mode() == "only":
+                return self._generate_fallback_titles(topic, count)
             if not self.provider_info["available"]:
                 logger.warning(f"{self.provider_info['provider']} API key not configured, using fallback patterns")
                 return self._generate_fallback_titles(topic, count)
             
-            prompt = f"""
-            Generate {count} viral YouTube Shorts titles for the topic: "{topic}"
-            
-            Requirements:
-            - Each title should be engaging and click-worthy
-            - Include emotional hooks and curiosity gaps
-            - Keep titles under 60 characters
-            - Use patterns like "The Shocking Truth", "How to", "Why", "The Secret"
-            - Make them feel urgent and trending
-            
-            Style: {style}
-            
-            Return only the titles, one per line, with no numbering or extra text.
-            """
-            
-            messages = [
-                {"role": "system", "content": "You are an expert at creating viral YouTube Shorts titles that drive high engagement and views."},
-                {"role": "user", "content": prompt}
-            ]
-            
-            titles_text = self.ai_service.generate_text(messages, max_tokens=500, temperature=0.8)
-            titles = [title.strip() for title in titles_text.split('\n') if title.strip()]
-            
-            # Calculate viral scores for each title
-            result = []
-            for title in titles[:count]:
-                viral_score = self._calculate_title_viral_score(title, topic)
-                result.append({
-                    "title": title,
-                    "viral_score": viral_score
-                })
-            
-            # Sort by viral score
-            result.sort(key=lambda x: x["viral_score"], reverse=True)
-            
-            return result
+            return await self._agenerate_cached(
+                self._title_cache_key(topic, count, style), self._title_messages(topic, count, style),
+                500, 0.8, lambda text: self._parse_titles(text, topic, count),
+                local=self._local_first(lambda: self._generate_fallback_titles(topic, count))
+            )
             
         except Exception as e:
             logger.error(f"Error generating viral titles: {e}")
             return self._generate_fallback_titles(topic, count)
     
-    def generate_hashtags(self, topic: str, titles: Optional[List] = None, count: int = 10) -> List[str]:
+    async def astream_viral_titles(self, topic: str, count: int = 10, style: str = "viral") -> AsyncIterator[Dict]:
+        """Yield scored titles as soon as each line of the completion is complete
+        
+        Titles come in generation order, not ranked. A cached completion is
+        replayed at once; a streamed one is cached when it ends. If the
+        provider fails before the first title, the fallback titles are yielded.
+        """
+        mode = self._local_titles_mode()
+        if mode == "only" or not self.provider_info["available"]:
+            if mode != "only":
+                logger.warning(f"{self.provider_info['provider']} API key not configured, using fallback patterns")
+            for title in self._generate_fallback_titles(topic, count):
+                yield title
+            return
+        
+        key = self._title_cache_key(topic, count, style)
+        messages = self._title_messages(topic, count, style)
+        cached = await self.cache.aget(key)
+        if cached is not None or mode == "first":
+            if cached is None or cached[1]:
+                await self._schedule_refresh(key, messages, 500, 0.8, lambda text: self._parse_titles(text, topic, count))
+            if cached is None:
+                for title in self._generate_fallback_titles(topic, count):
+                    yield title
+                return
+            for title in self._split_titles(cached[0])[:count]:
+                yield self._score_title(title, topic)
+            return
+        
+        chunks = []
+        pending = ""
+        emitted = 0
+        try:
+            async for chunk in self.ai_service.astream_text(messages, max_tokens=500, temperature=0.8):
+                chunks.append(chunk)
+                *lines, pending = (pending + chunk).split('\n')
+                for title in self._split_titles('\n'.join(lines)):
+                    if emitted < count:
+                        emitted += 1
+                        yield self._score_title(title, topic)
+            for title in self._split_titles(pending):
+                if emitted < count:
+                    emitted += 1
+                    yield self._score_title(title, topic)
+        except Exception as e:
+            logger.error(f"Error streaming viral titles: {e}")
+            if not emitted:
+                for title in self._generate_fallback_titles(topic, count):
+                    yield title
+            return
+        
+        if emitted:
+            await self.cache.aset(key, "".join(chunks))
+    
+    def _title_cache_key(self, topic: str, count: int, style: str) -> str:
+        """Response cache key for a title prompt"""
+        return self._cache_key("titles", topic, count=count, style=normalize_prompt_text(style))
+    
+    def _title_messages(self, topic: str, count: int, style: str) -> PromptMessages:
+        """Prompt for viral title generation"""
+        return PROMPTS["titles"].render(topic=topic, count=count, style=style)
+    
+    def _parse_titles(self, titles_text: str, topic: str, count: int) -> List[Dict]:
+        """Split generated titles and rank them by viral score"""
+        return self._rank_titles(self._split_titles(titles_text), topic, count)
+    
+    def _split_titles(self, titles_text: str) -> List[str]:
+        """Non-empty title lines of a completion"""
+        return [title.strip() for title in titles_text.split('\n') if title.strip()]
+    
+    def _score_title(self, title: str, topic: str) -> Dict:
+        """Title with its viral score"""
+        return {
+            "title": title,
+            "viral_score": self._calculate_title_viral_score(title, topic)
+        }
+    
+    def _rank_titles(self, titles: List[str], topic: str, count: int) -> List[Dict]:
+        """Score the first ``count`` titles and sort them by viral score"""
+        # Calculate viral scores for each title
+        result = [self._score_title(title, topic) for title in titles[:count]]
+        
+        # Sort by viral score
+        result.sort(key=lambda x: x["viral_score"], reverse=True)
+        
+        return result
+    
+    async def agenerate_hashtags(self, topic: str, titles: Optional[List] = None, count: int = 10) -> List[str]:
         """Generate relevant hashtags for a topic"""
         try:
             if not self.provider_info["available"]:
                 logger.warning(f"{self.provider_info['provider']} API key not configured, using fallback hashtags")
                 return self._generate_fallback_hashtags(topic, count)
             
-            # Extract keywords from titles if provided
-            keywords = []
-            if titles:
-                for title_data in titles:
-                    title = title_data.get("title", "") if isinstance(title_data, dict) else str(title_data)
-                    keywords.extend(self._extract_keywords(title))
-            
-            # Add topic keywords
-            keywords.extend(self._extract_keywords(topic))
-            keywords = list(set(keywords))[:5]  # Top 5 unique keywords
-            
-            prompt = f"""
-            Generate {count} relevant hashtags for YouTube Shorts about: "{topic}"
-            
-            Keywords to include: {', '.join(keywords)}
-            
-            Requirements:
-            - Mix of specific and general hashtags
-            - Include trending hashtags like #Shorts, #Viral, #FYP
-            - Use relevant topic-specific hashtags
-            - Keep hashtags under 20 characters each
-            - Include some engagement hashtags like #Like, #Comment
-            
-            Return only the hashtags, one per line, with no extra text.
-            """
-            
-            messages = [
-                {"role": "system", "content": "You are an expert at creating viral hashtags for social media content."},
-                {"role": "user", "content": prompt}
-            ]
-            
-            hashtags_text = self.ai_service.generate_text(messages, max_tokens=300, temperature=0.7)
-            hashtags = [tag.strip() for tag in hashtags_text.split('\n') if tag.strip()]
-            
-            # Add some standard hashtags
-            standard_hashtags = ["#Shorts", "#Viral", "#FYP"]
-            for tag in standard_hashtags:
-                if tag not in hashtags:
-                    hashtags.append(tag)
-            
-            return hashtags[:count]
+            return await self._agenerate_cached(
+                self._hashtag_cache_key(topic, titles, count), self._hashtag_messages(topic, titles, count),
+                300, 0.7, lambda text: self._parse_hashtags(text, count)
+            )
             
         except Exception as e:
             logger.error(f"Error generating hashtags: {e}")
             return self._generate_fallback_hashtags(topic, count)
     
-    def analyze_topic(self, topic: str, limit: int = 50) -> Dict:
+    def _hashtag_cache_key(self, topic: str, titles: Optional[List], count: int) -> str:
+        """Response cache key for a hashtag prompt; the titles feed its keywords"""
+        return self._cache_key("hashtags", topic, count=count, titles=self._title_texts(titles))
+    
+    def _title_texts(self, titles: Optional[List]) -> List[str]:
+        """Plain title strings from generated title dicts or strings"""
+        return [
+            title_data.get("title", "") if isinstance(title_data, dict) else str(title_data)
+            for title_data in titles or []
+        ]
+    
+    def _hashtag_messages(self, topic: str, titles: Optional[List], count: int) -> PromptMessages:
+        """Prompt for hashtag generation"""
+        # Extract keywords from titles if provided
+        keywords = []
+        for title in self._title_texts(titles):
+            keywords.extend(self._extract_keywords(title))
+        
+        # Add topic keywords
+        keywords.extend(self._extract_keywords(topic))
+        keywords = list(set(keywords))[:5]  # Top 5 unique keywords
+        
+        return PROMPTS["hashtags"].render(topic=topic, count=count, keywords=", ".join(keywords))
+    
+    def _parse_hashtags(self, hashtags_text: str, count: int) -> List[str]:
+        """Split generated hashtags and make sure the standard ones are present"""
+        hashtags = [tag.strip() for tag in hashtags_text.split('\n') if tag.strip()]
+        return self._complete_hashtags(hashtags, count)
+    
+    def _complete_hashtags(self, hashtags: List[str], count: int) -> List[str]:
+        """Append missing standard hashtags and keep the first ``count``"""
+        # Add some standard hashtags
+        standard_hashtags = ["#Shorts", "#Viral", "#FYP"]
+        for tag in standard_hashtags:
+            if tag not in hashtags:
+                hashtags.append(tag)
+        
+        return hashtags[:count]
+    
+    async def agenerate_content(self, topic: str, count: int = 10, style: str = "viral",
+                                hashtag_count: int = 10) -> Tuple[List[Dict], List[str]]:
+        """Generate titles and hashtags with one LLM call, falling back to one call each"""
+        if self._local_titles_mode() == "only":
+            titles = self._generate_fallback_titles(topic, count)
+            return titles, await self.agenerate_hashtags(topic, titles, hashtag_count)
+        if not self.provider_info["available"] or not settings.AI_COMBINED_GENERATION:
+            titles = await self.agenerate_viral_titles(topic, count, style)
+            return titles, await self.agenerate_hashtags(topic, titles, hashtag_count)
+        
+        try:
+            return await self._agenerate_cached(
+                self._content_cache_key(topic, count, style, hashtag_count),
+                self._content_messages(topic, count, style, hashtag_count),
+                800, 0.8, lambda text: self._parse_content(text, topic, count, hashtag_count),
+                local=self._local_first(lambda: (self._generate_fallback_titles(topic, count),
+                                                 self._generate_fallback_hashtags(topic, hashtag_count)))
+            )
+        except ValueError as e:
+            logger.warning(f"Unusable combined response, generating titles and hashtags separately: {e}")
+        except Exception as e:
+            logger.error(f"Error generating viral content: {e}")
+            return self._generate_fallback_titles(topic, count), self._generate_fallback_hashtags(topic, hashtag_count)
+        
+        titles = await self.agenerate_viral_titles(topic, count, style)
+        return titles, await self.agenerate_hashtags(topic, titles, hashtag_count)
+    
+    def _content_cache_key(self, topic: str, count: int, style: str, hashtag_count: int) -> str:
+        """Response cache key for a combined titles+hashtags prompt"""
+        return self._cache_key("content", topic, count=count, style=normalize_prompt_text(style), hashtag_count=hashtag_count)
+    
+    def prewarm_targets(self, topic: str) -> List[Tuple[str, Callable[[], Awaitable]]]:
+        """(cache key, call that regenerates it) for each entry a default generation request reads
+        
+        Covers POST /generate/ (combined prompt), /generate/titles and
+        /generate/hashtags with their default count and style. With
+        LOCAL_TITLES_MODE "only" titles never come from the LLM, so only
+        hashtags are covered.
+        """
+        count, style, hashtag_count = 10, "viral", 10
+        targets = [
+            (self._title_cache_key(topic, count, style), self._title_messages(topic, count, style), 500, 0.8,
+             lambda text: self._parse_titles(text, topic, count)),
+            (self._hashtag_cache_key(topic, None, hashtag_count), self._hashtag_messages(topic, None, hashtag_count), 300, 0.7,
+             lambda text: self._parse_hashtags(text, hashtag_count)),
+        ]
+        if self._local_titles_mode() == "only":
+            targets = targets[1:]
+        elif settings.AI_COMBINED_GENERATION:
+            targets.insert(0, (
+                self._content_cache_key(topic, count, style, hashtag_count),
+                self._content_messages(topic, count, style, hashtag_count), 800, 0.8,
+                lambda text: self._parse_content(text, topic, count, hashtag_count)
+            ))
+        return [
+            (key, functools.partial(self._agenerate_fresh, key, messages, max_tokens, temperature, parse))
+            for key, messages, max_tokens, temperature, parse in targets
+        ]
+    
+    def _content_messages(self, topic: str, count: int, style: str, hashtag_count: int) -> PromptMessages:
+        """Prompt for titles and hashtags in a single JSON response"""
+        keywords = self._extract_keywords(topic)[:5]
+        
+        return PROMPTS["content"].render(topic=topic, count=count, hashtag_count=hashtag_count, style=style,
+                                         keywords=", ".join(keywords))
+    
+    def _parse_content(self, response_text: str, topic: str, count: int,
+                       hashtag_count: int) -> Tuple[List[Dict], List[str]]:
+        """Parse the combined JSON response; raises ValueError when it is unusable"""
+        text = response_text.strip()
+        # Models often wrap JSON in a Markdown code fence
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end < start:
+            raise ValueError("No JSON object in combined generation response")
+        
+        data = json.loads(text[start:end + 1])
+        titles = data.get("titles") if isinstance(data, dict) else None
+        hashtags = data.get("hashtags") if isinstance(data, dict) else None
+        if not isinstance(titles, list) or not isinstance(hashtags, list):
+            raise ValueError("Combined generation response is missing titles or hashtags")
+        
+        titles = [title.strip() for title in titles if isinstance(title, str) and title.strip()]
+        hashtags = [tag.strip() for tag in hashtags if isinstance(tag, str) and tag.strip()]
+        if not titles:
+            raise ValueError("Combined generation response has no titles")
+        
+        return self._rank_titles(titles, topic, count), self._complete_hashtags(hashtags, hashtag_count)
+    
+    async def aanalyze_topic(self, topic: str, limit: int = 50) -> Dict:
         """Analyze a topic and provide insights"""
         try:
             if not self.provider_info["available"]:
                 logger.warning(f"{self.provider_info['provider']} API key not configured, using fallback analysis")
                 return self._generate_fallback_analysis(topic)
             
-            prompt = f"""
-            Analyze the topic "{topic}" for YouTube Shorts content creation.
-            
-            Provide insights on:
-            1. Top 5 trending tags related to this topic
-            2. Top 5 trending hashtags for this topic
-            3. 3 viral title patterns that work well for this topic
-            4. 5 trending keywords related to this topic
-            
-            Format your response as JSON with these keys:
-            - top_tags: list of tags with scores (0-1)
-            - top_hashtags: list of hashtags with scores (0-1)
-            - viral_patterns: list of title patterns
-            - trending_keywords: list of keywords
-            """
-            
-            messages = [
-                {"role": "system", "content": "You are an expert at analyzing social media trends and viral content patterns."},
-                {"role": "user", "content": prompt}
-            ]
-            
-            # Parse JSON response
-            import json
-            try:
-                response_text = self.ai_service.generate_text(messages, max_tokens=800, temperature=0.5)
-                analysis = json.loads(response_text.strip())
-                return analysis
-            except json.JSONDecodeError:
-                logger.error("Failed to parse AI response as JSON")
-                return self._generate_fallback_analysis(topic)
+            return await self._agenerate_cached(
+                self.analysis_cache_key(topic), self._analysis_messages(topic), 800, 0.5, self._parse_analysis
+            )
             
+        except ValueError:
+            logger.error("Failed to parse AI response as JSON")
+            return self._generate_fallback_analysis(topic)
         except Exception as e:
             logger.error(f"Error analyzing topic: {e}")
             return self._generate_fallback_analysis(topic)
     
+    async def aanalyze_topics(self, topics: List[str], use_cache: bool = True) -> Dict[str, Dict]:
+        """Analyze several topics with as few LLM calls as possible
+        
+        Cached topics cost no call. The rest are packed AI_ANALYSIS_BATCH_SIZE
+        to a prompt, and the prompts of one round go out concurrently; topics
+        missing or malformed in a response are retried together up to
+        AI_ANALYSIS_RETRIES times, then get the fallback analysis. Returns
+        analyses keyed by topic, in input order. With ``use_cache=False``
+        every topic is regenerated (results are still cached).
+        """
+        if not self.provider_info["available"]:
+            logger.warning(f"{self.provider_info['provider']} API key not configured, using fallback analysis")
+            return {topic: self._generate_fallback_analysis(topic) for topic in topics}
+        
+        results, pending = await self._cached_analyses(topics, use_cache)
+        for _ in range(1 + max(0, settings.AI_ANALYSIS_RETRIES)):
+            if not pending:
+                break
+            chunks = self.analysis_chunks(pending)
+            responses = await asyncio.gather(*(
+                self.ai_service.agenerate_text(
+                    self._batch_analysis_messages(chunk), max_tokens=self._batch_analysis_tokens(chunk), temperature=0.5
+                )
+                for chunk in chunks
+            ), return_exceptions=True)
+            pending = await self._collect_analyses(chunks, responses, results)
+        
+        return self._complete_analyses(topics, results)
+    
+    async def _cached_analyses(self, topics: List[str], use_cache: bool = True) -> Tuple[Dict[str, Dict], List[str]]:
+        """Analyses already in the response cache, and the distinct topics still to generate"""
+        distinct = list(dict.fromkeys(topics))
+        if use_cache:
+            lookups = await asyncio.gather(*(self.cache.aget(self.analysis_cache_key(topic)) for topic in distinct))
+        else:
+            lookups = [None] * len(distinct)
+        results = {}
+        pending = []
+        for topic, cached in zip(distinct, lookups):
+            if cached is not None:
+                # A stale entry is served; the next single-topic request refreshes it
+                try:
+                    results[topic] = self._parse_analysis(cached[0])
+                    continue
+                except ValueError:
+                    pass
+            pending.append(topic)
+        return results, pending
+    
+    def analysis_cache_key(self, topic: str) -> str:
+        """Response cache key for a topic's analysis, shared by single and batch analysis"""
+        return self._cache_key("analysis", topic)
+    
+    def analysis_chunks(self, topics: List[str]) -> List[List[str]]:
+        size = max(1, settings.AI_ANALYSIS_BATCH_SIZE)
+        return [topics[i:i + size] for i in range(0, len(topics), size)]
+    
+    def _batch_analysis_tokens(self, chunk: List[str]) -> int:
+        return min(MAX_OUTPUT_TOKENS, ANALYSIS_TOKENS_PER_TOPIC * len(chunk) + 100)
+    
+    async def _collect_analyses(self, chunks: List[List[str]], responses: List, results: Dict[str, Dict]) -> List[str]:
+        """Store usable per-topic analyses in ``results`` and the cache; return topics to retry
+        
+        Topics of a failed call are not retried: they get the fallback.
+        """
+        retry = []
+        fresh = {}
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, BaseException):
+                logger.error(f"Error analyzing topics: {response}")
+                continue
+            analyses = self._parse_batch_analysis(response, chunk)
+            for topic in chunk:
+                analysis = analyses.get(topic)
+                if analysis is None:
+                    retry.append(topic)
+                    continue
+                results[topic] = analysis
+                # Same entry a single-topic analysis of this topic would use
+                fresh[self.analysis_cache_key(topic)] = json.dumps(analysis)
+        await asyncio.gather(*(self.cache.aset(key, text) for key, text in fresh.items()))
+        if retry:
+            logger.warning(f"Batch analysis response unusable for {len(retry)} topic(s)")
+        return retry
+    
+    def _complete_analyses(self, topics: List[str], results: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Results in input order, with the fallback for every topic left without one"""
+        return {
+            topic: results[topic] if topic in results else self._generate_fallback_analysis(topic)
+            for topic in topics
+        }
+    
+    def _batch_analysis_messages(self, topics: List[str]) -> PromptMessages:
+        """Prompt for analysing several topics in one JSON response"""
+        return PROMPTS["analysis_batch"].render(topics=json.dumps(topics, ensure_ascii=False))
+    
+    def _parse_batch_analysis(self, response_text: str, topics: List[str]) -> Dict[str, Dict]:
+        """Usable per-topic analyses from a batch response; unusable topics are left out"""
+        text = response_text.strip()
+        # Models often wrap JSON in a Markdown code fence
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end < start:
+            return {}
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        
+        # Models do not always keep the topic's exact spelling
+        by_name = {normalize_prompt_text(name): analysis for name, analysis in data.items()}
+        analyses = {}
+        for topic in topics:
+            analysis = self._clean_analysis(by_name.get(normalize_prompt_text(topic)))
+            if analysis is not None:
+                analyses[topic] = analysis
+        return analyses
+    
+    def _analysis_messages(self, topic: str) -> PromptMessages:
+        """Prompt for topic analysis"""
+        return PROMPTS["analysis"].render(topic=topic)
+    
+    def _parse_analysis(self, response_text: str) -> Dict:
+        """Parse JSON response; raises ValueError when it is not a well-formed analysis"""
+        analysis = self._clean_analysis(json.loads(response_text.strip()))
+        if analysis is None:
+            raise ValueError("Topic analysis response is not a well-formed analysis object")
+        return analysis
+    
+    def _clean_analysis(self, analysis) -> Optional[Dict]:
+        """An LLM analysis reduced to ANALYSIS_FIELDS, or None if any field is malformed
+        
+        Tag and hashtag items are {"tag": str, "score": number} objects (or
+        bare strings); patterns and keywords are strings.
+        """
+        if not isinstance(analysis, dict):
+            return None
+        
+        cleaned = {}
+        for field, name_key in ANALYSIS_FIELDS.items():
+            items = analysis.get(field, [] if field in OPTIONAL_ANALYSIS_FIELDS else None)
+            if not isinstance(items, list) or not all(self._valid_analysis_item(item, name_key) for item in items):
+                return None
+            cleaned[field] = items
+        cleaned["source"] = AI_ANALYSIS_SOURCE
+        return cleaned
+    
+    def _valid_analysis_item(self, item, name_key: Optional[str]) -> bool:
+        if isinstance(item, str):
+            return True
+        return (
+            name_key is not None and isinstance(item, dict) and isinstance(item.get(name_key), str)
+            and isinstance(item.get("score", 0), (int, float)) and not isinstance(item.get("score"), bool)
+        )
+    
+    def _cache_key(self, kind: str, topic: str, **params) -> str:
+        """Response cache key; the model and the version of the kind's prompt template are always part of it"""
+        return self.cache.make_key(kind, topic, model=self.provider_info["model"],
+                                   prompt_version=PROMPTS[kind].version, **params)
+    
+    async def _agenerate_cached(self, key: str, messages: List[Dict[str, str]], max_tokens: int,
+                                temperature: float, parse: Callable[[str], T],
+                                local: Optional[Callable[[], T]] = None) -> T:
+        """Parsed generation for a prompt, from the response cache when possible
+        
+        ``parse`` turns the raw text into the result and raises ValueError when
+        the text is unusable; unusable text is never cached. A stale hit is
+        returned at once while one background task refreshes the entry. So
+        is ``local()`` on a miss, when given: the LLM then fills the entry.
+        """
+        cached = await self.cache.aget(key)
+        if cached is not None or local is not None:
+            if cached is None or cached[1]:
+                await self._schedule_refresh(key, messages, max_tokens, temperature, parse)
+            return parse(cached[0]) if cached is not None else local()
+        
+        return await self._agenerate_fresh(key, messages, max_tokens, temperature, parse)
+    
+    async def _agenerate_fresh(self, key: str, messages: List[Dict[str, str]], max_tokens: int,
+                               temperature: float, parse: Callable[[str], T]) -> T:
+        """Generate, parse and cache, sharing the call with concurrent identical misses"""
+        text = await self.flights.do(
+            key, lambda: self.ai_service.agenerate_text(messages, max_tokens=max_tokens, temperature=temperature)
+        )
+        result = parse(text)
+        await self.cache.aset(key, text)
+        return result
+    
+    async def _schedule_refresh(self, key: str, messages: List[Dict[str, str]], max_tokens: int,
+                                temperature: float, parse: Callable[[str], T]) -> None:
+        """Refresh a stale entry in a background task, unless another caller already is"""
+        if await self.cache.aclaim_refresh(key):
+            task = asyncio.create_task(self._arefresh_cached(key, messages, max_tokens, temperature, parse))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+    
+    def _local_titles_mode(self) -> str:
+        """LOCAL_TITLES_MODE, or "fallback" while no title model is loaded"""
+        return settings.LOCAL_TITLES_MODE if self.local_titles.ready else "fallback"
+    
+    def _local_first(self, local: Callable[[], T]) -> Optional[Callable[[], T]]:
+        """``local`` when cache misses are answered by the title model (LOCAL_TITLES_MODE "first")"""
+        return local if self._local_titles_mode() == "first" else None
+    
+    async def _arefresh_cached(self, key: str, messages: List[Dict[str, str]], max_tokens: int,
+                               temperature: float, parse: Callable[[str], T]) -> None:
+        """Regenerate a stale cache entry; on failure the stale entry stays in place"""
+        try:
+            text = await self.ai_service.agenerate_text(messages, max_tokens=max_tokens, temperature=temperature)
+            parse(text)
+            await self.cache.aset(key, text)
+        except Exception as e:
+            logger.warning(f"Generation cache refresh failed: {e}")
+        finally:
+            await self.cache.arelease_refresh(key)
+    
     def _generate_fallback_titles(self, topic: str, count: int) -> List[Dict]:
-        """Generate fallback titles using patterns when AI is not available"""
+        """Titles from the local title model, or from the fixed patterns when no model is loaded"""
+        if self.local_titles.ready:
+            # Model candidates first so they win ties, then the patterns in case the model offers few
+            candidates = self.local_titles.generate(topic) + [pattern.format(topic=topic) for pattern in VIRAL_TITLE_PATTERNS]
+            scored = [self._score_title(title, topic) for title in dict.fromkeys(candidates)]
+            scored.sort(key=lambda x: x["viral_score"], reverse=True)
+            return scored[:count]
+        
         titles = []
         for i, pattern in enumerate(VIRAL_TITLE_PATTERNS[:count]):
             title = pattern.format(topic=topic)
@@ -205,7 +582,9 @@ class AIGenerationService:
                 f"How {topic} Changed Everything",
                 f"Why {topic} is Going Viral"
             ],
-            "trending_keywords": keywords[:5]
+            "trending_keywords": keywords[:5],
+            # Never persisted: it says nothing about the topic beyond its words
+            "source": FALLBACK_ANALYSIS_SOURCE
         }
     
     def _extract_keywords(self, text: str) -> List[str]:
@@ -5,13 +5,26 @@ AI Provider Service for ReelRanker
 Supports Google AI Studio (Gemini)
 """
 
+import asyncio
+import hashlib
+import json
+import random
+import re
 import requests
 import logging
+import threading
+import time
 import google.generativeai as genai
-from typing import List, Dict, Optional, Any
+from collections import deque
+from contextlib import contextmanager
+from typing import AsyncIterator, List, Dict, Optional, Any, Tuple
 from abc import ABC, abstractmethod
 
 from app.core.config import settings
+from app.core.constants import HASHTAG_CATEGORIES, VIRAL_TITLE_PATTERNS
+from app.services.circuit_breaker import CircuitBreaker, ai_circuit_breaker
+from app.services.concurrency_limiter import AdaptiveConcurrencyLimiter, ai_concurrency_limiter, is_overload
+from app.services.token_usage import Completion, PromptUsage, estimate_tokens, prompt_usage
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +36,24 @@ class AIProvider(ABC):
         """Generate text using the AI provider"""
         pass
     
+    async def agenerate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
+        """Generate text without blocking the event loop
+        
+        Providers without a native async client run generate_text in a worker thread.
+        """
+        return await asyncio.to_thread(self.generate_text, messages, max_tokens, temperature)
+    
+    async def astream_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> AsyncIterator[str]:
+        """Stream generated text in chunks as the provider produces it
+        
+        Providers without native streaming yield the whole completion as one chunk.
+        """
+        yield await self.agenerate_text(messages, max_tokens, temperature)
+    
+    def prompt_text(self, messages: List[Dict[str, str]]) -> str:
+        """The prompt as sent upstream, for token accounting"""
+        return "\n\n".join(message.get("content", "") for message in messages)
+    
     @abstractmethod
     def is_available(self) -> bool:
         """Check if the provider is available and configured"""
@@ -51,50 +82,394 @@ class GoogleAIProvider(AIProvider):
     def generate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
         """Generate text using Google AI Studio API"""
         try:
-            # Convert OpenAI format messages to Gemini format
-            prompt = self._convert_messages_to_prompt(messages)
-            
-            # Configure generation config for newer models
-            generation_config = {
-                "max_output_tokens": max_tokens,
-                "temperature": temperature,
-                "top_p": 0.8,
-                "top_k": 40
-            }
-            
             # Generate content with newer API format
             model = genai.GenerativeModel(self.model)
             response = model.generate_content(
-                prompt,
-                generation_config=generation_config
+                self._convert_messages_to_prompt(messages),
+                generation_config=self._generation_config(max_tokens, temperature)
             )
-            
-            if response.text:
-                return response.text.strip()
-            else:
-                raise Exception("No response text generated")
+            return self._response_text(response)
+                
+        except Exception as e:
+            logger.error(f"Google AI API error: {e}")
+            raise
+    
+    async def agenerate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
+        """Generate text using the async Gemini client"""
+        try:
+            model = genai.GenerativeModel(self.model)
+            response = await model.generate_content_async(
+                self._convert_messages_to_prompt(messages),
+                generation_config=self._generation_config(max_tokens, temperature)
+            )
+            return self._response_text(response)
+                
+        except Exception as e:
+            logger.error(f"Google AI API error: {e}")
+            raise
+    
+    async def astream_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> AsyncIterator[str]:
+        """Stream text chunks from the async Gemini client"""
+        try:
+            model = genai.GenerativeModel(self.model)
+            response = await model.generate_content_async(
+                self._convert_messages_to_prompt(messages),
+                generation_config=self._generation_config(max_tokens, temperature),
+                stream=True
+            )
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
                 
         except Exception as e:
             logger.error(f"Google AI API error: {e}")
             raise
     
+    def _generation_config(self, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        """Configure generation config for newer models"""
+        return {
+            "max_output_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": 0.8,
+            "top_k": 40
+        }
+    
+    def _response_text(self, response) -> Completion:
+        """Text of a Gemini response with its token usage, or an error when it has no text"""
+        if response.text:
+            # Older clients do not expose usage metadata; AIService then estimates it
+            usage = getattr(response, "usage_metadata", None)
+            return Completion.with_usage(
+                response.text.strip(),
+                getattr(usage, "prompt_token_count", None),
+                getattr(usage, "candidates_token_count", None)
+            )
+        else:
+            raise Exception("No response text generated")
+    
+    def prompt_text(self, messages: List[Dict[str, str]]) -> str:
+        return self._convert_messages_to_prompt(messages)
+    
     def _convert_messages_to_prompt(self, messages: List[Dict[str, str]]) -> str:
-        """Convert OpenAI format messages to Gemini prompt format"""
+        """Convert OpenAI format messages to Gemini prompt format
+        
+        System and user text go in unlabelled: "System:"/"User:" prefixes only
+        cost tokens, and the pinned client has no system instruction field.
+        Assistant turns (few-shot examples) keep their label.
+        """
         prompt_parts = []
         
         for message in messages:
             role = message.get("role", "user")
             content = message.get("content", "")
             
-            if role == "system":
-                prompt_parts.append(f"System: {content}")
-            elif role == "user":
-                prompt_parts.append(f"User: {content}")
-            elif role == "assistant":
+            if role == "assistant":
                 prompt_parts.append(f"Assistant: {content}")
+            elif content:
+                prompt_parts.append(content)
         
         return "\n\n".join(prompt_parts)
 
+class LocalOverloadError(Exception):
+    """Simulated 429 from LocalAIProvider"""
+    code = 429
+
+class LocalAIProvider(AIProvider):
+    """Deterministic stand-in for Gemini, for load tests and offline development
+    
+    Recognizes the title, hashtag, combined and analysis prompts and answers
+    them in the format the real model is asked for. The answer depends only
+    on the prompt (and LOCAL_AI_SEED), so repeated runs are comparable.
+    Latency is lognormal around LOCAL_AI_LATENCY_MS, with a LOCAL_AI_TAIL_MS
+    slow call at LOCAL_AI_TAIL_RATE. Calls fail at LOCAL_AI_ERROR_RATE, and
+    with a 429 (LocalOverloadError) beyond LOCAL_AI_CAPACITY calls in flight.
+    Streams come in LOCAL_AI_STREAM_CHUNK_CHARS chunks spread over the call's latency.
+    """
+    
+    EXTRA_TITLE_PATTERNS = [
+        "I Tried {topic} for 30 Days",
+        "{topic} Explained in 60 Seconds",
+        "Stop Doing {topic} Wrong",
+        "3 {topic} Hacks Nobody Talks About",
+        "This {topic} Trick Went Viral",
+        "Is {topic} Worth It?",
+    ]
+    
+    def __init__(self, model_name: str = None, latency_ms: float = None, latency_sigma: float = None,
+                 tail_rate: float = None, tail_ms: float = None, error_rate: float = None,
+                 stream_chunk_chars: int = None, seed: int = None, capacity: int = None):
+        self.model = model_name or settings.MODEL_NAME
+        self.latency = (latency_ms if latency_ms is not None else settings.LOCAL_AI_LATENCY_MS) / 1000
+        self.latency_sigma = latency_sigma if latency_sigma is not None else settings.LOCAL_AI_LATENCY_SIGMA
+        self.tail_rate = tail_rate if tail_rate is not None else settings.LOCAL_AI_TAIL_RATE
+        self.tail = (tail_ms if tail_ms is not None else settings.LOCAL_AI_TAIL_MS) / 1000
+        self.error_rate = error_rate if error_rate is not None else settings.LOCAL_AI_ERROR_RATE
+        self.stream_chunk_chars = max(1, stream_chunk_chars if stream_chunk_chars is not None
+                                      else settings.LOCAL_AI_STREAM_CHUNK_CHARS)
+        self.seed = seed if seed is not None else settings.LOCAL_AI_SEED
+        self.capacity = capacity if capacity is not None else settings.LOCAL_AI_CAPACITY
+        # Latency and errors follow a seeded sequence; answers are seeded by the prompt
+        self._rng = random.Random(f"{self.seed}:{self.model}")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+    
+    def is_available(self) -> bool:
+        return True
+    
+    def generate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
+        with self._occupy():
+            latency, fail = self._draw()
+            time.sleep(latency)
+            return self._answer(messages, fail)
+    
+    async def agenerate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
+        with self._occupy():
+            latency, fail = self._draw()
+            await asyncio.sleep(latency)
+            return self._answer(messages, fail)
+    
+    async def astream_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> AsyncIterator[str]:
+        with self._occupy():
+            latency, fail = self._draw()
+            text = self._answer(messages, fail)
+            chunks = [text[i:i + self.stream_chunk_chars] for i in range(0, len(text), self.stream_chunk_chars)]
+            for chunk in chunks:
+                await asyncio.sleep(latency / len(chunks))
+                yield chunk
+    
+    @contextmanager
+    def _occupy(self):
+        """Count a call in flight, refusing it with a simulated 429 beyond capacity"""
+        with self._lock:
+            if self.capacity and self._in_flight >= self.capacity:
+                raise LocalOverloadError(f"Local AI provider over capacity ({self.model}): 429 Too Many Requests")
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+    
+    def _draw(self) -> Tuple[float, bool]:
+        """(latency in seconds, whether the call fails) for the next call"""
+        if self._rng.random() < self.tail_rate:
+            latency = self.tail
+        else:
+            latency = self._rng.lognormvariate(0, self.latency_sigma) * self.latency if self.latency > 0 else 0.0
+        return latency, self._rng.random() < self.error_rate
+    
+    def _answer(self, messages: List[Dict[str, str]], fail: bool) -> str:
+        if fail:
+            raise Exception(f"Local AI provider simulated error ({self.model})")
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        rng = random.Random(hashlib.sha256(f"{self.seed}:{self.model}:{prompt}".encode()).hexdigest())
+        
+        match = re.search(r'Write (\d+) viral YouTube Shorts titles and (\d+) hashtags for "(.*)"\. Style:', prompt)
+        if match:
+            topic = match.group(3)
+            return json.dumps({
+                "titles": self._titles(rng, topic, int(match.group(1))),
+                "hashtags": self._hashtags(rng, topic, int(match.group(2)))
+            })
+        match = re.search(r'Write (\d+) viral YouTube Shorts titles for "(.*)"\. Style:', prompt)
+        if match:
+            return "\n".join(self._titles(rng, match.group(2), int(match.group(1))))
+        match = re.search(r'Write (\d+) hashtags for YouTube Shorts about "(.*)"\. Keywords:', prompt)
+        if match:
+            return "\n".join(self._hashtags(rng, match.group(2), int(match.group(1))))
+        match = re.search(r'Analyze each topic for YouTube Shorts: (\[.*\])', prompt)
+        if match:
+            return json.dumps({topic: self._analysis(rng, topic) for topic in json.loads(match.group(1))})
+        match = re.search(r'Analyze the topic "(.*)" for YouTube Shorts', prompt)
+        if match:
+            return json.dumps(self._analysis(rng, match.group(1)))
+        return "Local AI provider response"
+    
+    def _titles(self, rng: random.Random, topic: str, count: int) -> List[str]:
+        patterns = VIRAL_TITLE_PATTERNS + self.EXTRA_TITLE_PATTERNS
+        return [pattern.format(topic=topic.title()) for pattern in rng.sample(patterns, min(count, len(patterns)))]
+    
+    def _hashtags(self, rng: random.Random, topic: str, count: int) -> List[str]:
+        words = [word for word in re.findall(r"\w+", topic) if len(word) > 2]
+        hashtags = ["#" + "".join(word.title() for word in words)] if words else []
+        hashtags += ["#" + word.title() for word in words]
+        pool = [tag for tags in HASHTAG_CATEGORIES.values() for tag in tags if tag not in hashtags]
+        hashtags += rng.sample(pool, min(len(pool), max(0, count - len(hashtags))))
+        return hashtags[:count]
+    
+    def _analysis(self, rng: random.Random, topic: str) -> Dict[str, Any]:
+        words = [word.lower() for word in re.findall(r"\w+", topic) if len(word) > 2] or [topic.lower()]
+        keywords = (words + ["shorts", "viral", "trending", "tips", "challenge"])[:5]
+        return {
+            "top_tags": [{"tag": keyword.title(), "score": round(rng.uniform(0.5, 0.95), 2)} for keyword in keywords],
+            "top_hashtags": [{"hashtag": "#" + keyword.title(), "score": round(rng.uniform(0.5, 0.95), 2)} for keyword in keywords],
+            "viral_patterns": self._titles(rng, topic, 3),
+            "trending_keywords": keywords
+        }
+
+class ModelStats:
+    """Rolling latency and error window for one routed model"""
+    
+    # Below this many calls the percentiles are not trusted
+    MIN_SAMPLES = 20
+    
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)
+        self.errors = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, latency: float, error: bool = False) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+            self.errors.append(error)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at percentile ``q`` (0-100), or None before MIN_SAMPLES calls"""
+        with self._lock:
+            if len(self.latencies) < self.MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+    
+    def error_rate(self) -> float:
+        with self._lock:
+            return sum(self.errors) / len(self.errors) if self.errors else 0.0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p90, p99 = (self.percentile(q) for q in (50, 90, 99))
+        return {
+            "calls": len(self.latencies),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p90_ms": round(p90 * 1000, 1) if p90 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "error_rate": round(self.error_rate(), 4)
+        }
+
+class RoutedAIProvider(AIProvider):
+    """Routes each call to the fastest healthy model and hedges slow ones
+    
+    Per-model latency percentiles and error rates come from a rolling window
+    of AI_ROUTING_WINDOW calls. A model is healthy while its error rate stays
+    below AI_ROUTING_MAX_ERROR_RATE; among healthy models the one with the
+    lowest median latency is the primary (models without enough samples go
+    first, so every model gets measured). When the primary has not answered
+    by its p90 latency (AI_HEDGE_DEFAULT_DELAY_MS until it has enough
+    samples) the same request goes to the next model, and whichever answers
+    first wins. Streams are routed but never hedged.
+    """
+    
+    def __init__(self, providers: Dict[str, AIProvider], window: int = None, max_error_rate: float = None,
+                 hedge_percentile: float = None, default_hedge_delay_ms: float = None):
+        if not providers:
+            raise ValueError("RoutedAIProvider needs at least one provider")
+        self.providers = providers
+        self.model = "+".join(providers)
+        self.max_error_rate = max_error_rate if max_error_rate is not None else settings.AI_ROUTING_MAX_ERROR_RATE
+        self.hedge_percentile = hedge_percentile if hedge_percentile is not None else settings.AI_HEDGE_PERCENTILE
+        self.default_hedge_delay = (default_hedge_delay_ms if default_hedge_delay_ms is not None
+                                    else settings.AI_HEDGE_DEFAULT_DELAY_MS) / 1000
+        window = window if window is not None else settings.AI_ROUTING_WINDOW
+        self.stats = {model: ModelStats(window) for model in providers}
+        self.hedges = 0
+        self.hedge_wins = 0
+    
+    def is_available(self) -> bool:
+        return any(provider.is_available() for provider in self.providers.values())
+    
+    def prompt_text(self, messages: List[Dict[str, str]]) -> str:
+        return next(iter(self.providers.values())).prompt_text(messages)
+    
+    def ranked_models(self) -> List[str]:
+        """Models best first: healthy before unhealthy, then by median latency"""
+        def rank(model: str) -> Tuple[bool, float, float]:
+            stats = self.stats[model]
+            error_rate = stats.error_rate()
+            median = stats.percentile(50)
+            return error_rate >= self.max_error_rate, median if median is not None else 0.0, error_rate
+        
+        return sorted((model for model, provider in self.providers.items() if provider.is_available()), key=rank)
+    
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait for ``model`` before hedging"""
+        delay = self.stats[model].percentile(self.hedge_percentile)
+        return delay if delay is not None else self.default_hedge_delay
+    
+    def _route(self) -> Tuple[str, Optional[str]]:
+        """(primary, hedge) models; no hedge model with a single healthy model"""
+        ranked = self.ranked_models()
+        if not ranked:
+            raise Exception("No routed AI provider is available")
+        healthy = [model for model in ranked if self.stats[model].error_rate() < self.max_error_rate]
+        hedge = healthy[1] if len(healthy) > 1 and healthy[0] == ranked[0] else None
+        return ranked[0], hedge
+    
+    async def _acall(self, model: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+        started = time.perf_counter()
+        try:
+            text = await self.providers[model].agenerate_text(messages, max_tokens, temperature)
+        except asyncio.CancelledError:
+            # A hedge loser: its latency is at least this long
+            self.stats[model].record(time.perf_counter() - started)
+            raise
+        except Exception:
+            self.stats[model].record(time.perf_counter() - started, error=True)
+            raise
+        self.stats[model].record(time.perf_counter() - started)
+        return text
+    
+    def generate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
+        """Blocking agenerate_text, for callers outside an event loop"""
+        return asyncio.run(self.agenerate_text(messages, max_tokens, temperature))
+    
+    async def agenerate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
+        """Routed, hedged generation; the losing call is cancelled"""
+        primary, hedge = self._route()
+        if hedge is None:
+            return await self._acall(primary, messages, max_tokens, temperature)
+        
+        tasks = {asyncio.ensure_future(self._acall(primary, messages, max_tokens, temperature)): primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(primary))
+            if not done:
+                self.hedges += 1
+                tasks[asyncio.ensure_future(self._acall(hedge, messages, max_tokens, temperature))] = hedge
+            
+            # First success wins; an error only counts once every attempt has failed
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task] == hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                if not pending:
+                    raise next(iter(done)).exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def astream_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> AsyncIterator[str]:
+        """Stream from the primary model; a partial stream cannot be hedged"""
+        primary, _ = self._route()
+        started = time.perf_counter()
+        try:
+            async for chunk in self.providers[primary].astream_text(messages, max_tokens, temperature):
+                yield chunk
+        except Exception:
+            self.stats[primary].record(time.perf_counter() - started, error=True)
+            raise
+        self.stats[primary].record(time.perf_counter() - started)
+    
+    def routing_stats(self) -> Dict[str, Any]:
+        """Per-model latency/error stats and hedge counters for metrics"""
+        return {
+            "models": {model: stats.snapshot() for model, stats in self.stats.items()},
+            "ranked": self.ranked_models(),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins
+        }
+
 class AIProviderFactory:
     """Factory for creating AI providers"""
     
@@ -104,34 +479,154 @@ class AIProviderFactory:
         if provider_name is None:
             provider_name = settings.AI_PROVIDER
         
-        # Use Google AI Studio (default and only provider)
-        if provider_name.lower() == "google":
-            provider = GoogleAIProvider(model_name=model_name)
-            if provider.is_available():
-                return provider
-            else:
-                logger.warning("Google AI Studio not available")
+        # Google AI Studio in production; "local" is the offline stand-in for load tests
+        provider_classes = {"google": GoogleAIProvider, "local": LocalAIProvider}
+        provider_class = provider_classes.get(provider_name.lower())
+        if provider_class is None:
+            raise Exception(f"Unsupported AI provider: {provider_name}")
         
-        # If no provider is available, raise an error
-        raise Exception("No AI provider is configured. Please set GOOGLE_AI_API_KEY")
+        # Route across several models unless the caller pinned one
+        if model_name is None and len(settings.AI_ROUTING_MODELS) > 1:
+            provider = RoutedAIProvider({model: provider_class(model_name=model) for model in settings.AI_ROUTING_MODELS})
+        else:
+            provider = provider_class(model_name=model_name)
+        # An unconfigured provider is still returned so callers reach their fallbacks
+        if not provider.is_available():
+            hint = ", set GOOGLE_AI_API_KEY" if provider_class is GoogleAIProvider else ""
+            logger.warning(f"AI provider '{provider_name}' not available{hint}")
+        return provider
 
 class AIService:
-    """Main AI service that uses the appropriate provider"""
+    """Main AI service that uses the appropriate provider
+    
+    Every call is guarded by a circuit breaker and must finish within
+    AI_API_TIMEOUT seconds. While the circuit is open, calls raise
+    CircuitOpenError at once, so callers go straight to their fallbacks.
+    Calls in flight are capped by an adaptive (AIMD) concurrency limiter that
+    backs off on 429s and timeouts; calls over the cap queue for a bounded
+    time. Tokens and latency of every upstream call are recorded per prompt template.
+    """
     
-    def __init__(self, provider_name: str = None, model_name: str = None):
+    def __init__(self, provider_name: str = None, model_name: str = None,
+                 breaker: CircuitBreaker = ai_circuit_breaker, usage: PromptUsage = prompt_usage,
+                 limiter: AdaptiveConcurrencyLimiter = ai_concurrency_limiter):
         self.provider = AIProviderFactory.get_provider(provider_name, model_name)
         self.provider_name = provider_name or settings.AI_PROVIDER
         self.model_name = model_name or settings.MODEL_NAME
+        # Caps in-flight LLM calls for this worker; excess callers queue here
+        self.limiter = limiter
+        self.breaker = breaker
+        self.timeout = settings.AI_API_TIMEOUT
+        self.usage = usage
     
-    def generate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
-        """Generate text using the configured provider"""
-        return self.provider.generate_text(messages, max_tokens, temperature)
+    async def agenerate_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> str:
+        """Generate text without blocking the event loop, within the adaptive concurrency limit"""
+        self.breaker.check()
+        try:
+            slot = await self.limiter.acquire()
+        except BaseException:
+            self.breaker.release()
+            raise
+        # The deadline and the recorded latency cover the upstream call, not the wait for a slot
+        started = time.perf_counter()
+        try:
+            text = await asyncio.wait_for(self.provider.agenerate_text(messages, max_tokens, temperature), self.timeout)
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"AI call exceeded {self.timeout}s deadline")
+            self._call_failed(messages, slot, started, error)
+            raise error
+        except Exception as e:
+            self._call_failed(messages, slot, started, e)
+            raise
+        except BaseException:
+            self.breaker.release()
+            self.limiter.release(slot)
+            raise
+        self._call_succeeded(messages, slot, started, text)
+        return text
+    
+    async def astream_text(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.8) -> AsyncIterator[str]:
+        """Stream text chunks; the stream holds one concurrency slot until it ends
+        
+        The whole stream must finish within AI_API_TIMEOUT seconds. The
+        limiter judges it by its time to first chunk.
+        """
+        self.breaker.check()
+        try:
+            slot = await self.limiter.acquire()
+        except BaseException:
+            self.breaker.release()
+            raise
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        first_chunk = None
+        chunks = []
+        try:
+            deadline = loop.time() + self.timeout
+            stream = self.provider.astream_text(messages, max_tokens, temperature)
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), deadline - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - started
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                await stream.aclose()
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"AI stream exceeded {self.timeout}s deadline")
+            self._call_failed(messages, slot, started, error)
+            raise error
+        except Exception as e:
+            self._call_failed(messages, slot, started, e)
+            raise
+        except BaseException:
+            # Cancelled, or the consumer stopped reading early
+            self.breaker.release()
+            self.limiter.release(slot)
+            raise
+        self._call_succeeded(messages, slot, started, "".join(chunks), latency=first_chunk)
+    
+    def _call_succeeded(self, messages: List[Dict[str, str]], slot: float, started: float, text: str,
+                        latency: Optional[float] = None) -> None:
+        self.breaker.record_success()
+        self.limiter.release(slot, latency=latency if latency is not None else time.perf_counter() - started)
+        self._record_usage(messages, started, text)
+    
+    def _call_failed(self, messages: List[Dict[str, str]], slot: float, started: float, error: BaseException) -> None:
+        self.breaker.record_failure()
+        self.limiter.release(slot, overload=is_overload(error))
+        self._record_usage(messages, started)
+    
+    def _record_usage(self, messages: List[Dict[str, str]], started: float, text: Optional[str] = None) -> None:
+        """Record one upstream call (failed when ``text`` is None) under its prompt template
+        
+        Token counts the provider did not report are estimated from text length.
+        """
+        prompt_tokens = getattr(text, "prompt_tokens", None)
+        output_tokens = getattr(text, "output_tokens", None)
+        self.usage.record(
+            getattr(messages, "template", None),
+            prompt_tokens if prompt_tokens is not None else estimate_tokens(self.provider.prompt_text(messages)),
+            output_tokens if output_tokens is not None else estimate_tokens(text),
+            time.perf_counter() - started,
+            error=text is None,
+            estimated=prompt_tokens is None or output_tokens is None
+        )
     
     def get_provider_info(self) -> Dict[str, Any]:
         """Get information about the current provider"""
-        return {
+        info = {
             "provider": self.provider_name,
             "available": self.provider.is_available(),
             "model": getattr(self.provider, 'model', 'unknown'),
-            "model_name": self.model_name
+            "model_name": self.model_name,
+            "concurrency": self.limiter.stats(),
+            "circuit": self.breaker.state
         }
+        if isinstance(self.provider, RoutedAIProvider):
+            info["routing"] = self.provider.routing_stats()
+        return info
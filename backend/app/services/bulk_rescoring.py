@@ -0,0 +1,197 @@
+"""
+Bulk rescoring job for stored videos
+
+Streams the videos table with a server-side cursor, scores chunks across a
+process pool with the batch scoring engine and writes viral_score back with
+one UPDATE per chunk. Progress is checkpointed after every committed chunk so
+an interrupted run resumes where it stopped.
+
+Usage:
+    python -m app.services.bulk_rescoring [--chunk-size N] [--workers N] [--restart]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Float, String, column, func, select, update, values
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.expression import Update
+
+from app.db.connection import engine
+from app.models.video import Video
+from app.services.batch_scoring import BatchScoringEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_CHECKPOINT_PATH = "logs/rescore_checkpoint.json"
+
+# (id, title, tags, hashtags, topic)
+VideoRow = Tuple[str, str, Optional[List[str]], Optional[List[str]], Optional[str]]
+
+# Per-process engine, built once by the pool initializer
+_worker_engine: Optional[BatchScoringEngine] = None
+
+
+def _init_worker() -> None:
+    """Build the scoring engine once per worker process"""
+    global _worker_engine
+    _worker_engine = BatchScoringEngine()
+
+
+def _score_rows(rows: List[VideoRow]) -> List[Tuple[str, float]]:
+    """Score one chunk of rows inside a worker process"""
+    matrix = _worker_engine.extract_matrix([
+        (title, tags, hashtags, topic) for _, title, tags, hashtags, topic in rows
+    ])
+    scores = _worker_engine.score_matrix(matrix).tolist()
+    return [(row[0], round(score, 3)) for row, score in zip(rows, scores)]
+
+
+class BulkRescoringJob:
+    """Recompute Video.viral_score for every stored row"""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: Optional[int] = None,
+                 checkpoint_path: str = DEFAULT_CHECKPOINT_PATH, db_engine: Engine = engine):
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint_path = Path(checkpoint_path)
+        self.db_engine = db_engine
+        self.table = Video.__table__
+
+    def run(self, restart: bool = False) -> int:
+        """Rescore all rows after the last checkpoint; returns rows updated in this run"""
+        checkpoint = {} if restart else self._load_checkpoint()
+        last_id = checkpoint.get("last_id")
+        processed = 0
+        total = self._count_remaining(last_id)
+        started = time.monotonic()
+
+        logger.info(f"Rescoring {total} videos with {self.workers} workers"
+                    + (f", resuming after id {last_id}" if last_id else ""))
+
+        # Keep a bounded number of chunks in flight so memory stays flat
+        max_in_flight = self.workers * 2
+        pending: Deque[Future] = deque()
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            for rows in self._iter_chunks(last_id):
+                pending.append(pool.submit(_score_rows, rows))
+                if len(pending) >= max_in_flight:
+                    processed += self._commit(pending.popleft().result(), processed, total, started)
+
+            while pending:
+                processed += self._commit(pending.popleft().result(), processed, total, started)
+
+        logger.info(f"Rescoring finished: {processed} videos in {time.monotonic() - started:.1f}s")
+        return processed
+
+    def _commit(self, scores: List[Tuple[str, float]], processed: int, total: int, started: float) -> int:
+        """Write one scored chunk, advance the checkpoint and report progress"""
+        self._write_scores(scores)
+        # Chunks complete in submission order, so the last id is a safe resume point
+        self._save_checkpoint(scores[-1][0])
+
+        done = processed + len(scores)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        percent = (done / total * 100) if total else 100.0
+        logger.info(f"Rescored {done}/{total} videos ({percent:.1f}%, {done / elapsed:.0f} rows/s)")
+        return len(scores)
+
+    def _count_remaining(self, last_id: Optional[str]) -> int:
+        """Count rows still to be rescored"""
+        query = select(func.count()).select_from(self.table)
+        if last_id is not None:
+            query = query.where(self.table.c.id > last_id)
+        with self.db_engine.connect() as connection:
+            return connection.execute(query).scalar_one()
+
+    def _iter_chunks(self, last_id: Optional[str]) -> Iterator[List[VideoRow]]:
+        """Stream rows in id order through a server-side cursor"""
+        query = select(
+            self.table.c.id,
+            self.table.c.title,
+            self.table.c.tags,
+            self.table.c.hashtags,
+            self.table.c.topic
+        ).order_by(self.table.c.id)
+        if last_id is not None:
+            query = query.where(self.table.c.id > last_id)
+
+        with self.db_engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True,
+                yield_per=self.chunk_size
+            ).execute(query)
+            for partition in result.partitions():
+                yield [tuple(row) for row in partition]
+
+    def _write_scores(self, scores: List[Tuple[str, float]]) -> None:
+        """Apply a chunk of scores with a single UPDATE"""
+        with self.db_engine.begin() as connection:
+            connection.execute(self._update_statement(scores))
+
+    def _update_statement(self, scores: List[Tuple[str, float]]) -> Update:
+        """UPDATE ... FROM (VALUES ...) setting every score in the chunk"""
+        new_scores = values(
+            column("id", String),
+            column("score", Float),
+            name="new_scores"
+        ).data(scores)
+        return (
+            update(self.table)
+            .where(self.table.c.id == new_scores.c.id)
+            .values(viral_score=new_scores.c.score)
+        )
+
+    def _load_checkpoint(self) -> Dict:
+        """Read the resume checkpoint, if any"""
+        try:
+            return json.loads(self.checkpoint_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable rescoring checkpoint: {e}")
+            return {}
+
+    def _save_checkpoint(self, last_id: str) -> None:
+        """Atomically record the last committed id"""
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.checkpoint_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps({"last_id": last_id, "updated_at": time.time()}))
+        os.replace(temp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self) -> None:
+        """Forget progress so the next run starts from the first row"""
+        self.checkpoint_path.unlink(missing_ok=True)
+
+
+def main() -> None:
+    from app.core.logging import setup_logging
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Recompute viral_score for stored videos")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Scoring processes (default: all cores)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="Checkpoint file path")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and rescore everything")
+    args = parser.parse_args()
+
+    job = BulkRescoringJob(
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint
+    )
+    job.run(restart=args.restart)
+    job.clear_checkpoint()
+
+
+if __name__ == "__main__":
+    main()
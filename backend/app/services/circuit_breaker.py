@@ -0,0 +1,117 @@
+from typing import Dict
+import logging
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing.
+
+    Closed: calls go through, and AI_BREAKER_FAILURE_THRESHOLD consecutive
+    failures open the circuit. Open: calls are refused at once for
+    AI_BREAKER_RESET_SECONDS. Half-open: up to AI_BREAKER_HALF_OPEN_PROBES
+    calls go through as probes. A successful probe closes the circuit and a
+    failed one reopens it. Callers pair each allowed call with
+    record_success, record_failure or release (no verdict, e.g. cancelled).
+    """
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_seconds: float = None,
+                 half_open_probes: int = None):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold if failure_threshold is not None
+                                     else settings.AI_BREAKER_FAILURE_THRESHOLD)
+        self.reset_seconds = reset_seconds if reset_seconds is not None else settings.AI_BREAKER_RESET_SECONDS
+        self.half_open_probes = max(1, half_open_probes if half_open_probes is not None
+                                    else settings.AI_BREAKER_HALF_OPEN_PROBES)
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def check(self) -> None:
+        """allow(), raising CircuitOpenError when the call is refused"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                logger.info(f"{self.name} circuit closed after a successful probe")
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._open()
+
+    def release(self) -> None:
+        """Give back an allowed call that ended without a verdict"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _open(self) -> None:
+        logger.warning(f"{self.name} circuit opened after {self._failures} consecutive failures")
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
+        self.opened += 1
+
+    def stats(self) -> Dict:
+        """Breaker state and counters for health and metrics"""
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": round(max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at)), 1)
+                if state == OPEN else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected
+            }
+
+
+# Guards every upstream AI call in this process
+ai_circuit_breaker = CircuitBreaker("AI provider")
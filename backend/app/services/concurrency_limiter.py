@@ -0,0 +1,192 @@
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses (and gRPC-mapped codes of google.api_core errors) that mean the upstream is overloaded
+OVERLOAD_STATUS_CODES = {429, 503, 504}
+
+
+class ConcurrencyLimitError(Exception):
+    """Raised when a call finds the queue full or waits too long for a slot"""
+
+
+def is_overload(error: BaseException) -> bool:
+    """Whether an upstream error means "slow down": a timeout, 429, 503 or 504"""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    return getattr(error, "code", None) in OVERLOAD_STATUS_CODES
+
+
+class _Waiter:
+    __slots__ = ("wake", "granted")
+
+    def __init__(self, wake: Callable[[], None]):
+        self.wake = wake
+        self.granted = False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent upstream calls, shared by sync and async callers.
+
+    A call takes a slot with acquire (or acquire_sync) and gives it back
+    with release. Each success faster than AI_LIMITER_HEALTHY_LATENCY_MS
+    while the limit is saturated raises the limit by 1/limit, so by about one
+    per limit's worth of calls. A 429, 503, 504 or timeout cuts it by
+    AI_LIMITER_BACKOFF, at most once per burst: overloads of calls that
+    started before the last cut are ignored. The limit stays within
+    AI_LIMITER_MIN_CONCURRENCY..AI_LIMITER_MAX_CONCURRENCY.
+
+    Calls over the limit wait in FIFO order for up to
+    AI_LIMITER_QUEUE_TIMEOUT_SECONDS. Once AI_LIMITER_MAX_QUEUE calls are
+    waiting, further ones are refused at once with ConcurrencyLimitError.
+    """
+
+    def __init__(self, name: str, initial: int = None, min_limit: int = None, max_limit: int = None,
+                 backoff: float = None, healthy_latency_ms: float = None, queue_timeout: float = None,
+                 max_queue: int = None):
+        self.name = name
+        self.min_limit = max(1, min_limit if min_limit is not None else settings.AI_LIMITER_MIN_CONCURRENCY)
+        self.max_limit = max(self.min_limit, max_limit if max_limit is not None else settings.AI_LIMITER_MAX_CONCURRENCY)
+        initial = initial if initial is not None else settings.AI_MAX_CONCURRENCY
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.backoff = backoff if backoff is not None else settings.AI_LIMITER_BACKOFF
+        self.healthy_latency = (healthy_latency_ms if healthy_latency_ms is not None
+                                else settings.AI_LIMITER_HEALTHY_LATENCY_MS) / 1000
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.AI_LIMITER_QUEUE_TIMEOUT_SECONDS
+        self.max_queue = max_queue if max_queue is not None else settings.AI_LIMITER_MAX_QUEUE
+
+        self.in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.queue_timeouts = 0
+        self.decreases = 0
+
+    @property
+    def slots(self) -> int:
+        """Calls allowed in flight right now"""
+        return int(self.limit)
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the call's start time for release"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._admit():
+                return time.monotonic()
+            future = loop.create_future()
+            waiter = self._enqueue(lambda: loop.call_soon_threadsafe(_resolve, future))
+
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.queue_timeouts += 1
+                        raise ConcurrencyLimitError(f"No {self.name} slot within {self.queue_timeout}s") from None
+                    raise
+            # The slot was handed over just as the wait ended
+            if isinstance(e, asyncio.CancelledError):
+                self.release(None)
+                raise
+        return time.monotonic()
+
+    def acquire_sync(self) -> float:
+        """Blocking acquire for worker threads"""
+        with self._lock:
+            if self._admit():
+                return time.monotonic()
+            event = threading.Event()
+            waiter = self._enqueue(event.set)
+
+        if not event.wait(self.queue_timeout):
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    self.queue_timeouts += 1
+                    raise ConcurrencyLimitError(f"No {self.name} slot within {self.queue_timeout}s")
+        return time.monotonic()
+
+    def release(self, started: Optional[float], latency: Optional[float] = None, overload: bool = False) -> None:
+        """Give back a slot, adapting the limit to the call's outcome
+
+        ``latency`` marks a success; ``overload`` a 429 or timeout. With
+        neither (other errors, cancellation) the limit is left alone.
+        """
+        with self._lock:
+            saturated = bool(self._waiters) or self.in_flight >= self.slots
+            self.in_flight -= 1
+            if overload:
+                if started is None or started >= self._last_decrease:
+                    previous = self.slots
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = time.monotonic()
+                    self.decreases += 1
+                    if self.slots != previous:
+                        logger.warning(f"{self.name} overloaded; concurrency limit cut to {self.slots}")
+            elif latency is not None and latency <= self.healthy_latency and saturated:
+                # Only grow while the limit is what holds calls back
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._wake()
+
+    def _admit(self) -> bool:
+        if self.in_flight < self.slots and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise ConcurrencyLimitError(f"{self.name} queue is full ({self.max_queue} waiting)")
+        return False
+
+    def _enqueue(self, wake: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(wake)
+        self._waiters.append(waiter)
+        self.queued += 1
+        return waiter
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters, oldest first"""
+        while self._waiters and self.in_flight < self.slots:
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self.in_flight += 1
+            self.admitted += 1
+            waiter.wake()
+
+    def stats(self) -> Dict:
+        """Current limit, in-flight calls, queue depth and counters for health and metrics"""
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "slots": self.slots,
+                "in_flight": self.in_flight,
+                "queue_depth": len(self._waiters),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": self.rejected,
+                "queue_timeouts": self.queue_timeouts,
+                "decreases": self.decreases
+            }
+
+
+# Limits upstream AI calls in this process
+ai_concurrency_limiter = AdaptiveConcurrencyLimiter("AI provider")
@@ -0,0 +1,292 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+import redis
+
+from app.core.config import settings
+from app.services.singleflight import call_lock_ttl, release_lock
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt_text(text: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a topic or style"""
+    return " ".join((text or "").lower().split())
+
+
+class GenerationCache:
+    """Two-tier cache for raw LLM responses of the generation endpoints.
+
+    Keys hash the request kind, the normalized topic and whatever else shapes
+    the prompt (style, counts, model, prompt template version), so "Cats " and
+    "cats" share an entry. Only the raw response text is stored; callers parse
+    and score it on every hit, so scoring changes apply without regenerating.
+
+    An entry is fresh for GENERATION_CACHE_TTL seconds and may then be served
+    stale for GENERATION_CACHE_STALE_TTL more while one caller refreshes it in
+    the background (claim_refresh). The first tier is an in-process LRU bounded
+    by GENERATION_CACHE_MAX_SIZE; the second is Redis, shared by every worker.
+    Redis errors are logged and treated as misses. Async callers use the
+    a-prefixed methods, which keep Redis I/O off the event loop.
+    """
+
+    def __init__(self, max_size: int = None, ttl: int = None, stale_ttl: int = None,
+                 redis_client: Optional[redis.Redis] = None):
+        self.max_size = max_size if max_size is not None else settings.GENERATION_CACHE_MAX_SIZE
+        self.ttl = ttl if ttl is not None else settings.GENERATION_CACHE_TTL
+        self.stale_ttl = stale_ttl if stale_ttl is not None else settings.GENERATION_CACHE_STALE_TTL
+        self.redis_client = redis_client
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # Keys being refreshed by this process, with their Redis lock token (None: no Redis lock)
+        self._refreshing: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def attach_redis(self, redis_client: Optional[redis.Redis]) -> None:
+        """Use (or stop using, with None) a Redis client as the shared tier"""
+        self.redis_client = redis_client
+
+    def make_key(self, kind: str, topic: str, **params) -> str:
+        """Key for one kind of generation ("titles", "hashtags", ...) of a topic"""
+        payload = json.dumps([kind, normalize_prompt_text(topic), params], sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+        return f"generation:{kind}:{digest}"
+
+    def get(self, key: str) -> Optional[Tuple[str, bool]]:
+        """(text, stale) from the local tier or Redis; None when missing or past the stale window"""
+        now = time.time()
+        entry = self._get_local(key, now)
+        if entry is None and self.redis_client is not None:
+            entry = self._load_remote(key)
+        return self._count_lookup(entry, now)
+
+    async def aget(self, key: str) -> Optional[Tuple[str, bool]]:
+        """Async counterpart of get; the Redis round trip runs in a worker thread"""
+        now = time.time()
+        entry = self._get_local(key, now)
+        if entry is None and self.redis_client is not None:
+            entry = await asyncio.to_thread(self._load_remote, key)
+        return self._count_lookup(entry, now)
+
+    def _get_local(self, key: str, now: float) -> Optional[Dict]:
+        """Local-tier entry still within its stale window; expired ones are dropped"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry["created_at"] < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+        return entry
+
+    def _load_remote(self, key: str) -> Optional[Dict]:
+        """Entry from Redis, promoted into the local tier"""
+        entry = self._read_remote(key)
+        if entry is not None:
+            self._store_local(key, entry)
+        return entry
+
+    def _count_lookup(self, entry: Optional[Dict], now: float) -> Optional[Tuple[str, bool]]:
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            stale = now - entry["created_at"] >= self.ttl
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.fresh_hits += 1
+        return entry["text"], stale
+
+    def is_fresh(self, key: str) -> bool:
+        """Whether a fresh entry exists, without touching LRU order or hit counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.redis_client is not None:
+            entry = self._read_remote(key)
+        return self._fresh(entry)
+
+    async def ais_fresh(self, key: str) -> bool:
+        """Async counterpart of is_fresh"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.redis_client is not None:
+            entry = await asyncio.to_thread(self._read_remote, key)
+        return self._fresh(entry)
+
+    async def afresh_keys(self, keys: Sequence[str]) -> Set[str]:
+        """The keys with a fresh entry, like is_fresh for each; Redis is read once (MGET) off the event loop"""
+        with self._lock:
+            entries = {key: self._entries.get(key) for key in keys}
+        remote_keys = [key for key, entry in entries.items() if entry is None]
+        if remote_keys and self.redis_client is not None:
+            entries.update(await asyncio.to_thread(self._read_remote_many, remote_keys))
+        return {key for key, entry in entries.items() if self._fresh(entry)}
+
+    def _fresh(self, entry: Optional[Dict]) -> bool:
+        return entry is not None and time.time() - entry["created_at"] < self.ttl
+
+    def set(self, key: str, text: str) -> None:
+        """Store a fresh response in both tiers"""
+        entry = self._new_entry(key, text)
+        if self.redis_client is not None:
+            self._write_remote(key, entry)
+
+    async def aset(self, key: str, text: str) -> None:
+        """Async counterpart of set; the Redis write runs in a worker thread"""
+        entry = self._new_entry(key, text)
+        if self.redis_client is not None:
+            await asyncio.to_thread(self._write_remote, key, entry)
+
+    def _new_entry(self, key: str, text: str) -> Dict:
+        entry = {"text": text, "created_at": time.time()}
+        self._store_local(key, entry)
+        return entry
+
+    def _write_remote(self, key: str, entry: Dict) -> None:
+        try:
+            self.redis_client.set(key, json.dumps(entry), ex=self.ttl + self.stale_ttl)
+        except Exception as e:
+            logger.warning(f"Generation cache Redis write failed: {e}")
+
+    def claim_refresh(self, key: str) -> bool:
+        """True for exactly one caller per stale entry, across workers when Redis is attached"""
+        if not self._claim_local(key):
+            return False
+        return self._finish_claim(key, *(self._claim_remote(key) if self.redis_client is not None else (True, None)))
+
+    async def aclaim_refresh(self, key: str) -> bool:
+        """Async counterpart of claim_refresh"""
+        if not self._claim_local(key):
+            return False
+        claim = await asyncio.to_thread(self._claim_remote, key) if self.redis_client is not None else (True, None)
+        return self._finish_claim(key, *claim)
+
+    def _claim_local(self, key: str) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing[key] = None
+            return True
+
+    def _claim_remote(self, key: str) -> Tuple[bool, Optional[str]]:
+        """(claimed, lock token) for the cross-worker refresh lock"""
+        token = uuid.uuid4().hex
+        try:
+            # Outlives the refresh call; expires on its own if the refreshing worker dies
+            if self.redis_client.set(f"{key}:refresh", token, nx=True, ex=call_lock_ttl()):
+                return True, token
+            return False, None
+        except Exception as e:
+            logger.warning(f"Generation cache Redis refresh lock failed: {e}")
+            return True, None
+
+    def _finish_claim(self, key: str, claimed: bool, token: Optional[str]) -> bool:
+        with self._lock:
+            if not claimed:
+                self._refreshing.pop(key, None)
+                return False
+            self._refreshing[key] = token
+            self.refreshes += 1
+        return True
+
+    def release_refresh(self, key: str) -> None:
+        """End a refresh started with claim_refresh, whether or not it succeeded"""
+        with self._lock:
+            token = self._refreshing.pop(key, None)
+        if token is not None and self.redis_client is not None:
+            self._release_remote(key, token)
+
+    async def arelease_refresh(self, key: str) -> None:
+        """Async counterpart of release_refresh"""
+        with self._lock:
+            token = self._refreshing.pop(key, None)
+        if token is not None and self.redis_client is not None:
+            await asyncio.to_thread(self._release_remote, key, token)
+
+    def _release_remote(self, key: str, token: str) -> None:
+        try:
+            release_lock(self.redis_client, f"{key}:refresh", token)
+        except Exception as e:
+            logger.warning(f"Generation cache Redis refresh unlock failed: {e}")
+
+    def _read_remote(self, key: str) -> Optional[Dict]:
+        """Entry from Redis; errors and unreadable values count as misses"""
+        try:
+            raw = self.redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"Generation cache Redis read failed: {e}")
+            return None
+        return self._decode(key, raw)
+
+    def _read_remote_many(self, keys: List[str]) -> Dict[str, Optional[Dict]]:
+        """Entries from Redis in one MGET; errors and unreadable values count as misses"""
+        try:
+            raw_values = self.redis_client.mget(keys)
+        except Exception as e:
+            logger.warning(f"Generation cache Redis read failed: {e}")
+            return {}
+        return {key: self._decode(key, raw) for key, raw in zip(keys, raw_values)}
+
+    def _decode(self, key: str, raw) -> Optional[Dict]:
+        if raw is None:
+            return None
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            entry = None
+        if not isinstance(entry, dict) or not isinstance(entry.get("text"), str) \
+                or not isinstance(entry.get("created_at"), (int, float)):
+            logger.warning(f"Ignoring unreadable generation cache entry {key}")
+            return None
+        return entry
+
+    def _store_local(self, key: str, entry: Dict) -> None:
+        """Insert into the LRU, evicting the least recently used entries"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop the local tier and reset counters (Redis entries expire on their own)"""
+        with self._lock:
+            self._entries.clear()
+            self.fresh_hits = self.stale_hits = self.misses = self.refreshes = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for metrics"""
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refreshing": len(self._refreshing),
+                "hit_rate": round((self.fresh_hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "redis_enabled": self.redis_client is not None
+            }
+
+
+# Shared by every generation endpoint in this process
+generation_cache = GenerationCache()
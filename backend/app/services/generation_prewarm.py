@@ -0,0 +1,184 @@
+from typing import Awaitable, Callable, Dict, List, Tuple
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.db.connection import get_db_context
+from app.services.ai_generation import AIGenerationService
+from app.services.circuit_breaker import OPEN
+from app.services.generation_cache import normalize_prompt_text
+from app.services.trend_analysis import TrendAnalysisService
+
+logger = logging.getLogger(__name__)
+
+PREWARM_LOCK_KEY = "generation:prewarm:run"
+
+
+class GenerationPrewarmer:
+    """Precomputes generations for trending topics into the generation cache.
+
+    Every PREWARM_INTERVAL_SECONDS a run takes the top PREWARM_TOP_TOPICS
+    topics (by recent video engagement, topped up from get_trending_topics)
+    and regenerates whatever a default /generate/, /generate/titles,
+    /generate/hashtags or /generate/analyze request for them would read,
+    unless the entry is still fresh. Analyses go out as batch prompts.
+
+    A run starts at most PREWARM_LLM_BUDGET LLM calls, keeps at most
+    PREWARM_CONCURRENCY in flight, and is skipped while the AI circuit is
+    open. With Redis attached to the cache only one worker runs per interval.
+    """
+
+    def __init__(self, ai_generation_service: AIGenerationService, trend_service: TrendAnalysisService,
+                 top_topics: int = None, llm_budget: int = None, concurrency: int = None):
+        self.ai_generation_service = ai_generation_service
+        self.trend_service = trend_service
+        self.top_topics = top_topics if top_topics is not None else settings.PREWARM_TOP_TOPICS
+        self.llm_budget = llm_budget if llm_budget is not None else settings.PREWARM_LLM_BUDGET
+        self.concurrency = max(1, concurrency if concurrency is not None else settings.PREWARM_CONCURRENCY)
+
+        self.runs = 0
+        self.skipped_runs = 0
+        self.llm_calls = 0
+        self.failures = 0
+        self.already_fresh = 0
+        self.over_budget = 0
+        self.last_run_at = None
+        self.last_run_seconds = 0.0
+        self.last_topics: List[str] = []
+
+    async def run_forever(self, interval: float = None) -> None:
+        """Run once now and then every interval seconds until cancelled"""
+        interval = interval if interval is not None else settings.PREWARM_INTERVAL_SECONDS
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning(f"Generation pre-warm run failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def run_once(self) -> int:
+        """One pre-warm pass; returns the number of LLM calls it started"""
+        service = self.ai_generation_service
+        if not service.provider_info["available"] or service.ai_service.breaker.state == OPEN:
+            self.skipped_runs += 1
+            return 0
+        if not await asyncio.to_thread(self._claim_run):
+            self.skipped_runs += 1
+            return 0
+
+        started = time.perf_counter()
+        topics = await self.select_topics()
+        jobs = await self._plan(topics)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_job(job: Callable[[], Awaitable]) -> None:
+            async with semaphore:
+                try:
+                    await job()
+                except Exception as e:
+                    self.failures += 1
+                    logger.warning(f"Generation pre-warm call failed: {e}")
+
+        await asyncio.gather(*(run_job(job) for _, job in jobs))
+
+        calls = sum(cost for cost, _ in jobs)
+        self.runs += 1
+        self.llm_calls += calls
+        self.last_run_at = time.time()
+        self.last_run_seconds = round(time.perf_counter() - started, 3)
+        self.last_topics = topics
+        logger.info(f"Pre-warmed generations for {len(topics)} trending topics with {calls} LLM calls")
+        return calls
+
+    async def select_topics(self) -> List[str]:
+        """Top trending topics, hottest first and without near-duplicates"""
+        ranked = []
+        try:
+            ranked = await asyncio.to_thread(self._ranked_from_db)
+        except Exception as e:
+            logger.warning(f"Trending topics unavailable from the database: {e}")
+        if len(ranked) < self.top_topics:
+            ranked += [item["topic"] for item in self.trend_service.get_trending_topics(limit=self.top_topics)]
+
+        topics = {}
+        for topic in ranked:
+            topics.setdefault(normalize_prompt_text(topic), topic)
+        return list(topics.values())[:self.top_topics]
+
+    def _ranked_from_db(self) -> List[str]:
+        with get_db_context() as db:
+            return [item["topic"] for item in self.trend_service.rank_topics_by_engagement(db, limit=self.top_topics)]
+
+    async def _plan(self, topics: List[str]) -> List[Tuple[int, Callable[[], Awaitable]]]:
+        """(LLM calls, job) pairs within the budget, most valuable first
+
+        Analyses come first since one batch prompt covers many topics; then
+        each topic's generation entries in trending order. An analysis job is
+        charged for its retry rounds too, so the budget is never exceeded.
+        Freshness of every entry is checked in one cache lookup.
+        """
+        service = self.ai_generation_service
+        targets = [service.prewarm_targets(topic) for topic in topics]
+        analysis_keys = [service.analysis_cache_key(topic) for topic in topics]
+        fresh = await service.cache.afresh_keys(
+            analysis_keys + [key for topic_targets in targets for key, _ in topic_targets]
+        )
+        candidates = []
+
+        stale_analyses = []
+        for topic, key in zip(topics, analysis_keys):
+            if key in fresh:
+                self.already_fresh += 1
+            else:
+                stale_analyses.append(topic)
+        chunk_cost = 1 + max(0, settings.AI_ANALYSIS_RETRIES)
+        for chunk in service.analysis_chunks(stale_analyses):
+            candidates.append((chunk_cost, lambda chunk=chunk: service.aanalyze_topics(chunk, use_cache=False)))
+
+        for topic_targets in targets:
+            for key, job in topic_targets:
+                if key in fresh:
+                    self.already_fresh += 1
+                else:
+                    candidates.append((1, job))
+
+        jobs = []
+        budget = self.llm_budget
+        for cost, job in candidates:
+            if cost > budget:
+                self.over_budget += 1
+                continue
+            budget -= cost
+            jobs.append((cost, job))
+        return jobs
+
+    def _claim_run(self) -> bool:
+        """True unless another worker already ran within this interval"""
+        redis_client = self.ai_generation_service.cache.redis_client
+        if redis_client is None:
+            return True
+        try:
+            return bool(redis_client.set(PREWARM_LOCK_KEY, "1", nx=True,
+                                         ex=max(1, int(settings.PREWARM_INTERVAL_SECONDS * 0.9))))
+        except Exception as e:
+            logger.warning(f"Generation pre-warm Redis lock failed: {e}")
+            return True
+
+    def stats(self) -> Dict:
+        """Run counters for metrics"""
+        return {
+            "runs": self.runs,
+            "skipped_runs": self.skipped_runs,
+            "llm_calls": self.llm_calls,
+            "failures": self.failures,
+            "already_fresh": self.already_fresh,
+            "over_budget": self.over_budget,
+            "last_run_at": self.last_run_at,
+            "last_run_seconds": self.last_run_seconds,
+            "last_topics": self.last_topics,
+            "top_topics": self.top_topics,
+            "llm_budget": self.llm_budget,
+            "concurrency": self.concurrency
+        }
@@ -0,0 +1,75 @@
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+from app.services.scoring import ScoringService, TitleFeatures, TitleScan
+
+logger = logging.getLogger(__name__)
+
+
+class LiveScoringSession:
+    """Per-connection scoring state for a title being edited.
+
+    Keeps the current title, tags, hashtags and topic together with the
+    intermediate scans derived from them. An update only invalidates the
+    scans that depend on the fields it changed: a title edit rescans the
+    title and its topic overlap, a tag edit rescans the tags, a topic edit
+    recomputes only the overlap. Scoring and suggestions are reused when an
+    edit leaves the features unchanged.
+    """
+
+    def __init__(self, scoring_service: ScoringService):
+        self.scoring_service = scoring_service
+        self.title = ""
+        self.tags: List[str] = []
+        self.hashtags: List[str] = []
+        self.topic: Optional[str] = None
+
+        self._scan: Optional[TitleScan] = None
+        self._tag_words: Optional[Set[str]] = None
+        self._overlap: Optional[Tuple[bool, int]] = None
+        self._features: Optional[TitleFeatures] = None
+        self._result: Optional[Dict] = None
+
+    def update(self, changes: Dict) -> None:
+        """Apply a partial edit; only the fields present in ``changes`` are replaced"""
+        if "title" in changes and changes["title"] != self.title:
+            self.title = changes["title"]
+            self._scan = None
+            self._overlap = None
+
+        for field in ("tags", "hashtags"):
+            if field in changes:
+                value = changes[field] or []
+                if value != getattr(self, field):
+                    setattr(self, field, value)
+                    self._tag_words = None
+
+        if "topic" in changes:
+            topic = changes["topic"] or None
+            if topic != self.topic:
+                self.topic = topic
+                self._overlap = None
+
+    def result(self) -> Dict:
+        """Score, reasons and suggestions for the current state"""
+        service = self.scoring_service
+
+        if self._scan is None:
+            self._scan = service.scan_title(self.title)
+        if self._tag_words is None:
+            self._tag_words = service.scan_tag_words(self.tags, self.hashtags)
+        if self._overlap is None:
+            self._overlap = service.topic_overlap(self._scan.title_lower, self.topic)
+
+        features = service.assemble_features(
+            len(self.title), self._scan, self._tag_words, bool(self.topic), self._overlap
+        )
+        if features != self._features:
+            score, reasons = service.score_features(features)
+            self._features = features
+            self._result = {
+                "viral_score": round(score, 3),
+                "reasons": reasons,
+                "suggestions": service.get_feature_suggestions(features, score)
+            }
+        return self._result
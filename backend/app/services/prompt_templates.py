@@ -0,0 +1,91 @@
+from typing import Dict, List, Optional
+import textwrap
+
+
+class PromptMessages(list):
+    """Chat messages rendered from a template, labelled with its name and version"""
+
+    def __init__(self, messages: List[Dict[str, str]], template: Optional[str] = None):
+        super().__init__(messages)
+        self.template = template
+
+
+def minify(text: str) -> str:
+    """Template text without indentation, trailing spaces or blank lines"""
+    return "\n".join(line.strip() for line in textwrap.dedent(text).strip().splitlines() if line.strip())
+
+
+class PromptTemplate:
+    """A versioned system + user prompt pair, minified once at import
+
+    ``user`` is a str.format template. Bump ``version`` whenever the text
+    changes: it is part of the generation cache key and of the token report,
+    so responses to the old text are neither served nor mixed into its numbers.
+    """
+
+    def __init__(self, name: str, version: int, system: str, user: str):
+        self.name = name
+        self.version = version
+        self.label = f"{name}@{version}"
+        self.system = minify(system)
+        self.user = minify(user)
+
+    def render(self, **fields) -> PromptMessages:
+        return PromptMessages([
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.user.format(**fields)}
+        ], template=self.label)
+
+
+TITLE_RULES = ('engaging, emotional hooks, curiosity gaps, urgent, under 60 characters; '
+               'patterns like "The Shocking Truth", "How to", "Why", "The Secret"')
+HASHTAG_RULES = 'mix specific and general; include #Shorts #Viral #FYP and engagement tags like #Like #Comment; each under 20 characters'
+ANALYSIS_KEYS = ('top_tags (5 {{"tag","score"}}, score 0-1), top_hashtags (5 {{"hashtag","score"}}), '
+                 'viral_patterns (3 title patterns), trending_keywords (5 keywords)')
+
+PROMPTS: Dict[str, PromptTemplate] = {template.name: template for template in (
+    PromptTemplate(
+        "titles", 2,
+        system="You write viral YouTube Shorts titles.",
+        user=f"""
+            Write {{count}} viral YouTube Shorts titles for "{{topic}}". Style: {{style}}.
+            Titles: {TITLE_RULES}.
+            Output only the titles, one per line, no numbering.
+        """
+    ),
+    PromptTemplate(
+        "hashtags", 2,
+        system="You write viral social media hashtags.",
+        user=f"""
+            Write {{count}} hashtags for YouTube Shorts about "{{topic}}". Keywords: {{keywords}}.
+            Hashtags: {HASHTAG_RULES}.
+            Output only the hashtags, one per line.
+        """
+    ),
+    PromptTemplate(
+        "content", 2,
+        system="You write viral YouTube Shorts titles and hashtags.",
+        user=f"""
+            Write {{count}} viral YouTube Shorts titles and {{hashtag_count}} hashtags for "{{topic}}". Style: {{style}}.
+            Titles: {TITLE_RULES}.
+            Hashtags: fit the titles, use keywords {{keywords}}; {HASHTAG_RULES}.
+            Output only JSON: {{{{"titles":["..."],"hashtags":["#..."]}}}}
+        """
+    ),
+    PromptTemplate(
+        "analysis", 2,
+        system="You analyze social media trends and viral content patterns.",
+        user=f"""
+            Analyze the topic "{{topic}}" for YouTube Shorts.
+            Output only a JSON object with keys {ANALYSIS_KEYS}.
+        """
+    ),
+    PromptTemplate(
+        "analysis_batch", 2,
+        system="You analyze social media trends and viral content patterns.",
+        user=f"""
+            Analyze each topic for YouTube Shorts: {{topics}}
+            Output only a JSON object with one key per topic, spelled exactly as given, each an object with keys {ANALYSIS_KEYS}.
+        """
+    ),
+)}
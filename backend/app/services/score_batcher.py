@@ -0,0 +1,191 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.services.batch_scoring import BatchScoringEngine, ScoreItem
+from app.services.score_cache import ScoreCache, score_cache
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+WAIT_MS_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram with cumulative counts, as reported by /metrics"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[f"le_{bound}"] = cumulative
+            buckets["le_inf"] = self.count
+            return {
+                "count": self.count,
+                "sum": round(self.sum, 4),
+                "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+                "buckets": buckets
+            }
+
+
+class ScoreMicroBatcher:
+    """Coalesces concurrent single-title score requests into batch passes.
+
+    The first request of a batch starts a SCORE_BATCH_MAX_WAIT_MS timer;
+    requests arriving meanwhile join it, and the batch is flushed when the
+    timer fires or SCORE_BATCH_MAX_SIZE requests are queued. A flush runs as
+    its own task: one cache lookup (a single Redis MGET), one vectorized
+    engine pass over the distinct misses and one write-back pipeline, each
+    in a worker thread so the event loop keeps serving other connections,
+    then it resolves every caller's future with its own cache entry
+    (``score``, ``reasons``, ``suggestions``).
+    """
+
+    def __init__(self, batch_engine: BatchScoringEngine, cache: ScoreCache = score_cache,
+                 max_batch_size: int = None, max_wait_ms: float = None):
+        self.batch_engine = batch_engine
+        self.scoring_service = batch_engine.scoring_service
+        self.cache = cache
+        self.max_batch_size = max(1, max_batch_size if max_batch_size is not None else settings.SCORE_BATCH_MAX_SIZE)
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings.SCORE_BATCH_MAX_WAIT_MS) / 1000
+
+        # (item, future, enqueued_at) for the batch being gathered
+        self._pending: List[Tuple[ScoreItem, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Flush tasks still running, kept referenced until done
+        self._flushes: Set[asyncio.Task] = set()
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = Histogram(WAIT_MS_BUCKETS)
+
+    async def score(self, title: str, tags: Optional[List[str]] = None,
+                    hashtags: Optional[List[str]] = None, topic: Optional[str] = None) -> Dict:
+        """Queue one title and wait for the batch it lands in to be scored"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((title, tags, hashtags, topic), future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Hand everything queued so far to a flush task"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Runs as a task, so timer callbacks and request handlers never wait on Redis or scoring
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run_batch(self, batch: List[Tuple[ScoreItem, asyncio.Future, float]]) -> None:
+        """Score one batch and resolve the waiting futures"""
+        flushed_at = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.wait_ms.observe((flushed_at - enqueued_at) * 1000)
+
+        try:
+            entries = await self.ascore_items([item for item, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(batch)} score requests failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), entry in zip(batch, entries):
+            # The caller may have been cancelled (client went away) while queued
+            if not future.done():
+                future.set_result(entry)
+
+    def score_items(self, items: Sequence[ScoreItem]) -> List[Dict]:
+        """Cache entries with suggestions for items, scoring each distinct miss once"""
+        keys = [self.cache.make_key(*item) for item in items]
+        entries = self.cache.get_many(keys)
+        new_entries = self._complete_entries(items, keys, entries)
+        if new_entries:
+            self.cache.set_many(new_entries)
+        return [new_entries.get(key, entry) for key, entry in zip(keys, entries)]
+
+    async def ascore_items(self, items: Sequence[ScoreItem]) -> List[Dict]:
+        """Async counterpart of score_items; Redis I/O and scoring run in worker threads"""
+        keys = [self.cache.make_key(*item) for item in items]
+        entries = await self.cache.aget_many(keys)
+        new_entries = {}
+        if any(entry is None or "suggestions" not in entry for entry in entries):
+            new_entries = await asyncio.to_thread(self._complete_entries, items, keys, entries)
+        if new_entries:
+            await self.cache.aset_many(new_entries)
+        return [new_entries.get(key, entry) for key, entry in zip(keys, entries)]
+
+    def _complete_entries(self, items: Sequence[ScoreItem], keys: List[str],
+                          entries: List[Optional[Dict]]) -> Dict[str, Dict]:
+        """New cache entries for the misses, and for hits that lack suggestions"""
+        # Batch-scored entries are cached without suggestions; fill those in too
+        missing = {}
+        incomplete = {}
+        for index, (key, entry) in enumerate(zip(keys, entries)):
+            if entry is None:
+                missing.setdefault(key, index)
+            elif "suggestions" not in entry:
+                incomplete.setdefault(key, index)
+
+        new_entries = {}
+        if missing:
+            extract = self.scoring_service.extract_features
+            rows = [extract(*items[index]) for index in missing.values()]
+            matrix = self.batch_engine.features_matrix(rows)
+            scores = self.batch_engine.score_matrix(matrix).tolist()
+            reasons = self.batch_engine.explain_matrix(matrix)
+            for key, features, score, score_reasons in zip(missing, rows, scores, reasons):
+                new_entries[key] = {
+                    "score": score,
+                    "reasons": score_reasons,
+                    "suggestions": self.scoring_service.get_feature_suggestions(features, score)
+                }
+
+        for key, index in incomplete.items():
+            entry = entries[index]
+            new_entries[key] = {
+                **entry,
+                "suggestions": self.scoring_service.get_improvement_suggestions(items[index][0], entry["score"])
+            }
+        return new_entries
+
+    def stats(self) -> Dict:
+        """Batch-size and wait-time histograms for metrics"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": len(self._pending),
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot()
+        }
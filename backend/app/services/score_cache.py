@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+
+import redis
+
+from app.core.config import settings
+from app.services.scoring import lexicon_matcher
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreCache:
+    """Two-tier cache for title scores, reasons and suggestions.
+
+    Entries are keyed by a content hash of (title, tags, hashtags, topic) and
+    the scoring version, so a lexicon or rules change never serves stale
+    results. The first tier is an in-process LRU bounded by CACHE_MAX_SIZE;
+    the second is Redis with CACHE_TTL, shared by every worker. Redis errors
+    and unreadable values are logged and treated as misses. Async callers use
+    aget_many/aset_many, which keep Redis I/O off the event loop.
+    """
+
+    def __init__(self, max_size: int = None, ttl: int = None,
+                 redis_client: Optional[redis.Redis] = None, version: str = None):
+        self.max_size = max_size if max_size is not None else settings.CACHE_MAX_SIZE
+        self.ttl = ttl if ttl is not None else settings.CACHE_TTL
+        self.redis_client = redis_client
+        self.version = version or lexicon_matcher.version
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def attach_redis(self, redis_client: Optional[redis.Redis]) -> None:
+        """Use (or stop using, with None) a Redis client as the shared tier"""
+        self.redis_client = redis_client
+
+    def make_key(self, title: str, tags: Optional[List[str]] = None,
+                 hashtags: Optional[List[str]] = None, topic: Optional[str] = None) -> str:
+        """Content-hash key; empty and missing tags/topic score the same, so they share a key"""
+        payload = json.dumps([title, tags or [], hashtags or [], topic or None], ensure_ascii=False)
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+        return f"score:{self.version}:{digest}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look a key up in the local tier, then in Redis"""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[Dict]]:
+        """Batched lookup; Redis is queried once (MGET) for all local misses"""
+        results, remote_keys = self._get_local(keys)
+        raw_values = self._read_remote(remote_keys) if remote_keys and self.redis_client is not None else []
+        return self._merge_remote(results, remote_keys, raw_values)
+
+    async def aget_many(self, keys: Sequence[str]) -> List[Optional[Dict]]:
+        """Async counterpart of get_many; the Redis round trip runs in a worker thread"""
+        results, remote_keys = self._get_local(keys)
+        raw_values = []
+        if remote_keys and self.redis_client is not None:
+            raw_values = await asyncio.to_thread(self._read_remote, remote_keys)
+        return self._merge_remote(results, remote_keys, raw_values)
+
+    def _get_local(self, keys: Sequence[str]) -> Tuple[List[Optional[Dict]], Dict[int, str]]:
+        """Local-tier results, and the keys (by position) to look up in Redis"""
+        results: List[Optional[Dict]] = [None] * len(keys)
+        remote_keys = {}
+
+        with self._lock:
+            for position, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.local_hits += 1
+                    results[position] = entry
+                else:
+                    remote_keys[position] = key
+        return results, remote_keys
+
+    def _read_remote(self, remote_keys: Dict[int, str]) -> List:
+        try:
+            return self.redis_client.mget(list(remote_keys.values()))
+        except Exception as e:
+            logger.warning(f"Score cache Redis read failed: {e}")
+            return []
+
+    def _merge_remote(self, results: List[Optional[Dict]], remote_keys: Dict[int, str],
+                      raw_values: List) -> List[Optional[Dict]]:
+        """Fill results from Redis values; unreadable values count as misses"""
+        for (position, key), raw in zip(remote_keys.items(), raw_values):
+            if raw is None:
+                continue
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                entry = None
+            if not isinstance(entry, dict):
+                logger.warning(f"Ignoring unreadable score cache entry {key}")
+                continue
+            results[position] = entry
+            self._store_local(key, entry)
+
+        with self._lock:
+            found_remote = sum(1 for position in remote_keys if results[position] is not None)
+            self.redis_hits += found_remote
+            self.misses += len(remote_keys) - found_remote
+
+        return results
+
+    def set(self, key: str, entry: Dict) -> None:
+        """Store an entry in both tiers"""
+        self.set_many({key: entry})
+
+    def set_many(self, entries: Dict[str, Dict]) -> None:
+        """Store entries in both tiers; Redis writes go out in one pipeline"""
+        if not entries:
+            return
+
+        for key, entry in entries.items():
+            self._store_local(key, entry)
+        if self.redis_client is not None:
+            self._write_remote(entries)
+
+    async def aset_many(self, entries: Dict[str, Dict]) -> None:
+        """Async counterpart of set_many; the Redis pipeline runs in a worker thread"""
+        if not entries:
+            return
+
+        for key, entry in entries.items():
+            self._store_local(key, entry)
+        if self.redis_client is not None:
+            await asyncio.to_thread(self._write_remote, entries)
+
+    def _write_remote(self, entries: Dict[str, Dict]) -> None:
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, entry in entries.items():
+                pipe.set(key, json.dumps(entry), ex=self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Score cache Redis write failed: {e}")
+
+    def _store_local(self, key: str, entry: Dict) -> None:
+        """Insert into the LRU, evicting the least recently used entries"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop the local tier and reset counters (Redis entries expire on their own)"""
+        with self._lock:
+            self._entries.clear()
+            self.local_hits = self.redis_hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for metrics"""
+        with self._lock:
+            lookups = self.local_hits + self.redis_hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+                "redis_enabled": self.redis_client is not None
+            }
+
+
+# Shared by every scoring endpoint in this process
+score_cache = ScoreCache()
@@ -0,0 +1,324 @@
+"""
+Percentile-rank calibration for viral scores
+
+Keeps every stored Video.viral_score in one sorted array so a score can be
+turned into "better than X% of stored videos" with a binary search. The
+array is persisted as a compact binary snapshot (a small JSON header and
+packed float64 values) that API workers load and reload when it changes.
+
+The refresh job extends the snapshot incrementally: rows created since the
+last build are merged into the sorted array. Old scores cannot be removed
+from it, so the job rebuilds the array from the whole table instead when
+existing rows were updated (for example by a bulk rescoring run), when the
+rows the snapshot covers no longer number as many as it holds (deleted rows,
+or rows added without a created_at), when the scoring version changed, and
+at least every SCORE_PERCENTILE_FULL_REBUILD_HOURS.
+
+Usage:
+    python -m app.services.score_percentiles [--snapshot PATH] [--full]
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.connection import engine
+from app.models.video import Video
+from app.services.scoring import lexicon_matcher
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"RRPI"
+SNAPSHOT_FORMAT = 1
+# Magic followed by the JSON header length
+HEADER_PREFIX = struct.Struct("<4sI")
+
+# Scores are read from the database in chunks of this many rows
+READ_CHUNK_SIZE = 50000
+
+
+class PercentileIndex:
+    """Immutable sorted array of stored viral scores"""
+
+    def __init__(self, values: Optional[array] = None, created_through: Optional[str] = None,
+                 updated_through: Optional[str] = None, built_at: Optional[float] = None,
+                 full_built_at: Optional[float] = None, scoring_version: Optional[str] = None):
+        self.values = values if values is not None else array("d")
+        # Newest created_at / updated_at covered by the array (ISO strings)
+        self.created_through = created_through
+        self.updated_through = updated_through
+        self.built_at = built_at
+        # Last rebuild from the whole table, and the scoring rules the scores came from
+        self.full_built_at = full_built_at
+        self.scoring_version = scoring_version
+        # Zero-copy view for vectorized lookups
+        self._view = np.frombuffer(self.values, dtype=np.float64) if len(self.values) else np.empty(0)
+
+    @classmethod
+    def from_scores(cls, scores: Sequence[float], **metadata) -> "PercentileIndex":
+        """Build an index from unsorted scores"""
+        ordered = np.sort(np.asarray(scores, dtype=np.float64))
+        return cls(array("d", ordered.tobytes()), **metadata)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def percentile(self, score: float) -> Optional[float]:
+        """Share of stored scores strictly below ``score``, in percent; None if empty"""
+        count = len(self.values)
+        if not count:
+            return None
+        return round(bisect_left(self.values, score) / count * 100, 1)
+
+    def percentiles(self, scores: Sequence[float]) -> List[Optional[float]]:
+        """Vectorized ``percentile`` for many scores"""
+        count = len(self.values)
+        if not count:
+            return [None] * len(scores)
+        ranks = np.searchsorted(self._view, np.asarray(scores, dtype=np.float64), side="left")
+        return [round(rank / count * 100, 1) for rank in ranks.tolist()]
+
+    def merge(self, scores: Sequence[float], **metadata) -> "PercentileIndex":
+        """New index with ``scores`` added; O(n + m) instead of a full sort"""
+        new_scores = np.sort(np.asarray(scores, dtype=np.float64))
+        merged = np.insert(self._view, np.searchsorted(self._view, new_scores), new_scores)
+        return PercentileIndex(array("d", merged.tobytes()), **metadata)
+
+    def save(self, path: Path) -> None:
+        """Write the snapshot atomically"""
+        header = json.dumps({
+            "format": SNAPSHOT_FORMAT,
+            "count": len(self.values),
+            "created_through": self.created_through,
+            "updated_through": self.updated_through,
+            "built_at": self.built_at,
+            "full_built_at": self.full_built_at,
+            "scoring_version": self.scoring_version
+        }).encode()
+
+        values = self.values
+        if sys.byteorder != "little":
+            values = array("d", values)
+            values.byteswap()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(HEADER_PREFIX.pack(SNAPSHOT_MAGIC, len(header)))
+            f.write(header)
+            values.tofile(f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "PercentileIndex":
+        """Read a snapshot written by ``save``"""
+        data = path.read_bytes()
+        magic, header_length = HEADER_PREFIX.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a percentile snapshot")
+
+        header_end = HEADER_PREFIX.size + header_length
+        header = json.loads(data[HEADER_PREFIX.size:header_end])
+        if header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported percentile snapshot format: {header.get('format')}")
+
+        values = array("d")
+        values.frombytes(data[header_end:])
+        if sys.byteorder != "little":
+            values.byteswap()
+        if len(values) != header["count"]:
+            raise ValueError(f"Truncated percentile snapshot: {len(values)} of {header['count']} values")
+
+        return cls(
+            values,
+            created_through=header.get("created_through"),
+            updated_through=header.get("updated_through"),
+            built_at=header.get("built_at"),
+            full_built_at=header.get("full_built_at"),
+            scoring_version=header.get("scoring_version")
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self.values),
+            "built_at": self.built_at,
+            "created_through": self.created_through,
+            "full_built_at": self.full_built_at,
+            "scoring_version": self.scoring_version,
+            "median": round(self.values[len(self.values) // 2], 3) if len(self.values) else None
+        }
+
+
+class ScorePercentiles:
+    """Serves the current PercentileIndex and reloads it when the snapshot changes"""
+
+    def __init__(self, snapshot_path: str = None):
+        self.snapshot_path = Path(snapshot_path or settings.SCORE_PERCENTILE_SNAPSHOT)
+        self.index = PercentileIndex()
+        self._snapshot_mtime: Optional[float] = None
+
+    def reload_if_changed(self) -> bool:
+        """Load the snapshot if it is new or was rewritten; returns True when swapped"""
+        try:
+            mtime = self.snapshot_path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._snapshot_mtime:
+            return False
+
+        try:
+            index = PercentileIndex.load(self.snapshot_path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable percentile snapshot: {e}")
+            return False
+        if index.scoring_version != lexicon_matcher.version:
+            # Ranking today's scores against another version's distribution would be wrong
+            logger.warning(f"Ignoring percentile snapshot for scoring version {index.scoring_version} "
+                           f"(current {lexicon_matcher.version}); rebuild it")
+            self._snapshot_mtime = mtime
+            return False
+
+        # Readers keep whichever index they already hold; the swap is a single assignment
+        self.index = index
+        self._snapshot_mtime = mtime
+        logger.info(f"Loaded percentile snapshot with {len(index)} scores")
+        return True
+
+    def percentile(self, score: float) -> Optional[float]:
+        return self.index.percentile(score)
+
+    def percentiles(self, scores: Sequence[float]) -> List[Optional[float]]:
+        return self.index.percentiles(scores)
+
+    def stats(self) -> Dict:
+        return {"snapshot": str(self.snapshot_path), **self.index.stats()}
+
+
+class PercentileRefreshJob:
+    """Build or extend the percentile snapshot from the videos table"""
+
+    def __init__(self, snapshot_path: str = None, db_engine: Engine = engine):
+        self.snapshot_path = Path(snapshot_path or settings.SCORE_PERCENTILE_SNAPSHOT)
+        self.db_engine = db_engine
+        self.table = Video.__table__
+
+    def run(self, full: bool = False) -> PercentileIndex:
+        """Refresh the snapshot; incremental unless ``full`` or a rebuild is due"""
+        current = None
+        if not full and self.snapshot_path.exists():
+            try:
+                current = PercentileIndex.load(self.snapshot_path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Rebuilding unreadable percentile snapshot: {e}")
+
+        c = self.table.c
+        with self.db_engine.connect() as connection:
+            created_through, updated_through = connection.execute(
+                select(func.max(c.created_at), func.max(c.updated_at))
+            ).one()
+            metadata = {
+                "created_through": created_through.isoformat() if created_through else None,
+                "updated_through": updated_through.isoformat() if updated_through else None,
+                "built_at": time.time(),
+                "scoring_version": lexicon_matcher.version
+            }
+
+            if current is not None:
+                reason = self._rebuild_reason(connection, current)
+                if reason is None:
+                    new_scores = self._read_scores(connection, and_(
+                        c.created_at > datetime.fromisoformat(current.created_through),
+                        c.created_at <= created_through
+                    ))
+                    index = current.merge(new_scores, full_built_at=current.full_built_at, **metadata)
+                    logger.info(f"Added {len(new_scores)} scores to the percentile index ({len(index)} total)")
+                    index.save(self.snapshot_path)
+                    return index
+
+                logger.info(f"{reason}; rebuilding")
+
+            index = PercentileIndex.from_scores(
+                self._read_scores(connection, self._covered(created_through)),
+                full_built_at=metadata["built_at"], **metadata
+            )
+
+        logger.info(f"Built percentile index from {len(index)} scores")
+        index.save(self.snapshot_path)
+        return index
+
+    def _covered(self, created_through: Optional[datetime]):
+        """Rows a snapshot with this created_at watermark covers, including those without one"""
+        if created_through is None:
+            return None
+        created_at = self.table.c.created_at
+        return or_(created_at.is_(None), created_at <= created_through)
+
+    def _rebuild_reason(self, connection, current: PercentileIndex) -> Optional[str]:
+        """Why ``current`` cannot be extended incrementally; None if it can"""
+        if current.scoring_version != lexicon_matcher.version:
+            return f"Scoring version changed from {current.scoring_version} to {lexicon_matcher.version}"
+        if not current.created_through or not current.updated_through:
+            return "The snapshot has no watermark"
+        if (current.full_built_at is None
+                or time.time() - current.full_built_at > settings.SCORE_PERCENTILE_FULL_REBUILD_HOURS * 3600):
+            return "Periodic full rebuild is due"
+
+        c = self.table.c
+        covered = self._covered(datetime.fromisoformat(current.created_through))
+        changed, stored = connection.execute(
+            select(
+                func.count().filter(c.updated_at > datetime.fromisoformat(current.updated_through)),
+                func.count(c.viral_score)
+            ).select_from(self.table).where(covered)
+        ).one()
+        if changed:
+            return f"{changed} stored scores changed since the last build"
+        if stored != len(current):
+            return f"The snapshot holds {len(current)} scores but {stored} are stored"
+        return None
+
+    def _read_scores(self, connection, condition=None) -> array:
+        """Stream viral_score values through a server-side cursor"""
+        query = select(self.table.c.viral_score).where(self.table.c.viral_score.is_not(None))
+        if condition is not None:
+            query = query.where(condition)
+
+        scores = array("d")
+        result = connection.execution_options(stream_results=True, yield_per=READ_CHUNK_SIZE).execute(query)
+        for partition in result.partitions():
+            scores.extend(row[0] for row in partition)
+        return scores
+
+
+# Shared by every scoring endpoint in this process
+score_percentiles = ScorePercentiles()
+
+
+def main() -> None:
+    from app.core.logging import setup_logging
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Build the viral score percentile snapshot")
+    parser.add_argument("--snapshot", default=settings.SCORE_PERCENTILE_SNAPSHOT, help="Snapshot file path")
+    parser.add_argument("--full", action="store_true", help="Rebuild from the whole table")
+    args = parser.parse_args()
+
+    PercentileRefreshJob(snapshot_path=args.snapshot).run(full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,299 @@
+import hashlib
+import json
 import re
-from typing import List, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 import logging
 
 from app.core.constants import MIN_TITLE_LENGTH, MAX_TITLE_LENGTH
 
 logger = logging.getLogger(__name__)
 
+# Scoring lexicons, keyed by the feature they feed
+SCORING_LEXICONS = {
+    "emotional": (
+        'shocking', 'secret', 'truth', 'hidden', 'untold', 'amazing',
+        'incredible', 'viral', 'trending', 'mind-blowing', 'insane',
+        'crazy', 'unbelievable', 'wow', 'omg', 'wtf', 'epic', 'legendary'
+    ),
+    "question": ('how', 'why', 'what', 'when', 'where', 'who'),
+    "mystery": ('secret', 'hidden', 'truth', 'untold', 'revealed', 'exposed'),
+    "trending": (
+        'viral', 'trending', 'shorts', 'fyp', 'tiktok', 'youtube',
+        '2024', '2025', 'new', 'latest', 'now', 'today'
+    ),
+    "urgency": ('now', 'today', 'latest', 'new', 'just', 'breaking'),
+    "action": ('watch', 'see', 'learn', 'discover', 'find', 'get'),
+    "ellipsis": ('...',),
+}
+
+DIGIT_PATTERN = re.compile(r'\d')
+
+# Bump whenever analyzer thresholds, weights or reasons change
+SCORING_RULES_VERSION = 1
+
+# Every title length above this scores exactly like this one
+LENGTH_CAP = max(MAX_TITLE_LENGTH, 60) + 1
+
+# Per-analyzer lookup table: (weights, reasons) indexed by the analyzer's input code
+ScoreTable = Tuple[Tuple[float, ...], Tuple[Tuple[str, ...], ...]]
+
+
+class LexiconMatcher:
+    """Single-pass substring matcher over all scoring lexicons.
+
+    All lexicon words are compiled into one trie-shaped lookahead regex, so a
+    single ``findall`` reports the longest word starting at every position.
+    Shorter words that only occur inside a longer match are recovered from a
+    precomputed containment table, which keeps the result identical to testing
+    ``word in text`` for every word.
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        self.lexicons = {name: tuple(words) for name, words in lexicons.items()}
+        
+        words = sorted({word for group in self.lexicons.values() for word in group})
+        self._pattern = re.compile("(?=(" + self._trie_pattern(words) + "))")
+        self._contained = {}
+        for word in words:
+            inner = frozenset(other for other in words if other != word and other in word)
+            if inner:
+                self._contained[word] = inner
+        self._features = {
+            word: tuple(name for name, group in self.lexicons.items() if word in group)
+            for word in words
+        }
+        
+        # Identifies scoring behaviour; part of every cached score key
+        digest = hashlib.sha256(json.dumps(self.lexicons, sort_keys=True).encode()).hexdigest()
+        self.version = f"{SCORING_RULES_VERSION}.{digest[:12]}"
+    
+    @staticmethod
+    def _trie_pattern(words: List[str]) -> str:
+        """Build a prefix-factored alternation so the regex never re-tests shared prefixes"""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # Greedy optional keeps the longest word when one word prefixes another
+            return "(?:" + body + ")?" if "" in node else body
+        
+        return build(trie)
+    
+    def find_words(self, text: str) -> Set[str]:
+        """Return every lexicon word that occurs in ``text`` (already lowercased)"""
+        found = set(self._pattern.findall(text))
+        if self._contained:
+            for word in found.intersection(self._contained):
+                found |= self._contained[word]
+        return found
+    
+    def count_features(self, words: Iterable[str]) -> Dict[str, int]:
+        """Count distinct matched words per lexicon"""
+        counts = dict.fromkeys(self.lexicons, 0)
+        for word in words:
+            for name in self._features[word]:
+                counts[name] += 1
+        return counts
+    
+    def match(self, text: str) -> Dict[str, int]:
+        """Scan ``text`` once and return the per-lexicon hit counts"""
+        return self.count_features(self.find_words(text))
+
+
+# Compiled once per process and shared by every ScoringService
+lexicon_matcher = LexiconMatcher(SCORING_LEXICONS)
+
+
+class TitleFeatures(NamedTuple):
+    """Raw per-title signals consumed by the scoring analyzers"""
+    length: int
+    emotional: int
+    question: int
+    mystery: int
+    ellipsis: int
+    title_trending: int
+    total_trending: int
+    has_topic: bool
+    topic_in_title: bool
+    topic_words: int
+    has_digits: bool
+    urgency: int
+    action: int
+
+
+class TitleScan(NamedTuple):
+    """Lexicon scan of a single title"""
+    title_lower: str
+    words: Set[str]
+    hits: Dict[str, int]
+    has_digits: bool
+
+
 class ScoringService:
-    def __init__(self):
-        self.emotional_words = [
-            'shocking', 'secret', 'truth', 'hidden', 'untold', 'amazing', 
-            'incredible', 'viral', 'trending', 'mind-blowing', 'insane',
-            'crazy', 'unbelievable', 'wow', 'omg', 'wtf', 'epic', 'legendary'
-        ]
+    def __init__(self, matcher: Optional[LexiconMatcher] = None):
+        self.matcher = matcher or lexicon_matcher
         
-        self.question_words = ['how', 'why', 'what', 'when', 'where', 'who']
+        self.emotional_words = list(self.matcher.lexicons["emotional"])
+        self.question_words = list(self.matcher.lexicons["question"])
+        self.trending_keywords = list(self.matcher.lexicons["trending"])
         
-        self.trending_keywords = [
-            'viral', 'trending', 'shorts', 'fyp', 'tiktok', 'youtube',
-            '2024', '2025', 'new', 'latest', 'now', 'today'
+        self.score_tables = self._build_score_tables()
+        self._weights = tuple(weights for weights, _ in self.score_tables)
+        self._reasons = tuple(reasons for _, reasons in self.score_tables)
+    
+    def _build_score_tables(self) -> List[ScoreTable]:
+        """Evaluate every analyzer once per possible input, in scoring order.
+        
+        Each analyzer depends only on a few small, clippable values, so its
+        weight and reasons can be looked up instead of recomputed; table
+        indices are produced by score_table_indices.
+        """
+        def table(results: List[Tuple[float, List[str]]]) -> ScoreTable:
+            return (
+                tuple(score for score, _ in results),
+                tuple(tuple(reasons) for _, reasons in results)
+            )
+        
+        return [
+            table([self._analyze_title_length(length) for length in range(LENGTH_CAP + 1)]),
+            table([self._analyze_emotional_impact(count) for count in range(3)]),
+            table([self._analyze_curiosity_gap(code & 1, code & 2, code & 4) for code in range(8)]),
+            table([self._analyze_trending_keywords(code & 1, 3 if code & 2 else 0) for code in range(4)]),
+            # Index 0 is "no topic given", where the analyzer does not apply
+            table([(0.0, [])] + [
+                self._analyze_topic_relevance(bool(code // 3), code % 3) for code in range(6)
+            ]),
+            table([self._analyze_engagement_triggers(bool(code & 1), code & 2, code & 4) for code in range(8)]),
         ]
     
     def calculate_viral_score(self, title: str, tags: List[str] = None, 
                             hashtags: List[str] = None, topic: str = None) -> Tuple[float, List[str]]:
         """Calculate viral score for a title and provide reasons"""
-        reasons = []
-        score = 0.0
-        
-        # Title length analysis
-        length_score, length_reasons = self._analyze_title_length(title)
-        score += length_score
-        reasons.extend(length_reasons)
-        
-        # Emotional impact analysis
-        emotional_score, emotional_reasons = self._analyze_emotional_impact(title)
-        score += emotional_score
-        reasons.extend(emotional_reasons)
-        
-        # Curiosity gap analysis
-        curiosity_score, curiosity_reasons = self._analyze_curiosity_gap(title)
-        score += curiosity_score
-        reasons.extend(curiosity_reasons)
-        
-        # Trending keyword analysis
-        trending_score, trending_reasons = self._analyze_trending_keywords(title, tags, hashtags)
-        score += trending_score
-        reasons.extend(trending_reasons)
-        
-        # Topic relevance analysis
-        if topic:
-            relevance_score, relevance_reasons = self._analyze_topic_relevance(title, topic)
-            score += relevance_score
-            reasons.extend(relevance_reasons)
-        
-        # Engagement trigger analysis
-        engagement_score, engagement_reasons = self._analyze_engagement_triggers(title)
-        score += engagement_score
-        reasons.extend(engagement_reasons)
+        features = self.extract_features(title, tags, hashtags, topic)
+        return self.score_features(features)
+    
+    def calculate_score(self, title: str, tags: List[str] = None,
+                        hashtags: List[str] = None, topic: str = None) -> float:
+        """Viral score only, without building reasons"""
+        return self.feature_score(self.extract_features(title, tags, hashtags, topic))
+    
+    def extract_features(self, title: str, tags: List[str] = None,
+                         hashtags: List[str] = None, topic: str = None) -> TitleFeatures:
+        """Scan a title (and its tags) once and collect every scoring signal"""
+        scan = self.scan_title(title)
+        return self.assemble_features(
+            len(title), scan, self.scan_tag_words(tags, hashtags), bool(topic),
+            self.topic_overlap(scan.title_lower, topic)
+        )
+    
+    def scan_title(self, title: str) -> TitleScan:
+        """One scan of the title feeds every lexicon-based analyzer"""
+        title_lower = title.lower()
+        words = self.matcher.find_words(title_lower)
+        return TitleScan(
+            title_lower, words, self.matcher.count_features(words), DIGIT_PATTERN.search(title) is not None
+        )
+    
+    def scan_tag_words(self, tags: List[str] = None, hashtags: List[str] = None) -> Set[str]:
+        """Lexicon words found in tags and hashtags"""
+        # Lexicon words never span the joining spaces, so tags scan independently of the title
+        extra_text = []
+        if tags:
+            extra_text.append(' '.join(tags).lower())
+        if hashtags:
+            extra_text.append(' '.join(hashtags).lower())
+        if not extra_text:
+            return set()
+        return self.matcher.find_words(' '.join(extra_text))
+    
+    def topic_overlap(self, title_lower: str, topic: str = None) -> Tuple[bool, int]:
+        """Whether the topic appears in the title, and how many topic words do"""
+        if not topic:
+            return False, 0
+        topic_lower = topic.lower()
+        topic_words = sum(1 for word in topic_lower.split() if word in title_lower)
+        return topic_lower in title_lower, topic_words
+    
+    def assemble_features(self, length: int, scan: TitleScan, tag_words: Set[str],
+                          has_topic: bool, overlap: Tuple[bool, int]) -> TitleFeatures:
+        """Combine independently computed scans into TitleFeatures"""
+        hits = scan.hits
+        total_trending = hits["trending"]
+        if tag_words:
+            total_trending = self.matcher.count_features(scan.words | tag_words)["trending"]
+        
+        # Positional construction; keyword NamedTuple construction is measurably slower here
+        return TitleFeatures(
+            length, hits["emotional"], hits["question"], hits["mystery"], hits["ellipsis"],
+            hits["trending"], total_trending, has_topic, overlap[0], overlap[1],
+            scan.has_digits, hits["urgency"], hits["action"]
+        )
+    
+    def score_table_indices(self, features: TitleFeatures) -> Tuple[int, ...]:
+        """Index into each score table for one set of features"""
+        (length, emotional, question, mystery, ellipsis, title_trending, total_trending,
+         has_topic, topic_in_title, topic_words, has_digits, urgency, action) = features
+        # Conditional expressions instead of min(): this runs once per scored title
+        return (
+            length if length < LENGTH_CAP else LENGTH_CAP,
+            emotional if emotional < 2 else 2,
+            (question > 0) + (mystery > 0) * 2 + (ellipsis > 0) * 4,
+            (title_trending > 0) + (total_trending >= 3) * 2,
+            1 + bool(topic_in_title) * 3 + (topic_words if topic_words < 2 else 2) if has_topic else 0,
+            bool(has_digits) + (urgency > 0) * 2 + (action > 0) * 4
+        )
+    
+    def score_features(self, features: TitleFeatures) -> Tuple[float, List[str]]:
+        """Turn extracted title features into a viral score and reasons"""
+        i_length, i_emotional, i_curiosity, i_trending, i_relevance, i_engagement = self.score_table_indices(features)
+        w_length, w_emotional, w_curiosity, w_trending, w_relevance, w_engagement = self._weights
+        r_length, r_emotional, r_curiosity, r_trending, r_relevance, r_engagement = self._reasons
+        
+        # Weights are added in analyzer order starting from 0.0, so scores match
+        # the analyzers exactly; reasons are the shared tuples from the tables
+        score = (
+            0.0 + w_length[i_length] + w_emotional[i_emotional] + w_curiosity[i_curiosity]
+            + w_trending[i_trending] + w_relevance[i_relevance] + w_engagement[i_engagement]
+        )
+        reasons = [
+            *r_length[i_length], *r_emotional[i_emotional], *r_curiosity[i_curiosity],
+            *r_trending[i_trending], *r_relevance[i_relevance], *r_engagement[i_engagement]
+        ]
         
         # Cap score at 1.0
-        final_score = min(score, 1.0)
-        
-        return final_score, reasons
+        return min(score, 1.0), reasons
+    
+    def feature_score(self, features: TitleFeatures) -> float:
+        """Score-only counterpart of score_features: table lookups, no reasons"""
+        i_length, i_emotional, i_curiosity, i_trending, i_relevance, i_engagement = self.score_table_indices(features)
+        w_length, w_emotional, w_curiosity, w_trending, w_relevance, w_engagement = self._weights
+        
+        score = (
+            0.0 + w_length[i_length] + w_emotional[i_emotional] + w_curiosity[i_curiosity]
+            + w_trending[i_trending] + w_relevance[i_relevance] + w_engagement[i_engagement]
+        )
+        return score if score < 1.0 else 1.0
     
     def get_improvement_suggestions(self, title: str, current_score: float) -> List[str]:
         """Get suggestions to improve viral score"""
+        hits = self.matcher.match(title.lower())
+        return self._build_suggestions(len(title), hits["emotional"], hits["question"], current_score)
+    
+    def get_feature_suggestions(self, features: TitleFeatures, current_score: float) -> List[str]:
+        """Suggestions from already extracted features, without rescanning the title"""
+        return self._build_suggestions(features.length, features.emotional, features.question, current_score)
+    
+    def _build_suggestions(self, length: int, emotional_count: int, question_count: int,
+                           current_score: float) -> List[str]:
+        """Build improvement suggestions"""
         suggestions = []
         
         if current_score < 0.3:
@@ -83,23 +312,22 @@ class ScoringService:
             suggestions.append("Use power words that evoke strong emotions")
         
         # Specific suggestions based on current title
-        if len(title) < MIN_TITLE_LENGTH:
+        if length < MIN_TITLE_LENGTH:
             suggestions.append(f"Title is too short. Aim for at least {MIN_TITLE_LENGTH} characters")
         
-        if len(title) > MAX_TITLE_LENGTH:
+        if length > MAX_TITLE_LENGTH:
             suggestions.append(f"Title is too long. Keep it under {MAX_TITLE_LENGTH} characters")
         
-        if not any(word in title.lower() for word in self.emotional_words):
+        if not emotional_count:
             suggestions.append("Add emotional words to make the title more compelling")
         
-        if not any(word in title.lower() for word in self.question_words):
+        if not question_count:
             suggestions.append("Consider using question words to create curiosity")
         
         return suggestions[:5]  # Return top 5 suggestions
     
-    def _analyze_title_length(self, title: str) -> Tuple[float, List[str]]:
+    def _analyze_title_length(self, length: int) -> Tuple[float, List[str]]:
         """Analyze title length and return score and reasons"""
-        length = len(title)
         score = 0.0
         reasons = []
         
@@ -119,13 +347,10 @@ class ScoringService:
         
         return score, reasons
     
-    def _analyze_emotional_impact(self, title: str) -> Tuple[float, List[str]]:
+    def _analyze_emotional_impact(self, emotional_count: int) -> Tuple[float, List[str]]:
         """Analyze emotional impact of title"""
         score = 0.0
         reasons = []
-        title_lower = title.lower()
-        
-        emotional_count = sum(1 for word in self.emotional_words if word in title_lower)
         
         if emotional_count >= 2:
             score += 0.25
@@ -138,75 +363,57 @@ class ScoringService:
         
         return score, reasons
     
-    def _analyze_curiosity_gap(self, title: str) -> Tuple[float, List[str]]:
+    def _analyze_curiosity_gap(self, question_count: int, mystery_count: int,
+                               ellipsis_count: int) -> Tuple[float, List[str]]:
         """Analyze curiosity gap creation"""
         score = 0.0
         reasons = []
-        title_lower = title.lower()
         
         # Check for question words
-        question_count = sum(1 for word in self.question_words if word in title_lower)
         if question_count > 0:
             score += 0.15
             reasons.append("Creates curiosity with question words")
         
         # Check for mystery words
-        mystery_words = ['secret', 'hidden', 'truth', 'untold', 'revealed', 'exposed']
-        mystery_count = sum(1 for word in mystery_words if word in title_lower)
         if mystery_count > 0:
             score += 0.1
             reasons.append("Creates mystery and intrigue")
         
         # Check for incomplete information
-        if '...' in title or '...' in title:
+        if ellipsis_count > 0:
             score += 0.05
             reasons.append("Uses ellipsis to create suspense")
         
         return score, reasons
     
-    def _analyze_trending_keywords(self, title: str, tags: List[str] = None, 
-                                 hashtags: List[str] = None) -> Tuple[float, List[str]]:
+    def _analyze_trending_keywords(self, title_trending: int, total_trending: int) -> Tuple[float, List[str]]:
         """Analyze trending keywords"""
         score = 0.0
         reasons = []
-        title_lower = title.lower()
         
         # Check title for trending keywords
-        title_trending = sum(1 for word in self.trending_keywords if word in title_lower)
         if title_trending > 0:
             score += 0.1
             reasons.append("Contains trending keywords")
         
-        # Check tags and hashtags
-        all_text = title_lower
-        if tags:
-            all_text += ' ' + ' '.join(tags).lower()
-        if hashtags:
-            all_text += ' ' + ' '.join(hashtags).lower()
-        
-        total_trending = sum(1 for word in self.trending_keywords if word in all_text)
+        # Check title, tags and hashtags together
         if total_trending >= 3:
             score += 0.1
             reasons.append("Multiple trending keywords detected")
         
         return score, reasons
     
-    def _analyze_topic_relevance(self, title: str, topic: str) -> Tuple[float, List[str]]:
+    def _analyze_topic_relevance(self, topic_in_title: bool, relevant_words: int) -> Tuple[float, List[str]]:
         """Analyze topic relevance"""
         score = 0.0
         reasons = []
         
-        title_lower = title.lower()
-        topic_lower = topic.lower()
-        
         # Check if topic appears in title
-        if topic_lower in title_lower:
+        if topic_in_title:
             score += 0.15
             reasons.append("Topic directly mentioned in title")
         
         # Check for topic keywords
-        topic_words = topic_lower.split()
-        relevant_words = sum(1 for word in topic_words if word in title_lower)
         if relevant_words >= 2:
             score += 0.1
             reasons.append("Multiple topic keywords present")
@@ -216,27 +423,23 @@ class ScoringService:
         
         return score, reasons
     
-    def _analyze_engagement_triggers(self, title: str) -> Tuple[float, List[str]]:
+    def _analyze_engagement_triggers(self, has_digits: bool, urgency_count: int,
+                                     action_count: int) -> Tuple[float, List[str]]:
         """Analyze engagement triggers"""
         score = 0.0
         reasons = []
-        title_lower = title.lower()
         
         # Check for numbers
-        if re.search(r'\d+', title):
+        if has_digits:
             score += 0.1
             reasons.append("Contains numbers (increases credibility)")
         
         # Check for urgency words
-        urgency_words = ['now', 'today', 'latest', 'new', 'just', 'breaking']
-        urgency_count = sum(1 for word in urgency_words if word in title_lower)
         if urgency_count > 0:
             score += 0.1
             reasons.append("Creates urgency")
         
         # Check for action words
-        action_words = ['watch', 'see', 'learn', 'discover', 'find', 'get']
-        action_count = sum(1 for word in action_words if word in title_lower)
         if action_count > 0:
             score += 0.05
             reasons.append("Contains action words")
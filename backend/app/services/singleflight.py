@@ -0,0 +1,191 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Deletes a lock only while it still holds the caller's token: a lock that
+# expired and was taken by another worker is left to its new owner
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def release_lock(redis_client: redis.Redis, lock_key: str, token: str) -> bool:
+    """Compare-and-delete of a SET NX lock; False when the lock is no longer ours"""
+    return bool(redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token))
+
+
+def call_lock_ttl() -> int:
+    """Seconds a lock held around an upstream AI call must outlive it: the deadline plus the wait for a slot"""
+    return max(1, int(settings.AI_API_TIMEOUT + settings.AI_LIMITER_QUEUE_TIMEOUT_SECONDS) + 1)
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one upstream call.
+
+    The first caller for a key runs the call; callers arriving with the same
+    key while it is in flight wait for it and get the same result (or
+    exception). ``do`` coalesces coroutines on the event loop, running the
+    call in its own task so a cancelled caller neither cancels it nor fails
+    the other callers.
+
+    With a Redis client attached the coalescing also spans workers: the
+    leader holds a SET NX lock for the key and publishes its JSON-encoded
+    result under the lock's token for SINGLEFLIGHT_RESULT_TTL seconds. The
+    lock outlives the longest upstream call (``lock_ttl``) and is released by
+    token, so a leader never drops a lock another worker has since taken. Callers
+    in other workers poll for that result and run the call themselves if the
+    leader fails or SINGLEFLIGHT_WAIT_SECONDS pass. Redis errors fall back to
+    per-process coalescing. Redis calls are made from worker threads.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, wait_seconds: float = None,
+                 result_ttl: int = None, poll_interval: float = 0.05, lock_ttl: int = None):
+        self.redis_client = redis_client
+        self.wait_seconds = wait_seconds if wait_seconds is not None else settings.SINGLEFLIGHT_WAIT_SECONDS
+        self.result_ttl = result_ttl if result_ttl is not None else settings.SINGLEFLIGHT_RESULT_TTL
+        self.lock_ttl = lock_ttl if lock_ttl is not None else call_lock_ttl()
+        self.poll_interval = poll_interval
+
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.local_shared = 0
+        self.remote_shared = 0
+
+    def attach_redis(self, redis_client: Optional[redis.Redis]) -> None:
+        """Coalesce across workers through this Redis client (None: per process only)"""
+        self.redis_client = redis_client
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn() once for all concurrent callers with the same key"""
+        task = self._futures.get(key)
+        if task is None:
+            # The call runs in its own task, so no caller's cancellation reaches it
+            task = asyncio.ensure_future(self._alead(key, fn))
+            self._futures[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            with self._lock:
+                self.local_shared += 1
+        # Shielded: a cancelled caller stops waiting while the call and the other callers carry on
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        if self._futures.get(key) is task:
+            del self._futures[key]
+        # Retrieved here in case every caller was cancelled before it finished
+        if not task.cancelled():
+            task.exception()
+
+    async def _alead(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() for this worker, or wait for the worker already running it"""
+        lock_key, token, owned = await self._offload(self._claim, key, default=(None, None, False))
+        if token is not None and not owned:
+            found, result = await self._await_remote(lock_key, token)
+            if found:
+                return result
+            lock_key, token, owned = None, None, False
+
+        with self._lock:
+            self.leaders += 1
+        try:
+            result = await fn()
+        except BaseException:
+            if owned:
+                await self._offload(self._release, lock_key, token)
+            raise
+        if owned:
+            await self._offload(self._publish, lock_key, token, result)
+        return result
+
+    async def _offload(self, fn: Callable, *args, default: Any = None) -> Any:
+        """Run a blocking Redis helper in a worker thread; ``default`` without Redis"""
+        if self.redis_client is None:
+            return default
+        return await asyncio.to_thread(fn, *args)
+
+    def _claim(self, key: str) -> Tuple[Optional[str], Optional[str], bool]:
+        """(lock key, leader token, whether this worker owns the lock); no token without Redis"""
+        if self.redis_client is None:
+            return None, None, False
+
+        lock_key = "singleflight:" + hashlib.sha256(key.encode()).hexdigest()
+        token = uuid.uuid4().hex
+        try:
+            if self.redis_client.set(lock_key, token, nx=True, ex=self.lock_ttl):
+                return lock_key, token, True
+            return lock_key, self.redis_client.get(lock_key), False
+        except Exception as e:
+            logger.warning(f"Singleflight Redis lock failed: {e}")
+            return None, None, False
+
+    def _poll_remote(self, lock_key: str, token: str) -> Tuple[bool, bool, Any]:
+        """(done waiting, found, result) for another worker's flight"""
+        try:
+            raw = self.redis_client.get(f"{lock_key}:{token}")
+            if raw is not None:
+                with self._lock:
+                    self.remote_shared += 1
+                return True, True, json.loads(raw)
+            # Lock gone (or taken over) without a result: that leader failed
+            if self.redis_client.get(lock_key) != token:
+                return True, False, None
+        except Exception as e:
+            logger.warning(f"Singleflight Redis poll failed: {e}")
+            return True, False, None
+        return False, False, None
+
+    async def _await_remote(self, lock_key: str, token: str) -> Tuple[bool, Any]:
+        """(found, result) once another worker publishes, or (False, None) when it gives up"""
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            done, found, result = await asyncio.to_thread(self._poll_remote, lock_key, token)
+            if done:
+                return found, result
+            await asyncio.sleep(self.poll_interval)
+        return False, None
+
+    def _publish(self, lock_key: str, token: str, result: Any) -> None:
+        """Hand the result to waiting workers and drop the lock"""
+        try:
+            self.redis_client.set(f"{lock_key}:{token}", json.dumps(result), ex=self.result_ttl)
+        except Exception as e:
+            logger.warning(f"Singleflight Redis publish failed: {e}")
+        self._release(lock_key, token)
+
+    def _release(self, lock_key: str, token: str) -> None:
+        try:
+            release_lock(self.redis_client, lock_key, token)
+        except Exception as e:
+            logger.warning(f"Singleflight Redis unlock failed: {e}")
+
+    def stats(self) -> Dict:
+        """Coalescing counters for metrics"""
+        with self._lock:
+            return {
+                "in_flight": len(self._futures),
+                "leaders": self.leaders,
+                "local_shared": self.local_shared,
+                "remote_shared": self.remote_shared,
+                "redis_enabled": self.redis_client is not None
+            }
+
+
+# Shared by the AI generation and YouTube services in this process
+singleflight = SingleFlight()
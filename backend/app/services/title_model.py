@@ -0,0 +1,312 @@
+"""
+Local title generator trained on high-engagement titles
+
+Mines the titles of high-engagement videos for two things: templates, where
+the video's topic is replaced by a {topic} slot ("Why {topic} Will Blow Your
+Mind"), and an order-2 Markov chain over the tokens of those templates, whose
+random walks recombine them into new titles. The model is written as a small
+gzipped JSON snapshot that API workers load at startup and reload when it
+changes; generating a few hundred candidates takes milliseconds and no
+network call, so it can stand in for the LLM (LOCAL_TITLES_MODE).
+
+Usage:
+    python -m app.services.title_model [--model PATH] [--min-engagement RATE] [--max-titles N]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import re
+import time
+import zlib
+from collections import Counter, defaultdict
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.constants import HIGH_ENGAGEMENT_THRESHOLD, MAX_TITLE_LENGTH, MIN_TITLE_LENGTH
+from app.db.connection import engine
+from app.models.video import Video
+from app.services.generation_cache import normalize_prompt_text
+
+logger = logging.getLogger(__name__)
+
+MODEL_FORMAT = 1
+
+# Placeholder token for the topic; BOS and EOS pad the chain's walks
+TOPIC_SLOT = "{topic}"
+BOS = "<s>"
+EOS = "</s>"
+
+# Successors kept per chain state, and longest walk in tokens
+MAX_SUCCESSORS = 8
+MAX_WALK_TOKENS = 14
+MAX_TEMPLATES = 2000
+# Titles are read from the database in chunks of this many rows
+READ_CHUNK_SIZE = 10000
+
+_EDGE_PUNCTUATION = re.compile(r"^(\W*)(.*?)(\W*)$")
+
+
+def _match_form(token: str) -> str:
+    """Case- and punctuation-insensitive form of a token for topic matching"""
+    return re.sub(r"\W", "", token.lower())
+
+
+def to_template(title: str, topic: str) -> Optional[List[str]]:
+    """Tokens of ``title`` with its first mention of ``topic`` replaced by TOPIC_SLOT
+
+    None when the title does not mention the topic word for word. Punctuation
+    around the mention stays on the slot token ("{topic}?").
+    """
+    tokens = title.split()
+    topic_words = [word for word in (_match_form(t) for t in topic.split()) if word]
+    if not topic_words or len(topic_words) > len(tokens):
+        return None
+
+    forms = [_match_form(token) for token in tokens]
+    for start in range(len(tokens) - len(topic_words) + 1):
+        if forms[start:start + len(topic_words)] == topic_words:
+            end = start + len(topic_words) - 1
+            leading = _EDGE_PUNCTUATION.match(tokens[start]).group(1)
+            trailing = _EDGE_PUNCTUATION.match(tokens[end]).group(3)
+            return tokens[:start] + [leading + TOPIC_SLOT + trailing] + tokens[end + 1:]
+    return None
+
+
+def render(tokens: Iterable[str], topic: str) -> str:
+    """Title text of template tokens, with the topic filled in"""
+    return " ".join(token.replace(TOPIC_SLOT, topic) for token in tokens)
+
+
+class TitleModel:
+    """Immutable mined templates and token chain"""
+
+    def __init__(self, templates: Optional[List[Tuple[List[str], float]]] = None,
+                 chain: Optional[Dict[Tuple[str, str], List[Tuple[str, int]]]] = None,
+                 titles: int = 0, built_at: Optional[float] = None):
+        # Templates best first, each with its summed engagement rate
+        self.templates = templates or []
+        self.chain = chain or {}
+        self.titles = titles
+        self.built_at = built_at
+        # Cumulative weights per state for random.choices
+        self._successors = {
+            state: ([token for token, _ in successors], list(accumulate(count for _, count in successors)))
+            for state, successors in self.chain.items()
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self.templates)
+
+    @classmethod
+    def train(cls, rows: Iterable[Tuple[str, str, float]], built_at: Optional[float] = None) -> "TitleModel":
+        """Mine (title, topic, engagement_rate) rows"""
+        template_counts: Counter = Counter()
+        template_engagement: Dict[Tuple[str, ...], float] = defaultdict(float)
+        titles = 0
+        for title, topic, engagement_rate in rows:
+            template = to_template(title or "", topic or "")
+            if template is None:
+                continue
+            titles += 1
+            template_counts[tuple(template)] += 1
+            template_engagement[tuple(template)] += engagement_rate or 0.0
+
+        ranked = sorted(template_counts, key=lambda t: (template_engagement[t], template_counts[t]), reverse=True)
+        templates = [(list(t), round(template_engagement[t], 6)) for t in ranked[:MAX_TEMPLATES]]
+
+        transitions: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        for template, count in template_counts.items():
+            padded = [BOS, BOS, *template, EOS]
+            for i in range(2, len(padded)):
+                transitions[(padded[i - 2], padded[i - 1])][padded[i]] += count
+        chain = {state: successors.most_common(MAX_SUCCESSORS) for state, successors in transitions.items()}
+
+        return cls(templates, chain, titles=titles, built_at=built_at)
+
+    def generate(self, topic: str, limit: int) -> List[str]:
+        """Up to ``limit`` distinct titles for a topic, best templates first
+
+        Half the candidates come from templates and the rest from walks of
+        the chain, seeded by the topic so a topic always gets the same titles.
+        """
+        candidates: Dict[str, str] = {}
+
+        def add(tokens: List[str]) -> None:
+            title = render(tokens, topic)
+            if MIN_TITLE_LENGTH <= len(title) <= MAX_TITLE_LENGTH:
+                candidates.setdefault(title.lower(), title)
+
+        for tokens, _ in self.templates[:max(1, limit // 2)]:
+            add(tokens)
+
+        rng = random.Random(zlib.crc32(normalize_prompt_text(topic).encode()))
+        # Give up once walks stop producing new titles, as with a small corpus
+        misses = 0
+        while len(candidates) < limit and misses < limit:
+            found = len(candidates)
+            walk = self._walk(rng)
+            if walk is not None:
+                add(walk)
+            misses = misses + 1 if len(candidates) == found else 0
+
+        return list(candidates.values())[:limit]
+
+    def _walk(self, rng: random.Random) -> Optional[List[str]]:
+        """Random walk of the chain; None unless it ends and mentions the topic once"""
+        tokens = []
+        state = (BOS, BOS)
+        for _ in range(MAX_WALK_TOKENS):
+            successors = self._successors.get(state)
+            if successors is None:
+                return None
+            token = rng.choices(successors[0], cum_weights=successors[1])[0]
+            if token == EOS:
+                return tokens if sum(TOPIC_SLOT in t for t in tokens) == 1 else None
+            tokens.append(token)
+            state = (state[1], token)
+        return None
+
+    def save(self, path: Path) -> None:
+        """Write the model atomically; tokens are stored once in a vocabulary"""
+        vocabulary: Dict[str, int] = {}
+
+        def ids(tokens: Iterable[str]) -> List[int]:
+            return [vocabulary.setdefault(token, len(vocabulary)) for token in tokens]
+
+        payload = {
+            "format": MODEL_FORMAT,
+            "titles": self.titles,
+            "built_at": self.built_at,
+            "templates": [[ids(tokens), weight] for tokens, weight in self.templates],
+            "chain": [[ids(state), [[ids([token])[0], count] for token, count in successors]]
+                      for state, successors in self.chain.items()]
+        }
+        payload["vocabulary"] = sorted(vocabulary, key=vocabulary.get)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "TitleModel":
+        """Read a model written by ``save``"""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("format") != MODEL_FORMAT:
+            raise ValueError(f"Unsupported title model format: {payload.get('format')}")
+
+        vocabulary = payload["vocabulary"]
+        return cls(
+            [([vocabulary[i] for i in tokens], weight) for tokens, weight in payload["templates"]],
+            {(vocabulary[state[0]], vocabulary[state[1]]): [(vocabulary[token], count) for token, count in successors]
+             for state, successors in payload["chain"]},
+            titles=payload.get("titles", 0),
+            built_at=payload.get("built_at")
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "titles": self.titles,
+            "templates": len(self.templates),
+            "chain_states": len(self.chain),
+            "built_at": self.built_at
+        }
+
+
+class LocalTitleGenerator:
+    """Serves the current TitleModel and reloads it when the model file changes"""
+
+    def __init__(self, model_path: str = None):
+        self.model_path = Path(model_path or settings.TITLE_MODEL_PATH)
+        self.model = TitleModel()
+        self._model_mtime: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether a model with at least one template is loaded"""
+        return bool(self.model)
+
+    def reload_if_changed(self) -> bool:
+        """Load the model if it is new or was rewritten; returns True when swapped"""
+        try:
+            mtime = self.model_path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._model_mtime:
+            return False
+
+        try:
+            model = TitleModel.load(self.model_path)
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable title model: {e}")
+            return False
+
+        self.model = model
+        self._model_mtime = mtime
+        logger.info(f"Loaded title model with {len(model.templates)} templates")
+        return True
+
+    def generate(self, topic: str, limit: int = None) -> List[str]:
+        return self.model.generate(topic, limit if limit is not None else settings.TITLE_MODEL_CANDIDATES)
+
+    def stats(self) -> Dict:
+        return {"model": str(self.model_path), **self.model.stats()}
+
+
+class TitleModelBuildJob:
+    """Train the title model from the videos table"""
+
+    def __init__(self, model_path: str = None, db_engine: Engine = engine):
+        self.model_path = Path(model_path or settings.TITLE_MODEL_PATH)
+        self.db_engine = db_engine
+        self.table = Video.__table__
+
+    def run(self, min_engagement: float = HIGH_ENGAGEMENT_THRESHOLD, max_titles: int = 200000) -> TitleModel:
+        c = self.table.c
+        query = (
+            select(c.title, c.topic, c.engagement_rate)
+            .where(c.engagement_rate >= min_engagement, c.topic.is_not(None))
+            .order_by(c.engagement_rate.desc())
+            .limit(max_titles)
+        )
+        with self.db_engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=READ_CHUNK_SIZE).execute(query)
+            model = TitleModel.train((row for partition in result.partitions() for row in partition),
+                                     built_at=time.time())
+
+        logger.info(f"Built title model from {model.titles} titles ({len(model.templates)} templates)")
+        model.save(self.model_path)
+        return model
+
+
+# Shared by every title generation path in this process
+local_titles = LocalTitleGenerator()
+
+
+def main() -> None:
+    from app.core.logging import setup_logging
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Build the local title model")
+    parser.add_argument("--model", default=settings.TITLE_MODEL_PATH, help="Model file path")
+    parser.add_argument("--min-engagement", type=float, default=HIGH_ENGAGEMENT_THRESHOLD,
+                        help="Lowest engagement rate of a training title")
+    parser.add_argument("--max-titles", type=int, default=200000, help="Most titles to train on")
+    args = parser.parse_args()
+
+    TitleModelBuildJob(model_path=args.model).run(min_engagement=args.min_engagement, max_titles=args.max_titles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from collections import deque
+from typing import Dict, Optional
+import threading
+
+# Rough size of a Gemini token in English text, for calls without reported usage
+CHARS_PER_TOKEN = 4
+# Recent calls per template behind its latency percentiles
+LATENCY_WINDOW = 500
+
+UNTEMPLATED = "untemplated"
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Token count estimated from text length"""
+    return -(-len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+class Completion(str):
+    """Completion text with the token counts the provider reported, if any"""
+
+    prompt_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+    @classmethod
+    def with_usage(cls, text: str, prompt_tokens: Optional[int], output_tokens: Optional[int]) -> "Completion":
+        completion = cls(text)
+        completion.prompt_tokens = prompt_tokens
+        completion.output_tokens = output_tokens
+        return completion
+
+
+class PromptUsage:
+    """Prompt/output tokens and latency of upstream AI calls per prompt template version.
+
+    AIService records every call under the label of the template its messages
+    were rendered from ("titles@2"), or UNTEMPLATED. Token counts come from
+    the provider when it reports them and are estimated from text length
+    otherwise; ``estimated`` counts the calls whose numbers are estimates.
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, template: Optional[str], prompt_tokens: int, output_tokens: int, latency: float,
+               error: bool = False, estimated: bool = False) -> None:
+        with self._lock:
+            usage = self._templates.get(template or UNTEMPLATED)
+            if usage is None:
+                usage = self._templates[template or UNTEMPLATED] = {
+                    "calls": 0, "errors": 0, "estimated": 0, "prompt_tokens": 0, "output_tokens": 0,
+                    "latencies": deque(maxlen=LATENCY_WINDOW)
+                }
+            usage["calls"] += 1
+            usage["errors"] += error
+            usage["estimated"] += estimated
+            usage["prompt_tokens"] += prompt_tokens
+            usage["output_tokens"] += output_tokens
+            usage["latencies"].append(latency)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-template totals, means and latency percentiles for metrics"""
+        report = {}
+        with self._lock:
+            for template, usage in sorted(self._templates.items()):
+                calls = usage["calls"]
+                ordered = sorted(usage["latencies"])
+                report[template] = {
+                    "calls": calls,
+                    "errors": usage["errors"],
+                    "estimated": usage["estimated"],
+                    "prompt_tokens": usage["prompt_tokens"],
+                    "output_tokens": usage["output_tokens"],
+                    "mean_prompt_tokens": round(usage["prompt_tokens"] / calls, 1),
+                    "mean_output_tokens": round(usage["output_tokens"] / calls, 1),
+                    **{
+                        f"p{q}_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))] * 1000, 1)
+                        for q in (50, 90, 99)
+                    }
+                }
+        return report
+
+
+# Every upstream AI call in this process is recorded here
+prompt_usage = PromptUsage()
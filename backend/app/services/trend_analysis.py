@@ -3,6 +3,10 @@ from datetime import datetime, timedelta
 import logging
 from collections import Counter
 
+from sqlalchemy.orm import Session
+
+from app.models.video import Video
+
 logger = logging.getLogger(__name__)
 
 class TrendAnalysisService:
@@ -77,6 +81,45 @@ class TrendAnalysisService:
             logger.error(f"Error getting trending topics: {e}")
             return []
     
+    def rank_topics_by_engagement(self, db: Session, limit: int = 10, days: int = 7) -> List[Dict]:
+        """Topics of recent high-engagement videos, by average engagement rate"""
+        since = datetime.utcnow() - timedelta(days=days)
+        
+        # Query for trending topics based on engagement
+        trending_videos = db.query(Video).filter(
+            Video.published_at >= since
+        ).order_by(Video.engagement_rate.desc()).limit(limit * 5).all()
+        
+        # Group by topic and calculate average engagement
+        topic_stats = {}
+        for video in trending_videos:
+            if video.topic:
+                if video.topic not in topic_stats:
+                    topic_stats[video.topic] = {
+                        "total_views": 0,
+                        "total_engagement": 0,
+                        "video_count": 0
+                    }
+                
+                topic_stats[video.topic]["total_views"] += video.views
+                topic_stats[video.topic]["total_engagement"] += video.engagement_rate
+                topic_stats[video.topic]["video_count"] += 1
+        
+        # Calculate averages and sort
+        trending_topics = []
+        for topic, stats in topic_stats.items():
+            avg_engagement = stats["total_engagement"] / stats["video_count"]
+            trending_topics.append({
+                "topic": topic,
+                "avg_engagement": round(avg_engagement, 4),
+                "total_views": stats["total_views"],
+                "video_count": stats["video_count"]
+            })
+        
+        # Sort by average engagement and return top results
+        trending_topics.sort(key=lambda x: x["avg_engagement"], reverse=True)
+        return trending_topics[:limit]
+    
     def analyze_viral_patterns(self, videos: List[Dict]) -> List[str]:
         """Analyze viral patterns from a list of videos"""
         try:
@@ -1,146 +1,295 @@
-import requests
+import asyncio
+import importlib.util
+import random
+import re
+import httpx
 from typing import List, Dict, Optional
 from datetime import datetime
 import logging
 
 from app.core.config import settings
+from app.services.singleflight import SingleFlight, singleflight
 
 logger = logging.getLogger(__name__)
 
+# Rate limiting and transient server errors are retried; anything else (e.g. 403 quota) is not
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# HTTP/2 is negotiated when the h2 package is installed (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Most video IDs one videos.list request accepts
+DETAILS_CHUNK_SIZE = 50
+# The API key as it appears in request URLs quoted by error messages
+KEY_PARAM = re.compile(r"([?&]key=)[^&\s'\"]+")
+
+class VideoDetails(list):
+    """Detailed videos, in input order, with the IDs whose chunk could not be fetched"""
+    
+    def __init__(self, videos: List[Dict] = (), failed_ids: List[str] = ()):
+        super().__init__(videos)
+        self.failed_ids = list(failed_ids)
+    
+    @classmethod
+    def from_result(cls, result: Dict) -> "VideoDetails":
+        return cls(result["videos"], result["failed_ids"])
+
 class YouTubeService:
-    def __init__(self):
+    """YouTube Data API client
+    
+    Requests share one pooled httpx client (keep-alive, HTTP/2 where
+    available), opened by open at startup and closed by aclose at shutdown.
+    Every request is bounded by YOUTUBE_API_TIMEOUT and
+    retried up to YOUTUBE_API_RETRIES times on connection errors, timeouts,
+    429 and 5xx, after a full-jitter exponential backoff (honouring
+    Retry-After). Concurrent identical fetches share one API call.
+    
+    Video details are fetched in chunks of 50 IDs, up to
+    YOUTUBE_DETAILS_CONCURRENCY chunks at a time; a chunk that still fails
+    after its retries drops only its own videos, and its IDs are reported in
+    the result's ``failed_ids``. Logged errors never include the API key.
+    """
+    
+    def __init__(self, flights: SingleFlight = singleflight):
         self.api_key = settings.YOUTUBE_API_KEY
         self.base_url = "https://www.googleapis.com/youtube/v3"
-        
-    def search_shorts(self, query: str, max_results: int = 50, region_code: str = "IN") -> List[Dict]:
+        # Concurrent identical fetches share one API call (and its quota cost)
+        self.flights = flights
+        self.timeout = settings.YOUTUBE_API_TIMEOUT
+        self.retries = max(0, settings.YOUTUBE_API_RETRIES)
+        self.backoff = settings.YOUTUBE_RETRY_BACKOFF_MS / 1000
+        self.details_concurrency = max(1, settings.YOUTUBE_DETAILS_CONCURRENCY)
+        self.detail_chunks = 0
+        self.failed_detail_chunks = 0
+        # Connection pool, opened by the app lifespan
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared async client (opened here when used without the app lifespan)"""
+        if self._client is None:
+            self.open()
+        return self._client
+    
+    def open(self) -> None:
+        """Create the connection pool and its TLS context ahead of the first request"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.YOUTUBE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.YOUTUBE_MAX_CONNECTIONS
+                )
+            )
+    
+    async def aclose(self) -> None:
+        """Close the connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def asearch_shorts(self, query: str, max_results: int = 50, region_code: str = "IN") -> List[Dict]:
         """Search for YouTube Shorts videos"""
+        return await self.flights.do(
+            f"youtube:search:{query}:{max_results}:{region_code}",
+            lambda: self._asearch_shorts(query, max_results, region_code)
+        )
+    
+    async def _asearch_shorts(self, query: str, max_results: int, region_code: str) -> List[Dict]:
+        """Uncoalesced asearch_shorts"""
         try:
             if not self.api_key:
                 logger.warning("YouTube API key not configured")
                 return []
             
-            params = {
-                "part": "snippet",
-                "q": query,
-                "type": "video",
-                "videoDuration": "short",
-                "maxResults": max_results,
-                "regionCode": region_code,
-                "key": self.api_key
-            }
-            
-            response = requests.get(f"{self.base_url}/search", params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            videos = []
-            
-            for item in data.get("items", []):
-                video_data = {
-                    "video_id": item["id"]["videoId"],
-                    "title": item["snippet"]["title"],
-                    "description": item["snippet"]["description"],
-                    "channel_id": item["snippet"]["channelId"],
-                    "channel_title": item["snippet"]["channelTitle"],
-                    "published_at": item["snippet"]["publishedAt"],
-                    "thumbnail_url": item["snippet"]["thumbnails"]["medium"]["url"]
-                }
-                videos.append(video_data)
-            
-            return videos
+            return self._parse_search(await self._aget("/search", self._search_params(query, max_results, region_code)))
             
         except Exception as e:
-            logger.error(f"Error fetching YouTube Shorts: {e}")
+            logger.error(f"Error fetching YouTube Shorts: {self._describe(e)}")
             return []
     
-    def get_video_details(self, video_ids: List[str]) -> List[Dict]:
+    def _search_params(self, query: str, max_results: int, region_code: str) -> Dict:
+        return {
+            "part": "snippet",
+            "q": query,
+            "type": "video",
+            "videoDuration": "short",
+            "maxResults": max_results,
+            "regionCode": region_code
+        }
+    
+    def _parse_search(self, data: Dict) -> List[Dict]:
+        """Videos of a search response"""
+        videos = []
+        
+        for item in data.get("items", []):
+            video_data = {
+                "video_id": item["id"]["videoId"],
+                "title": item["snippet"]["title"],
+                "description": item["snippet"]["description"],
+                "channel_id": item["snippet"]["channelId"],
+                "channel_title": item["snippet"]["channelTitle"],
+                "published_at": item["snippet"]["publishedAt"],
+                "thumbnail_url": item["snippet"]["thumbnails"]["medium"]["url"]
+            }
+            videos.append(video_data)
+        
+        return videos
+    
+    async def aget_video_details(self, video_ids: List[str]) -> "VideoDetails":
         """Get detailed information for multiple videos"""
-        try:
-            if not self.api_key:
-                logger.warning("YouTube API key not configured")
-                return []
-            
-            # YouTube API allows max 50 video IDs per request
-            all_videos = []
-            for i in range(0, len(video_ids), 50):
-                batch_ids = video_ids[i:i+50]
-                
-                params = {
-                    "part": "snippet,statistics,contentDetails",
-                    "id": ",".join(batch_ids),
-                    "key": self.api_key
-                }
-                
-                response = requests.get(f"{self.base_url}/videos", params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                for item in data.get("items", []):
-                    video_data = {
-                        "video_id": item["id"],
-                        "title": item["snippet"]["title"],
-                        "description": item["snippet"]["description"],
-                        "channel_id": item["snippet"]["channelId"],
-                        "channel_title": item["snippet"]["channelTitle"],
-                        "published_at": item["snippet"]["publishedAt"],
-                        "thumbnail_url": item["snippet"]["thumbnails"]["medium"]["url"],
-                        "views": int(item["statistics"].get("viewCount", 0)),
-                        "likes": int(item["statistics"].get("likeCount", 0)),
-                        "comments": int(item["statistics"].get("commentCount", 0)),
-                        "duration": self._parse_duration(item["contentDetails"]["duration"])
-                    }
-                    all_videos.append(video_data)
-            
-            return all_videos
-            
-        except Exception as e:
-            logger.error(f"Error fetching video details: {e}")
-            return []
+        return VideoDetails.from_result(await self.flights.do(
+            "youtube:videos:" + ",".join(video_ids),
+            lambda: self._aget_video_details(video_ids)
+        ))
+    
+    async def _aget_video_details(self, video_ids: List[str]) -> Dict:
+        """Uncoalesced aget_video_details; chunks are fetched concurrently"""
+        if not self.api_key:
+            logger.warning("YouTube API key not configured")
+            return {"videos": [], "failed_ids": list(video_ids)}
+        
+        semaphore = asyncio.Semaphore(self.details_concurrency)
+        
+        async def fetch(index: int, batch_ids: List[str]) -> Optional[List[Dict]]:
+            async with semaphore:
+                try:
+                    return self._parse_videos(await self._aget("/videos", self._details_params(batch_ids)),
+                                              with_duration=True)
+                except Exception as e:
+                    return self._details_chunk_failed(index, batch_ids, e)
+        
+        chunks = self._detail_chunks(video_ids)
+        results = await asyncio.gather(*(fetch(index, batch_ids) for index, batch_ids in enumerate(chunks)))
+        return self._merge_details(video_ids, chunks, results)
     
-    def get_trending_videos(self, region_code: str = "IN", category_id: str = "1") -> List[Dict]:
+    def _detail_chunks(self, video_ids: List[str]) -> List[List[str]]:
+        # YouTube API allows max 50 video IDs per request
+        chunks = [video_ids[i:i + DETAILS_CHUNK_SIZE] for i in range(0, len(video_ids), DETAILS_CHUNK_SIZE)]
+        self.detail_chunks += len(chunks)
+        return chunks
+    
+    def _details_chunk_failed(self, index: int, batch_ids: List[str], error: Exception) -> None:
+        """A failed chunk leaves out its own videos only"""
+        self.failed_detail_chunks += 1
+        logger.error(f"Error fetching video details chunk {index} ({batch_ids[0]}..{batch_ids[-1]}, "
+                     f"{len(batch_ids)} ids): {self._describe(error)}")
+    
+    def _merge_details(self, video_ids: List[str], chunks: List[List[str]],
+                       results: List[Optional[List[Dict]]]) -> Dict:
+        """Videos of the chunks that succeeded, in the order their IDs were given, and the IDs of those that failed
+        
+        A plain dict, so a result shared through Redis keeps its failed IDs.
+        """
+        position: Dict[str, int] = {}
+        for i, video_id in enumerate(video_ids):
+            position.setdefault(video_id, i)
+        videos = [video for result in results if result for video in result]
+        return {
+            "videos": sorted(videos, key=lambda video: position.get(video["video_id"], len(position))),
+            "failed_ids": [video_id for chunk, result in zip(chunks, results) if result is None for video_id in chunk]
+        }
+    
+    def _details_params(self, batch_ids: List[str]) -> Dict:
+        return {
+            "part": "snippet,statistics,contentDetails",
+            "id": ",".join(batch_ids)
+        }
+    
+    async def aget_trending_videos(self, region_code: str = "IN", category_id: str = "1") -> List[Dict]:
         """Get trending videos for a region"""
+        return await self.flights.do(
+            f"youtube:trending:{region_code}:{category_id}",
+            lambda: self._aget_trending_videos(region_code, category_id)
+        )
+    
+    async def _aget_trending_videos(self, region_code: str, category_id: str) -> List[Dict]:
+        """Uncoalesced aget_trending_videos"""
         try:
             if not self.api_key:
                 logger.warning("YouTube API key not configured")
                 return []
             
-            params = {
-                "part": "snippet,statistics",
-                "chart": "mostPopular",
-                "regionCode": region_code,
-                "videoCategoryId": category_id,
-                "maxResults": 50,
-                "key": self.api_key
-            }
-            
-            response = requests.get(f"{self.base_url}/videos", params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            videos = []
-            
-            for item in data.get("items", []):
-                video_data = {
-                    "video_id": item["id"],
-                    "title": item["snippet"]["title"],
-                    "description": item["snippet"]["description"],
-                    "channel_id": item["snippet"]["channelId"],
-                    "channel_title": item["snippet"]["channelTitle"],
-                    "published_at": item["snippet"]["publishedAt"],
-                    "thumbnail_url": item["snippet"]["thumbnails"]["medium"]["url"],
-                    "views": int(item["statistics"].get("viewCount", 0)),
-                    "likes": int(item["statistics"].get("likeCount", 0)),
-                    "comments": int(item["statistics"].get("commentCount", 0))
-                }
-                videos.append(video_data)
-            
-            return videos
+            return self._parse_videos(await self._aget("/videos", self._trending_params(region_code, category_id)))
             
         except Exception as e:
-            logger.error(f"Error fetching trending videos: {e}")
+            logger.error(f"Error fetching trending videos: {self._describe(e)}")
             return []
     
+    def _trending_params(self, region_code: str, category_id: str) -> Dict:
+        return {
+            "part": "snippet,statistics",
+            "chart": "mostPopular",
+            "regionCode": region_code,
+            "videoCategoryId": category_id,
+            "maxResults": 50
+        }
+    
+    def _parse_videos(self, data: Dict, with_duration: bool = False) -> List[Dict]:
+        """Videos of a /videos response; duration needs the contentDetails part"""
+        videos = []
+        
+        for item in data.get("items", []):
+            video_data = {
+                "video_id": item["id"],
+                "title": item["snippet"]["title"],
+                "description": item["snippet"]["description"],
+                "channel_id": item["snippet"]["channelId"],
+                "channel_title": item["snippet"]["channelTitle"],
+                "published_at": item["snippet"]["publishedAt"],
+                "thumbnail_url": item["snippet"]["thumbnails"]["medium"]["url"],
+                "views": int(item["statistics"].get("viewCount", 0)),
+                "likes": int(item["statistics"].get("likeCount", 0)),
+                "comments": int(item["statistics"].get("commentCount", 0))
+            }
+            if with_duration:
+                video_data["duration"] = self._parse_duration(item["contentDetails"]["duration"])
+            videos.append(video_data)
+        
+        return videos
+    
+    async def _aget(self, path: str, params: Dict) -> Dict:
+        """GET an API path, retrying transient failures"""
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.client.get(path, params={**params, "key": self.api_key})
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"YouTube API request failed ({self._describe(e)}); retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response.json()
+                delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"YouTube API returned {response.status_code}; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+    
+    def _describe(self, error: BaseException) -> str:
+        """Error text for logs; httpx errors quote the request URL, API key included"""
+        text = KEY_PARAM.sub(r"\1REDACTED", str(error) or repr(error))
+        return text.replace(self.api_key, "REDACTED") if self.api_key else text
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, at least Retry-After, at most the request timeout"""
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        return min(delay, self.timeout)
+    
+    def stats(self) -> Dict:
+        """Connection pool settings and detail chunk counters for metrics"""
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "max_connections": settings.YOUTUBE_MAX_CONNECTIONS,
+            "details_concurrency": self.details_concurrency,
+            "detail_chunks": self.detail_chunks,
+            "failed_detail_chunks": self.failed_detail_chunks
+        }
+    
     def _parse_duration(self, duration: str) -> int:
         """Parse ISO 8601 duration to seconds"""
         try:
@@ -0,0 +1,75 @@
+"""
+Upstream AI calls under a burst with a fixed vs an adaptive (AIMD) concurrency limit
+
+Runs against a LocalAIProvider that answers 429 beyond --capacity calls in
+flight, so no API key is needed. The circuit breaker is left out so only the
+limiters are compared.
+
+Usage (from the backend directory):
+    python -m benchmarks.adaptive_concurrency [--requests N] [--concurrency C] [--capacity K] [--latency-ms MS]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))] if ordered else 0.0
+
+
+async def run(service, requests: int, concurrency: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = {}
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await service.agenerate_text([{"role": "user", "content": "titles"}])
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return {"elapsed": time.perf_counter() - started, "latencies": sorted(latencies), "errors": errors}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Calls per run")
+    parser.add_argument("--concurrency", type=int, default=128, help="Calls the burst offers at once")
+    parser.add_argument("--capacity", type=int, default=16, help="Calls in flight the stub upstream accepts")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Median simulated LLM latency")
+    args = parser.parse_args()
+
+    # Settings are read at import time
+    os.environ["AI_PROVIDER"] = "local"
+    os.environ["LOCAL_AI_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LOCAL_AI_CAPACITY"] = str(args.capacity)
+
+    from app.services.ai_provider import AIService
+    from app.services.circuit_breaker import CircuitBreaker
+    from app.services.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+    limiters = {
+        "fixed 64": AdaptiveConcurrencyLimiter("fixed", initial=64, min_limit=64, max_limit=64),
+        "aimd": AdaptiveConcurrencyLimiter("aimd", initial=64),
+    }
+
+    print(f"{'limiter':>10}{'ok/s':>8}{'ok':>7}{'p50 ms':>9}{'p99 ms':>9}{'limit':>8}  errors")
+    for name, limiter in limiters.items():
+        service = AIService(breaker=CircuitBreaker("bench", failure_threshold=10 ** 9), limiter=limiter)
+        result = asyncio.run(run(service, args.requests, args.concurrency))
+        latencies = result["latencies"]
+        print(f"{name:>10}{len(latencies) / result['elapsed']:>8.0f}{len(latencies):>7}"
+              f"{percentile(latencies, 50) * 1000:>9.0f}{percentile(latencies, 99) * 1000:>9.0f}"
+              f"{limiter.stats()['limit']:>8}  {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
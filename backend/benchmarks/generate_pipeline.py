@@ -0,0 +1,73 @@
+"""
+Full POST /generate/ pipeline against the local AI provider
+
+Runs the real app in process with AI_PROVIDER=local, so caching, request
+coalescing, concurrency limits and fallbacks are exercised without Gemini.
+
+Usage (from the backend directory):
+    python -m benchmarks.generate_pipeline [--requests N] [--topics K] [--concurrency C]
+                                           [--latency-ms MS] [--error-rate R]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import List
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+async def run(app, requests: int, topics: int, concurrency: int) -> List[float]:
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(i: int) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/v1/generate/", json={"topic": f"topic {i % topics}", "count": 10})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    return sorted(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests to send")
+    parser.add_argument("--topics", type=int, default=50, help="Distinct topics among them")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight at once")
+    parser.add_argument("--latency-ms", type=float, default=800, help="Median simulated LLM latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of simulated LLM calls that fail")
+    args = parser.parse_args()
+
+    # Settings are read at import time
+    os.environ["AI_PROVIDER"] = "local"
+    os.environ["LOCAL_AI_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LOCAL_AI_ERROR_RATE"] = str(args.error_rate)
+
+    from app.main import app
+    from app.services.circuit_breaker import ai_circuit_breaker
+    from app.services.generation_cache import generation_cache
+    from app.services.singleflight import singleflight
+
+    started = time.perf_counter()
+    latencies = asyncio.run(run(app, args.requests, args.topics, args.concurrency))
+    elapsed = time.perf_counter() - started
+
+    cache = generation_cache.stats()
+    print(f"requests/s      {args.requests / elapsed:.0f}")
+    print("latency ms      " + "  ".join(f"p{q}={percentile(latencies, q) * 1000:.0f}" for q in (50, 90, 99)))
+    print(f"LLM calls       {singleflight.stats()['leaders']} (coalesced {singleflight.stats()['local_shared']})")
+    print(f"cache hit rate  {cache['hit_rate']:.2%}")
+    print(f"circuit         {ai_circuit_breaker.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Generation latency with and without latency-routed, hedged model calls
+
+Runs against LocalAIProvider stand-ins, so no API key is needed. Each draws
+its latency from a lognormal distribution with an occasional slow tail.
+
+Usage (from the backend directory):
+    python -m benchmarks.hedged_routing [--requests N] [--concurrency C] [--tail-rate R]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from app.services.ai_provider import AIProvider, LocalAIProvider, RoutedAIProvider
+
+
+def make_providers(tail_rate: float) -> Dict[str, AIProvider]:
+    return {
+        model: LocalAIProvider(model, latency_ms=latency_ms, latency_sigma=0.3, tail_rate=tail_rate, tail_ms=1000)
+        for model, latency_ms in (("gemini-1.5-flash", 80), ("gemini-1.5-flash-8b", 60))
+    }
+
+
+async def run(provider: AIProvider, requests: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await provider.agenerate_text([{"role": "user", "content": "titles"}])
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(requests)), return_exceptions=True)
+    return sorted(latencies)
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Calls per run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Calls in flight at once")
+    parser.add_argument("--tail-rate", type=float, default=0.03, help="Share of stub calls that hit the slow tail")
+    args = parser.parse_args()
+
+    runs = {
+        "pinned flash": make_providers(args.tail_rate)["gemini-1.5-flash"],
+        "routed+hedged": RoutedAIProvider(make_providers(args.tail_rate), default_hedge_delay_ms=300),
+    }
+
+    print(f"{'provider':>15}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'hedges':>8}")
+    for name, provider in runs.items():
+        latencies = asyncio.run(run(provider, args.requests, args.concurrency))
+        hedges = provider.hedges if isinstance(provider, RoutedAIProvider) else 0
+        print(f"{name:>15}" + "".join(f"{percentile(latencies, q) * 1000:>10.0f}" for q in (50, 90, 99)) + f"{hedges:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Prompt and output tokens and latency per prompt template version
+
+Renders every registered template with sample input, then sends each
+generation kind for a set of topics through AIService against the local AI
+provider and prints the per-template report that /metrics serves as
+"prompt_usage". Token counts are estimated from text length.
+
+Usage (from the backend directory):
+    python -m benchmarks.prompt_tokens [--topics K] [--latency-ms MS]
+"""
+
+import argparse
+import asyncio
+import os
+
+
+async def run(topics: int) -> None:
+    from app.services.ai_generation import AIGenerationService
+    from app.services.generation_cache import GenerationCache
+
+    # A private cache so every call goes upstream
+    service = AIGenerationService(cache=GenerationCache(max_size=0))
+    names = [f"sample topic {i}" for i in range(topics)]
+    await asyncio.gather(*(service.agenerate_content(topic) for topic in names))
+    await asyncio.gather(*(service.agenerate_viral_titles(topic) for topic in names))
+    await asyncio.gather(*(service.agenerate_hashtags(topic) for topic in names))
+    await asyncio.gather(*(service.aanalyze_topic(topic) for topic in names))
+    await service.aanalyze_topics(names, use_cache=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--topics", type=int, default=20, help="Topics per generation kind")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Median simulated LLM latency")
+    args = parser.parse_args()
+
+    # Settings are read at import time
+    os.environ["AI_PROVIDER"] = "local"
+    os.environ["LOCAL_AI_LATENCY_MS"] = str(args.latency_ms)
+
+    from app.services.prompt_templates import PROMPTS
+    from app.services.token_usage import estimate_tokens, prompt_usage
+
+    sample = {"topic": "history of indian independence", "count": 10, "hashtag_count": 10, "style": "viral",
+              "keywords": "history, indian, independence", "topics": '["history of indian independence"]'}
+    print(f"{'template':>18}{'prompt tokens':>15}")
+    for template in PROMPTS.values():
+        messages = template.render(**sample)
+        prompt = "\n\n".join(message["content"] for message in messages)
+        print(f"{template.label:>18}{estimate_tokens(prompt):>15}")
+
+    asyncio.run(run(args.topics))
+
+    print(f"\n{'template':>18}{'calls':>7}{'prompt':>9}{'output':>9}{'p50 ms':>9}{'p90 ms':>9}")
+    for label, usage in prompt_usage.stats().items():
+        print(f"{label:>18}{usage['calls']:>7}{usage['mean_prompt_tokens']:>9}{usage['mean_output_tokens']:>9}"
+              f"{usage['p50_ms']:>9}{usage['p90_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Single-title scoring throughput with and without micro-batching
+
+Usage (from the backend directory):
+    python -m benchmarks.score_micro_batching [--requests N] [--redis-url URL]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import redis
+
+from app.services.batch_scoring import BatchScoringEngine
+from app.services.score_batcher import ScoreMicroBatcher
+from app.services.score_cache import ScoreCache
+from app.services.scoring import SCORING_LEXICONS
+
+VOCABULARY = sorted({word for words in SCORING_LEXICONS.values() for word in words}) + [
+    "cooking", "pasta", "travel", "vlog", "morning", "routine", "the", "my", "in", "60", "seconds"
+]
+
+
+def make_requests(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        (
+            " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(3, 10))).title(),
+            rng.sample(VOCABULARY, 3),
+            ["#" + rng.choice(VOCABULARY)],
+            rng.choice([None, "cooking pasta", "travel vlog"])
+        )
+        for _ in range(count)
+    ]
+
+
+async def run(batcher: ScoreMicroBatcher, requests) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(batcher.score(*request) for request in requests))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000, help="Concurrent requests per run")
+    parser.add_argument("--redis-url", default=None, help="Also use Redis as the shared cache tier")
+    args = parser.parse_args()
+
+    engine = BatchScoringEngine()
+    redis_client = redis.from_url(args.redis_url) if args.redis_url else None
+
+    print(f"{'max batch':>10}{'requests/s':>14}{'mean batch':>12}")
+    for max_batch_size in (1, 16, 64, 256):
+        # Distinct titles per run and no local tier, so every request is a real miss
+        cache = ScoreCache(max_size=0, redis_client=redis_client, version=f"bench-{time.time_ns()}")
+        batcher = ScoreMicroBatcher(engine, cache=cache, max_batch_size=max_batch_size, max_wait_ms=2.0)
+        elapsed = asyncio.run(run(batcher, make_requests(args.requests, seed=max_batch_size)))
+        mean_batch = batcher.stats()["batch_size"]["mean"]
+        print(f"{max_batch_size:>10}{args.requests / elapsed:>14.0f}{mean_batch:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Per-request service construction vs app-scoped singletons
+
+Usage (from the backend directory):
+    python -m benchmarks.service_construction [--iterations N]
+"""
+
+import argparse
+import timeit
+from types import SimpleNamespace
+
+from app.core.config import settings
+
+# AIGenerationService refuses to build without a key; configure() makes no network call
+settings.GOOGLE_AI_API_KEY = settings.GOOGLE_AI_API_KEY or "benchmark-key"
+
+from app.core.dependencies import (  # noqa: E402
+    get_ai_generation_service,
+    get_batch_scoring_engine,
+    get_scoring_service,
+    get_trend_service,
+    get_youtube_service,
+    init_services,
+)
+from app.services.ai_generation import AIGenerationService  # noqa: E402
+from app.services.batch_scoring import BatchScoringEngine  # noqa: E402
+from app.services.scoring import ScoringService  # noqa: E402
+from app.services.trend_analysis import TrendAnalysisService  # noqa: E402
+from app.services.youtube_fetch import YouTubeService  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Stand-in for a Request: dependencies only touch request.app.state
+    app = SimpleNamespace(state=SimpleNamespace())
+    init_services(app)
+    request = SimpleNamespace(app=app)
+
+    cases = [
+        ("ScoringService", ScoringService, get_scoring_service),
+        ("BatchScoringEngine", BatchScoringEngine, get_batch_scoring_engine),
+        ("AIGenerationService", AIGenerationService, get_ai_generation_service),
+        ("YouTubeService", YouTubeService, get_youtube_service),
+        ("TrendAnalysisService", TrendAnalysisService, get_trend_service),
+    ]
+
+    print(f"{'service':<22}{'construct (us)':>16}{'dependency (us)':>18}")
+    for name, construct, dependency in cases:
+        built = timeit.timeit(construct, number=args.iterations) / args.iterations * 1e6
+        shared = timeit.timeit(lambda: dependency(request), number=args.iterations) / args.iterations * 1e6
+        print(f"{name:<22}{built:>16.2f}{shared:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
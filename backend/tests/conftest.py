@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from app.services.singleflight import RELEASE_LOCK_SCRIPT
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the caches use"""
+
+    def __init__(self):
+        self.values = {}
+        # Last expiry (seconds) set per key
+        self.ttls = {}
+        self.fail = False
+        # Seconds each command blocks, to simulate a slow server
+        self.delay = 0.0
+        self.mget_calls = 0
+
+    def _command(self):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("redis down")
+
+    def get(self, key):
+        self._command()
+        return self.values.get(key)
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        self._command()
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        self._command()
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        self.ttls[key] = ex
+        return True
+
+    def delete(self, *keys):
+        self._command()
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    def eval(self, script, numkeys, *args):
+        self._command()
+        assert script == RELEASE_LOCK_SCRIPT
+        key, token = args
+        if self.values.get(key) == token:
+            return self.delete(key)
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value))
+
+    def execute(self):
+        self.redis._command()
+        self.redis.values.update(self.commands)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_provider import AIProviderFactory, AIService, GoogleAIProvider, LocalAIProvider
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.concurrency_limiter import AdaptiveConcurrencyLimiter
+from app.services.token_usage import PromptUsage
+
+
+def test_unavailable_provider_warning_names_the_configured_provider(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "AI_ROUTING_MODELS", [])
+    monkeypatch.setattr(LocalAIProvider, "is_available", lambda self: False)
+    with caplog.at_level(logging.WARNING, logger="app.services.ai_provider"):
+        provider = AIProviderFactory.get_provider("local")
+
+    assert isinstance(provider, LocalAIProvider)
+    assert "AI provider 'local' not available" in caplog.text
+    assert "Google" not in caplog.text
+    assert "GOOGLE_AI_API_KEY" not in caplog.text
+
+
+def test_unconfigured_google_provider_warning_mentions_its_key(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "AI_ROUTING_MODELS", [])
+    monkeypatch.setattr(GoogleAIProvider, "is_available", lambda self: False)
+    with caplog.at_level(logging.WARNING, logger="app.services.ai_provider"):
+        AIProviderFactory.get_provider("google")
+
+    assert "AI provider 'google' not available, set GOOGLE_AI_API_KEY" in caplog.text
+
+
+class SlowProvider:
+    """Provider whose calls never finish in time"""
+
+    model = "slow"
+
+    async def agenerate_text(self, messages, max_tokens, temperature):
+        await asyncio.sleep(5)
+        return "late"
+
+    def prompt_text(self, messages):
+        return ""
+
+    def is_available(self):
+        return True
+
+
+def test_timed_out_call_releases_its_slot_as_an_overload(monkeypatch):
+    monkeypatch.setattr(settings, "AI_ROUTING_MODELS", [])
+    limiter = AdaptiveConcurrencyLimiter("test", initial=2, min_limit=1, max_limit=2, queue_timeout=0.05)
+    breaker = CircuitBreaker("test")
+    service = AIService("local", breaker=breaker, usage=PromptUsage(), limiter=limiter)
+    service.provider = SlowProvider()
+    service.timeout = 0.05
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(service.agenerate_text([{"role": "user", "content": "hi"}]))
+
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["decreases"] == 1
+    assert breaker.stats()["consecutive_failures"] == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.batch_scoring import BatchScoringEngine
+from app.services.scoring import ScoringService
+
+ITEMS = [
+    ("The Shocking Truth About Cats Nobody Tells You", None, None, None),
+    ("Why Dogs Are Secretly Amazing... Watch Now!", ["dogs", "viral"], ["#fyp"], "dogs"),
+    ("How I Got 1M Views In 24 Hours #viral #fyp", ["shorts", "trending", "viral"], ["#trending"], "views"),
+    ("What happens next? Nobody knows...", [], [], "mystery box"),
+    ("Untold hidden secrets revealed and exposed today", None, ["#secret"], "secrets revealed"),
+    ("Learn this now before it's gone", ["tutorial"], None, "learn"),
+    ("Short", None, None, "cats"),
+    ("A" * 120, None, None, None),
+    ("", None, None, None),
+    ("cats cats cats", ["cats"], ["#cats"], "cats"),
+    ("Incredible amazing unbelievable mind-blowing", None, None, None),
+]
+
+
+@pytest.fixture(scope="module")
+def service():
+    return ScoringService()
+
+
+@pytest.fixture(scope="module")
+def engine(service):
+    return BatchScoringEngine(service)
+
+
+@pytest.mark.parametrize("item", ITEMS)
+def test_batch_matches_the_scalar_path(service, engine, item):
+    scores, reasons = engine.score_batch([item])
+    assert (scores.tolist()[0], reasons[0]) == service.calculate_viral_score(*item)
+    assert engine.score_values([item]).tolist()[0] == service.calculate_score(*item)
+
+
+def test_whole_batch_matches_the_scalar_path_in_input_order(service, engine):
+    scores, reasons = engine.score_batch(ITEMS)
+    assert list(zip(scores.tolist(), reasons)) == [service.calculate_viral_score(*item) for item in ITEMS]
+    assert engine.score_values(ITEMS).tolist() == scores.tolist()
@@ -0,0 +1,165 @@
+import json
+
+import pytest
+from sqlalchemy import bindparam, create_engine, event, insert, select, update
+from sqlalchemy.dialects import postgresql
+
+from app.models.video import Video
+from app.services import bulk_rescoring
+from app.services.bulk_rescoring import BulkRescoringJob
+from app.services.scoring import ScoringService
+
+TITLES = [
+    "The Shocking Truth About Cats Nobody Tells You",
+    "Why Dogs Are Secretly Amazing... Watch Now!",
+    "How I Got 1M Views In 24 Hours #viral",
+    "Short",
+    "What happens next? Nobody knows...",
+]
+ROW_COUNT = 23
+CHUNK_SIZE = 5
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'videos.db'}")
+
+    # Let chunks be written while the streaming read is still open, as Postgres does
+    @event.listens_for(db_engine, "connect")
+    def use_wal(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    Video.__table__.create(db_engine)
+    with db_engine.begin() as connection:
+        connection.execute(insert(Video.__table__), [
+            {
+                "id": f"id{i:03d}", "video_id": f"v{i}", "title": TITLES[i % len(TITLES)], "channel_id": "c",
+                "tags": ["viral", "shorts"] if i % 2 else [], "hashtags": ["#fyp"] if i % 3 else None,
+                "topic": "cats" if i % 4 else None, "viral_score": -1.0
+            }
+            for i in range(ROW_COUNT)
+        ])
+    return db_engine
+
+
+@pytest.fixture(autouse=True)
+def sqlite_writes(monkeypatch):
+    # SQLite cannot name the columns of a VALUES list, so write the same scores row by row
+    def write_scores(job, scores):
+        statement = update(job.table).where(job.table.c.id == bindparam("row_id")).values(viral_score=bindparam("score"))
+        with job.db_engine.begin() as connection:
+            connection.execute(statement, [{"row_id": video_id, "score": score} for video_id, score in scores])
+
+    monkeypatch.setattr(BulkRescoringJob, "_write_scores", write_scores)
+
+
+@pytest.fixture
+def make_job(db_engine, tmp_path):
+    def make() -> BulkRescoringJob:
+        return BulkRescoringJob(
+            chunk_size=CHUNK_SIZE, workers=2, checkpoint_path=str(tmp_path / "checkpoint.json"), db_engine=db_engine
+        )
+
+    return make
+
+
+def stored_scores(db_engine):
+    table = Video.__table__
+    with db_engine.connect() as connection:
+        return dict(connection.execute(select(table.c.id, table.c.viral_score).order_by(table.c.id)).all())
+
+
+def expected_scores(db_engine):
+    service = ScoringService()
+    table = Video.__table__
+    query = select(table.c.id, table.c.title, table.c.tags, table.c.hashtags, table.c.topic).order_by(table.c.id)
+    with db_engine.connect() as connection:
+        return {
+            video_id: round(service.calculate_score(title, tags, hashtags, topic), 3)
+            for video_id, title, tags, hashtags, topic in connection.execute(query)
+        }
+
+
+def test_run_rescores_every_row(make_job, db_engine):
+    job = make_job()
+    assert job.run() == ROW_COUNT
+    assert stored_scores(db_engine) == expected_scores(db_engine)
+    assert json.loads(job.checkpoint_path.read_text())["last_id"] == f"id{ROW_COUNT - 1:03d}"
+
+
+def test_chunks_stream_in_id_order_through_a_server_side_cursor(make_job, db_engine):
+    options = []
+
+    @event.listens_for(db_engine, "before_execute")
+    def record_options(connection, clauseelement, multiparams, params, execution_options):
+        options.append(connection.get_execution_options())
+
+    chunks = list(make_job()._iter_chunks(None))
+
+    assert [len(chunk) for chunk in chunks] == [5, 5, 5, 5, 3]
+    assert [row[0] for chunk in chunks for row in chunk] == [f"id{i:03d}" for i in range(ROW_COUNT)]
+    assert options[-1]["stream_results"] and options[-1]["yield_per"] == CHUNK_SIZE
+
+    resumed = list(make_job()._iter_chunks("id017"))
+    assert [[row[0] for row in chunk] for chunk in resumed] == [[f"id{i:03d}" for i in range(18, ROW_COUNT)]]
+
+
+def test_interrupted_run_resumes_after_the_last_committed_chunk(make_job, db_engine, monkeypatch):
+    written = []
+    write_scores = BulkRescoringJob._write_scores
+
+    def fail_on_third_chunk(job, scores):
+        if len(written) == 2:
+            raise RuntimeError("connection lost")
+        written.append([video_id for video_id, _ in scores])
+        write_scores(job, scores)
+
+    monkeypatch.setattr(BulkRescoringJob, "_write_scores", fail_on_third_chunk)
+    with pytest.raises(RuntimeError):
+        make_job().run()
+    monkeypatch.setattr(BulkRescoringJob, "_write_scores", write_scores)
+
+    job = make_job()
+    assert job._load_checkpoint()["last_id"] == "id009"
+    partial = stored_scores(db_engine)
+    assert [video_id for video_id, score in partial.items() if score != -1.0] == written[0] + written[1]
+
+    # Only rows after the checkpoint are rescored on the next run
+    assert job.run() == ROW_COUNT - 2 * CHUNK_SIZE
+    assert stored_scores(db_engine) == expected_scores(db_engine)
+
+
+def test_chunk_is_written_with_one_update_from_values(make_job):
+    statement = make_job()._update_statement([("id000", 0.5), ("id001", 0.25)])
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE videos SET viral_score=new_scores.score")
+    assert "FROM (VALUES (%(param_1)s, %(param_2)s), (%(param_3)s, %(param_4)s)) AS new_scores (id, score)" in sql
+    assert "WHERE videos.id = new_scores.id" in sql
+
+
+def test_restart_ignores_the_checkpoint(make_job, db_engine):
+    job = make_job()
+    job._save_checkpoint("id020")
+    assert job.run() == 2
+    assert job.run(restart=True) == ROW_COUNT
+
+    job.clear_checkpoint()
+    assert not job.checkpoint_path.exists()
+    assert job._load_checkpoint() == {}
+
+
+def test_unreadable_checkpoint_starts_from_the_first_row(make_job, caplog):
+    job = make_job()
+    job.checkpoint_path.write_text("{not json")
+    assert job._load_checkpoint() == {}
+    assert "unreadable rescoring checkpoint" in caplog.text
+
+
+def test_worker_scores_match_the_scoring_service():
+    bulk_rescoring._init_worker()
+    rows = [(f"id{i}", title, ["viral"], ["#fyp"], "cats") for i, title in enumerate(TITLES)]
+    service = ScoringService()
+    assert bulk_rescoring._score_rows(rows) == [
+        (video_id, round(service.calculate_score(title, tags, hashtags, topic), 3))
+        for video_id, title, tags, hashtags, topic in rows
+    ]
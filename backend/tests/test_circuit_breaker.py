@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from app.services import circuit_breaker as breaker_module
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(breaker_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker("test", failure_threshold=3, reset_seconds=10, half_open_probes=2)
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_refuses_calls(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    stats = breaker.stats()
+    assert stats["rejected"] == 2
+    assert stats["retry_in_seconds"] == 10.0
+
+
+def test_half_open_admits_a_bounded_number_of_probes(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock[0] += 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 2
+    # The reset window starts over from the failed probe
+    clock[0] += 5
+    assert not breaker.allow()
+
+
+def test_release_gives_back_a_probe(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock[0] += 10
+    assert breaker.allow()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+
+def test_release_is_a_no_op_while_closed(clock):
+    breaker = make_breaker()
+    breaker.release()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_real_clock_reset():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=0.05, half_open_probes=1)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.concurrency_limiter import AdaptiveConcurrencyLimiter, ConcurrencyLimitError, is_overload
+
+
+class Upstream429(Exception):
+    code = 429
+
+
+def make_limiter(**kwargs) -> AdaptiveConcurrencyLimiter:
+    options = dict(initial=4, min_limit=1, max_limit=8, backoff=0.5, healthy_latency_ms=100,
+                   queue_timeout=0.2, max_queue=10)
+    options.update(kwargs)
+    return AdaptiveConcurrencyLimiter("test", **options)
+
+
+def test_is_overload():
+    assert is_overload(TimeoutError())
+    assert is_overload(Upstream429())
+    assert not is_overload(ValueError())
+
+
+def test_overload_cuts_the_limit_once_per_burst():
+    limiter = make_limiter()
+    slots = [limiter.acquire_sync() for _ in range(4)]
+    for slot in slots:
+        limiter.release(slot, overload=True)
+    # Every call of the burst started before the first cut
+    assert limiter.slots == 2
+    assert limiter.stats()["decreases"] == 1
+
+
+def test_limit_never_drops_below_the_minimum():
+    limiter = make_limiter(initial=1)
+    for _ in range(3):
+        limiter.release(limiter.acquire_sync(), overload=True)
+    assert limiter.slots == 1
+
+
+def test_fast_successes_grow_the_limit_only_while_saturated():
+    limiter = make_limiter(initial=2)
+    # Unsaturated: one call in flight under a limit of two
+    for _ in range(10):
+        limiter.release(limiter.acquire_sync(), latency=0.01)
+    assert limiter.limit == 2
+
+    for _ in range(10):
+        slots = [limiter.acquire_sync() for _ in range(limiter.slots)]
+        for slot in slots:
+            limiter.release(slot, latency=0.01)
+    assert limiter.slots > 2
+
+
+def test_slow_successes_do_not_grow_the_limit():
+    limiter = make_limiter(initial=2)
+    slots = [limiter.acquire_sync() for _ in range(2)]
+    for slot in slots:
+        limiter.release(slot, latency=1.0)
+    assert limiter.limit == 2
+
+
+def test_waiters_are_served_in_order_and_time_out():
+    limiter = make_limiter(initial=1, queue_timeout=0.5)
+
+    async def run():
+        held = await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            await limiter.acquire()
+            order.append(name)
+
+        waiters = [asyncio.ensure_future(wait(name)) for name in ("first", "second")]
+        await asyncio.sleep(0.01)
+        limiter.release(held)
+        await asyncio.sleep(0.01)
+        assert order == ["first"]
+        with pytest.raises(ConcurrencyLimitError):
+            await waiters[1]
+        return order
+
+    assert asyncio.run(run()) == ["first"]
+    assert limiter.stats()["queue_timeouts"] == 1
+
+
+def test_full_queue_rejects_at_once():
+    limiter = make_limiter(initial=1, max_queue=1, queue_timeout=1)
+    limiter.acquire_sync()
+    waiter = threading.Thread(target=lambda: pytest.raises(ConcurrencyLimitError, limiter.acquire_sync))
+    waiter.start()
+    while not limiter.stats()["queue_depth"]:
+        time.sleep(0.001)
+    with pytest.raises(ConcurrencyLimitError):
+        limiter.acquire_sync()
+    assert limiter.stats()["rejected"] == 1
+    waiter.join()
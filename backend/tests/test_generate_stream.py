@@ -0,0 +1,50 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import generate
+from app.core.dependencies import get_ai_generation_service
+
+
+class FakeGenerationService:
+    def __init__(self, titles, error=None):
+        self.titles = titles
+        self.error = error
+
+    async def astream_viral_titles(self, topic, count, style):
+        for title in self.titles:
+            yield title
+        if self.error is not None:
+            raise self.error
+
+
+def stream_events(service):
+    app = FastAPI()
+    app.include_router(generate.router)
+    app.dependency_overrides[get_ai_generation_service] = lambda: service
+    with TestClient(app) as client:
+        response = client.post("/generate/titles/stream", json={"topic": "cats", "count": 2})
+    assert response.status_code == 200
+    events = []
+    for frame in response.text.strip().split("\n\n"):
+        event, data = frame.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+TITLES = [{"title": "Cats 1", "viral_score": 0.2}, {"title": "Cats 2", "viral_score": 0.6}]
+
+
+def test_stream_ends_with_summary_and_done():
+    events = stream_events(FakeGenerationService(TITLES))
+    assert [event for event, _ in events] == ["title", "title", "summary", "done"]
+    assert [title["title"] for title in events[2][1]["titles"]] == ["Cats 2", "Cats 1"]
+    assert events[-1][1] == {"status": "complete"}
+
+
+def test_failure_midway_sends_error_then_done():
+    events = stream_events(FakeGenerationService(TITLES[:1], error=RuntimeError("provider down")))
+    assert [event for event, _ in events] == ["title", "error", "done"]
+    assert events[1][1] == {"detail": "provider down", "titles_sent": 1}
+    assert events[-1][1] == {"status": "error"}
@@ -0,0 +1,172 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services import generation_cache as cache_module
+from app.services.ai_generation import AIGenerationService
+from app.services.generation_cache import GenerationCache, normalize_prompt_text
+from app.services.singleflight import SingleFlight
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def make_cache(**kwargs) -> GenerationCache:
+    options = dict(max_size=10, ttl=60, stale_ttl=30)
+    options.update(kwargs)
+    return GenerationCache(**options)
+
+
+def test_normalize_prompt_text():
+    assert normalize_prompt_text("  Cats   and\tDogs ") == "cats and dogs"
+    assert normalize_prompt_text(None) == ""
+
+
+def test_keys_ignore_topic_case_and_spacing():
+    cache = make_cache()
+    assert cache.make_key("titles", "Cats ", count=5) == cache.make_key("titles", "cats", count=5)
+    assert cache.make_key("titles", "cats", count=5) != cache.make_key("titles", "cats", count=6)
+    assert cache.make_key("titles", "cats") != cache.make_key("hashtags", "cats")
+
+
+def test_fresh_then_stale_then_expired(clock):
+    cache = make_cache()
+    key = cache.make_key("titles", "cats")
+    cache.set(key, "raw")
+
+    assert cache.get(key) == ("raw", False)
+    assert cache.is_fresh(key)
+    clock[0] += 60
+    assert cache.get(key) == ("raw", True)
+    assert not cache.is_fresh(key)
+    clock[0] += 30
+    assert cache.get(key) is None
+
+    stats = cache.stats()
+    assert (stats["fresh_hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["size"] == 0
+
+
+def test_local_tier_evicts_least_recently_used(clock):
+    cache = make_cache(max_size=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == ("1", False)
+    assert cache.get("c") == ("3", False)
+
+
+def test_redis_tier_is_shared_between_workers(clock, fake_redis):
+    writer = make_cache(redis_client=fake_redis)
+    reader = make_cache(redis_client=fake_redis)
+    key = writer.make_key("titles", "cats")
+    writer.set(key, "raw")
+
+    assert reader.is_fresh(key)
+    assert reader.get(key) == ("raw", False)
+    # Promoted into the reader's local tier
+    fake_redis.fail = True
+    assert reader.get(key) == ("raw", False)
+
+
+def test_redis_errors_are_misses(clock, fake_redis):
+    cache = make_cache(redis_client=fake_redis)
+    fake_redis.fail = True
+    cache.set("a", "1")
+    cache.clear()
+    assert cache.get("a") is None
+    assert not cache.is_fresh("a")
+
+
+@pytest.mark.parametrize("raw", ["not json", json.dumps(["list"]), json.dumps({"text": 1, "created_at": 1})])
+def test_unreadable_redis_entries_are_misses(clock, fake_redis, raw):
+    cache = make_cache(redis_client=fake_redis)
+    fake_redis.values["a"] = raw
+    assert cache.get("a") is None
+    assert not cache.is_fresh("a")
+    assert cache.stats()["misses"] == 1
+
+
+def test_only_one_caller_claims_a_refresh():
+    cache = make_cache()
+    assert cache.claim_refresh("a")
+    assert not cache.claim_refresh("a")
+    cache.release_refresh("a")
+    assert cache.claim_refresh("a")
+    assert cache.stats()["refreshes"] == 2
+
+
+def test_refresh_claims_span_workers(fake_redis):
+    first = make_cache(redis_client=fake_redis)
+    second = make_cache(redis_client=fake_redis)
+    assert first.claim_refresh("a")
+    assert not second.claim_refresh("a")
+    assert second.stats()["refreshing"] == 0
+    first.release_refresh("a")
+    assert second.claim_refresh("a")
+
+
+def test_async_counterparts_match_sync_behaviour(clock, fake_redis):
+    writer = make_cache(redis_client=fake_redis)
+    reader = make_cache(redis_client=fake_redis)
+
+    async def run():
+        await writer.aset("a", "1")
+        assert await reader.ais_fresh("a")
+        assert await reader.aget("a") == ("1", False)
+        assert await reader.aget("b") is None
+
+        assert await writer.aclaim_refresh("a")
+        assert not await reader.aclaim_refresh("a")
+        await writer.arelease_refresh("a")
+        assert await reader.aclaim_refresh("a")
+
+    asyncio.run(run())
+    assert reader.stats()["fresh_hits"] == 1
+    assert reader.stats()["misses"] == 1
+
+
+def test_slow_redis_does_not_stall_generation(monkeypatch, fake_redis):
+    monkeypatch.setattr(settings, "AI_PROVIDER", "local")
+    monkeypatch.setattr(settings, "AI_ROUTING_MODELS", [])
+    monkeypatch.setattr(settings, "LOCAL_AI_LATENCY_MS", 1)
+    monkeypatch.setattr(settings, "LOCAL_AI_ERROR_RATE", 0.0)
+    fake_redis.delay = 0.1
+    service = AIGenerationService(cache=make_cache(redis_client=fake_redis), flights=SingleFlight())
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        titles = await service.agenerate_viral_titles("cats", count=3)
+        ticking.cancel()
+        return titles, ticks
+
+    titles, ticks = asyncio.run(run())
+    assert len(titles) == 3
+    # A cache read and a cache write of 0.1s each ran meanwhile
+    assert ticks >= 10
+
+
+def test_refresh_release_leaves_a_lock_taken_over_by_another_worker(fake_redis):
+    cache = make_cache(redis_client=fake_redis)
+    assert cache.claim_refresh("a")
+    # The lock expired mid-refresh and another worker took it
+    fake_redis.values["a:refresh"] = "other-token"
+    cache.release_refresh("a")
+    assert fake_redis.values["a:refresh"] == "other-token"
+    assert cache.stats()["refreshing"] == 0
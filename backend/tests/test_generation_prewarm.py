@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_generation import AIGenerationService
+from app.services.generation_cache import GenerationCache
+from app.services.generation_prewarm import GenerationPrewarmer
+from app.services.singleflight import SingleFlight
+
+TOPICS = ["cats", "dogs", "birds"]
+
+
+@pytest.fixture
+def make_prewarmer(monkeypatch, fake_redis):
+    monkeypatch.setattr(settings, "AI_PROVIDER", "local")
+    monkeypatch.setattr(settings, "AI_ROUTING_MODELS", [])
+    monkeypatch.setattr(settings, "LOCAL_AI_LATENCY_MS", 1)
+    monkeypatch.setattr(settings, "LOCAL_AI_ERROR_RATE", 0.0)
+
+    def make(**kwargs) -> GenerationPrewarmer:
+        service = AIGenerationService(cache=GenerationCache(redis_client=fake_redis), flights=SingleFlight())
+        prewarmer = GenerationPrewarmer(service, trend_service=None, **kwargs)
+
+        async def select_topics():
+            return TOPICS
+
+        prewarmer.select_topics = select_topics
+        return prewarmer
+
+    return make
+
+
+def test_plan_checks_freshness_in_one_lookup(make_prewarmer, fake_redis):
+    prewarmer = make_prewarmer(llm_budget=100)
+    service = prewarmer.ai_generation_service
+    service.cache.set(service.analysis_cache_key("dogs"), "{}")
+    fresh_key, _ = service.prewarm_targets("cats")[0]
+    service.cache.set(fresh_key, "cached")
+    service.cache.clear()
+
+    jobs = asyncio.run(prewarmer._plan(TOPICS))
+
+    assert fake_redis.mget_calls == 1
+    assert prewarmer.already_fresh == 2
+    per_topic = len(service.prewarm_targets("cats"))
+    # One batch analysis of the two stale topics, then every stale generation entry
+    assert len(jobs) == 1 + per_topic * len(TOPICS) - 1
+
+
+def test_only_one_worker_runs_per_interval(make_prewarmer):
+    first, second = make_prewarmer(llm_budget=0), make_prewarmer(llm_budget=0)
+    asyncio.run(first.run_once())
+    asyncio.run(second.run_once())
+    assert (first.runs, first.skipped_runs) == (1, 0)
+    assert (second.runs, second.skipped_runs) == (0, 1)
+
+
+def test_slow_redis_does_not_stall_the_event_loop(make_prewarmer, fake_redis):
+    prewarmer = make_prewarmer(llm_budget=0)
+    fake_redis.delay = 0.1
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        await prewarmer.run_once()
+        ticking.cancel()
+        return ticks
+
+    # The run lock and the freshness MGET took 0.1s each
+    assert asyncio.run(run()) >= 10
+    assert prewarmer.runs == 1
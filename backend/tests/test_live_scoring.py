@@ -0,0 +1,110 @@
+from collections import Counter
+
+import pytest
+
+from app.services.live_scoring import LiveScoringSession
+from app.services.scoring import ScoringService
+
+TITLE = "Why This Viral Video Is Shocking"
+
+
+class CountingScoringService(ScoringService):
+    """Counts the scans and scoring passes a session asks for"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = Counter()
+
+    def scan_title(self, title):
+        self.calls["scan_title"] += 1
+        return super().scan_title(title)
+
+    def scan_tag_words(self, tags=None, hashtags=None):
+        self.calls["scan_tag_words"] += 1
+        return super().scan_tag_words(tags, hashtags)
+
+    def topic_overlap(self, title_lower, topic=None):
+        self.calls["topic_overlap"] += 1
+        return super().topic_overlap(title_lower, topic)
+
+    def score_features(self, features):
+        self.calls["score_features"] += 1
+        return super().score_features(features)
+
+
+@pytest.fixture
+def session():
+    session = LiveScoringSession(CountingScoringService())
+    session.update({"title": TITLE, "tags": ["cats"], "topic": "viral video"})
+    session.result()
+    session.scoring_service.calls.clear()
+    return session
+
+
+def expected_result(session):
+    service = ScoringService()
+    score, reasons = service.calculate_viral_score(session.title, session.tags, session.hashtags, session.topic)
+    features = service.extract_features(session.title, session.tags, session.hashtags, session.topic)
+    return {
+        "viral_score": round(score, 3),
+        "reasons": reasons,
+        "suggestions": service.get_feature_suggestions(features, score)
+    }
+
+
+def test_tag_edit_rescans_only_the_tags(session):
+    before = session.result()
+    # Enough trending words across title and tags to change the trending score
+    session.update({"tags": ["shorts", "fyp"]})
+    after = session.result()
+
+    assert session.scoring_service.calls == {"scan_tag_words": 1, "score_features": 1}
+    assert after == expected_result(session)
+    assert after["viral_score"] > before["viral_score"]
+
+
+def test_hashtag_edit_rescans_only_the_tags(session):
+    session.update({"hashtags": ["#tiktok"]})
+    assert session.result() == expected_result(session)
+    assert session.scoring_service.calls == {"scan_tag_words": 1, "score_features": 1}
+
+
+def test_tag_edit_that_leaves_the_features_unchanged_reuses_the_result(session):
+    before = session.result()
+    session.update({"tags": ["dogs", "birds"]})
+    assert session.result() is before
+    assert session.scoring_service.calls == {"scan_tag_words": 1}
+
+
+def test_topic_edit_recomputes_only_the_overlap(session):
+    session.update({"topic": "cats"})
+    assert session.result() == expected_result(session)
+    assert session.scoring_service.calls == {"topic_overlap": 1, "score_features": 1}
+
+
+def test_title_edit_keeps_the_tag_scan(session):
+    session.update({"title": TITLE + " Now"})
+    assert session.result() == expected_result(session)
+    assert session.scoring_service.calls == {"scan_title": 1, "topic_overlap": 1, "score_features": 1}
+
+
+def test_unchanged_fields_invalidate_nothing(session):
+    before = session.result()
+    session.update({"title": TITLE, "tags": ["cats"], "hashtags": None, "topic": "viral video"})
+    assert session.result() is before
+    assert not session.scoring_service.calls
+
+
+def test_edit_sequence_matches_scoring_from_scratch(session):
+    edits = [
+        {"title": "How I Got 1M Views"},
+        {"tags": ["viral", "trending"]},
+        {"hashtags": ["#fyp"]},
+        {"topic": "views"},
+        {"tags": []},
+        {"title": "How I Got 1M Views... Secret Revealed?", "topic": None},
+        {"hashtags": None, "tags": ["youtube"]},
+    ]
+    for edit in edits:
+        session.update(edit)
+        assert session.result() == expected_result(session)
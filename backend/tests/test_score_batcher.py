@@ -0,0 +1,71 @@
+import asyncio
+
+from app.services.batch_scoring import BatchScoringEngine
+from app.services.score_batcher import ScoreMicroBatcher
+from app.services.score_cache import ScoreCache
+from app.services.scoring import ScoringService
+
+ITEMS = [
+    ("The Shocking Truth About Cats", ["viral"], ["#fyp"], "cats"),
+    ("How To Cook Pasta In 60 Seconds", [], [], None),
+    ("The Shocking Truth About Cats", ["viral"], ["#fyp"], "cats"),
+    ("Why Everyone Is Talking About This Now...", None, None, "trends"),
+]
+
+
+def make_batcher(redis_client=None, **kwargs) -> ScoreMicroBatcher:
+    cache = ScoreCache(version="test", redis_client=redis_client)
+    return ScoreMicroBatcher(BatchScoringEngine(), cache=cache, **kwargs)
+
+
+def test_concurrent_requests_share_one_batch_and_match_direct_scoring():
+    batcher = make_batcher(max_batch_size=64, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(batcher.score(*item) for item in ITEMS))
+
+    entries = asyncio.run(run())
+    scoring = ScoringService()
+    for item, entry in zip(ITEMS, entries):
+        score, reasons = scoring.calculate_viral_score(*item)
+        assert entry["score"] == score
+        assert entry["reasons"] == reasons
+        assert entry["suggestions"] == scoring.get_improvement_suggestions(item[0], score)
+
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 1
+    assert stats["batch_size"]["sum"] == len(ITEMS)
+
+
+def test_full_batch_flushes_without_waiting_for_the_timer():
+    batcher = make_batcher(max_batch_size=2, max_wait_ms=10000)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.score(*item) for item in ITEMS)), 5)
+
+    assert len(asyncio.run(run())) == len(ITEMS)
+    assert batcher.stats()["batch_size"]["count"] == 2
+
+
+def test_slow_redis_does_not_stall_the_event_loop(fake_redis):
+    fake_redis.delay = 0.2
+    batcher = make_batcher(redis_client=fake_redis, max_batch_size=64, max_wait_ms=1)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        entries = await asyncio.gather(*(batcher.score(*item) for item in ITEMS))
+        ticking.cancel()
+        return entries, ticks
+
+    entries, ticks = asyncio.run(run())
+    assert len(entries) == len(ITEMS)
+    # A MGET and a write pipeline of 0.2s each ran meanwhile
+    assert ticks >= 20
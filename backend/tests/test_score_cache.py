@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+from app.services.score_cache import ScoreCache
+
+
+ENTRY = {"score": 0.5, "reasons": ["Good title length"]}
+
+
+def test_make_key_depends_on_content_and_version():
+    cache = ScoreCache(version="1.a")
+    assert cache.make_key("Title", [], None, "") == cache.make_key("Title", None, [], None)
+    assert cache.make_key("Title") != cache.make_key("Title", ["tag"])
+    assert cache.make_key("Title") != ScoreCache(version="2.a").make_key("Title")
+
+
+def test_local_tier_is_lru_bounded():
+    cache = ScoreCache(max_size=2, version="v")
+    cache.set("a", ENTRY)
+    cache.set("b", ENTRY)
+    cache.get("a")
+    cache.set("c", ENTRY)
+    assert cache.get_many(["a", "b", "c"]) == [ENTRY, None, ENTRY]
+
+
+def test_redis_tier_is_shared_and_read_in_one_mget(fake_redis):
+    redis = fake_redis
+    ScoreCache(version="v", redis_client=redis).set_many({"a": ENTRY, "b": ENTRY})
+
+    other_worker = ScoreCache(version="v", redis_client=redis)
+    assert other_worker.get_many(["a", "b", "missing"]) == [ENTRY, ENTRY, None]
+    assert redis.mget_calls == 1
+    assert other_worker.stats()["redis_hits"] == 2
+    assert other_worker.stats()["misses"] == 1
+    # Now served from the local tier
+    assert other_worker.get("a") == ENTRY
+    assert redis.mget_calls == 1
+
+
+def test_unreadable_redis_values_are_misses(fake_redis):
+    redis = fake_redis
+    redis.values = {"corrupt": b"{not json", "foreign": json.dumps([1, 2]), "binary": b"\xff\xfe", "ok": json.dumps(ENTRY)}
+    cache = ScoreCache(version="v", redis_client=redis)
+    assert cache.get_many(["corrupt", "foreign", "binary", "ok"]) == [None, None, None, ENTRY]
+    assert cache.stats()["misses"] == 3
+
+
+def test_redis_errors_are_misses(fake_redis):
+    fake_redis.fail = True
+    cache = ScoreCache(version="v", redis_client=fake_redis)
+    cache.set("a", ENTRY)
+    cache.clear()
+    assert cache.get_many(["a", "b"]) == [None, None]
+    assert cache.stats()["misses"] == 2
+
+
+def test_async_counterparts_match_sync_behaviour(fake_redis):
+    redis = fake_redis
+    redis.values = {"corrupt": b"{"}
+
+    async def run():
+        writer = ScoreCache(version="v", redis_client=redis)
+        await writer.aset_many({"a": ENTRY})
+        reader = ScoreCache(version="v", redis_client=redis)
+        return await reader.aget_many(["a", "corrupt", "missing"])
+
+    assert asyncio.run(run()) == [ENTRY, None, None]
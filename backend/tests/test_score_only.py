@@ -0,0 +1,92 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import score
+from app.core.dependencies import get_batch_scoring_engine, get_score_batcher, get_scoring_service
+from app.services.batch_scoring import BatchScoringEngine
+from app.services.score_percentiles import PercentileIndex, ScorePercentiles
+from app.services.scoring import ScoringService
+
+REQUESTS = [
+    {"title": "The Shocking Truth About Cats Nobody Tells You", "tags": ["viral"], "topic": "cats"},
+    {"title": "Short"},
+    {"title": "Why Dogs Are Secretly Amazing... Watch Now!", "hashtags": ["#fyp", "#trending"]},
+    {"title": "Tiny"},
+    {"title": "How I Got 1M Views In 24 Hours", "tags": ["shorts"], "topic": "views"},
+]
+
+
+def explained_score(request):
+    score, _ = ScoringService().calculate_viral_score(
+        request["title"], request.get("tags"), request.get("hashtags"), request.get("topic")
+    )
+    return round(score, 3)
+
+
+# Computed up front: the score-only tests forbid building explanations
+EXPECTED = {request["title"]: explained_score(request) for request in REQUESTS}
+
+
+@pytest.fixture
+def percentiles(monkeypatch):
+    served = ScorePercentiles()
+    monkeypatch.setattr(score, "score_percentiles", served)
+    return served
+
+
+@pytest.fixture
+def client(percentiles):
+    app = FastAPI()
+    app.include_router(score.router)
+    service = ScoringService()
+    engine = BatchScoringEngine(service)
+    app.dependency_overrides[get_scoring_service] = lambda: service
+    app.dependency_overrides[get_batch_scoring_engine] = lambda: engine
+    # Score-only requests never reach the micro-batcher
+    app.dependency_overrides[get_score_batcher] = lambda: None
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def no_reasons(monkeypatch):
+    """Fail any attempt to build reasons or suggestions"""
+    def forbidden(*args, **kwargs):
+        raise AssertionError("score-only path built an explanation")
+
+    for name in ("score_features", "get_improvement_suggestions", "get_feature_suggestions"):
+        monkeypatch.setattr(ScoringService, name, forbidden)
+    monkeypatch.setattr(BatchScoringEngine, "explain_matrix", forbidden)
+
+
+@pytest.mark.parametrize("request_body", REQUESTS)
+def test_single_score_returns_only_the_score(client, no_reasons, request_body):
+    response = client.post("/score/", params={"explain": "false"}, json=request_body)
+    assert response.status_code == 200
+    assert response.json() == {"viral_score": EXPECTED[request_body["title"]]}
+
+
+def test_single_score_includes_the_percentile_once_a_snapshot_is_loaded(client, no_reasons, percentiles):
+    percentiles.index = PercentileIndex.from_scores([0.0, 0.2, 0.4, 0.6, 0.8])
+    response = client.post("/score/", params={"explain": "false"}, json=REQUESTS[0])
+    viral_score = EXPECTED[REQUESTS[0]["title"]]
+    assert response.json() == {"viral_score": viral_score, "percentile": percentiles.index.percentile(viral_score)}
+
+
+def test_batch_returns_scores_best_first_without_reasons(client, no_reasons):
+    response = client.post("/score/batch", params={"explain": "false"}, json=REQUESTS)
+    assert response.status_code == 200
+
+    expected = sorted(
+        ({"title": request["title"], "viral_score": EXPECTED[request["title"]]} for request in REQUESTS),
+        key=lambda result: -result["viral_score"]
+    )
+    assert response.json() == {"results": expected, "total": len(REQUESTS)}
+
+
+def test_score_only_matches_the_explained_score():
+    service = ScoringService()
+    for request in REQUESTS:
+        args = (request["title"], request.get("tags"), request.get("hashtags"), request.get("topic"))
+        assert service.calculate_score(*args) == service.calculate_viral_score(*args)[0]
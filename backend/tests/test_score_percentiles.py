@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete, insert, update
+
+from app.api.v1 import score
+from app.models.video import Video
+from app.services.batch_scoring import BatchScoringEngine
+from app.services import score_percentiles as percentiles_module
+from app.services.score_percentiles import PercentileIndex, PercentileRefreshJob, ScorePercentiles
+
+START = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'videos.db'}")
+    Video.__table__.create(db_engine)
+    return db_engine
+
+
+def add_videos(db_engine, scores, start=0, created=True):
+    with db_engine.begin() as connection:
+        connection.execute(insert(Video.__table__), [
+            {
+                "id": f"id{start + i}", "video_id": f"v{start + i}", "title": "t", "channel_id": "c",
+                "viral_score": score,
+                "created_at": START + timedelta(minutes=start + i) if created else None,
+                "updated_at": START + timedelta(minutes=start + i)
+            }
+            for i, score in enumerate(scores)
+        ])
+
+
+def stored_scores(db_engine):
+    with db_engine.connect() as connection:
+        return sorted(row[0] for row in connection.execute(Video.__table__.select().with_only_columns(Video.viral_score)))
+
+
+def test_percentile_ranks():
+    index = PercentileIndex.from_scores([0.1, 0.2, 0.3, 0.4])
+    assert index.percentile(0.3) == 50.0
+    assert index.percentiles([0.0, 0.25, 1.0]) == [0.0, 50.0, 100.0]
+    assert PercentileIndex().percentile(0.5) is None
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = PercentileIndex.from_scores([0.3, 0.1, 0.2], created_through="2025-01-01T00:00:00",
+                                        full_built_at=1.0, scoring_version="v1")
+    index.save(tmp_path / "p.bin")
+    loaded = PercentileIndex.load(tmp_path / "p.bin")
+    assert list(loaded.values) == [0.1, 0.2, 0.3]
+    assert (loaded.created_through, loaded.full_built_at, loaded.scoring_version) == ("2025-01-01T00:00:00", 1.0, "v1")
+
+
+def test_incremental_refresh_merges_new_rows(db_engine, tmp_path):
+    job = PercentileRefreshJob(snapshot_path=str(tmp_path / "p.bin"), db_engine=db_engine)
+    add_videos(db_engine, [0.5, 0.1, 0.9])
+    first = job.run()
+    add_videos(db_engine, [0.3, 0.7], start=3)
+    second = job.run()
+
+    assert list(second.values) == stored_scores(db_engine)
+    # Extended, not rebuilt
+    assert second.full_built_at == first.full_built_at
+
+
+@pytest.mark.parametrize("change", ["delete", "null_created_at", "update"])
+def test_refresh_rebuilds_when_covered_rows_change(db_engine, tmp_path, change):
+    job = PercentileRefreshJob(snapshot_path=str(tmp_path / "p.bin"), db_engine=db_engine)
+    add_videos(db_engine, [0.5, 0.1, 0.9])
+    first = job.run()
+
+    with db_engine.begin() as connection:
+        if change == "delete":
+            connection.execute(delete(Video.__table__).where(Video.video_id == "v0"))
+        elif change == "update":
+            connection.execute(update(Video.__table__).where(Video.video_id == "v1").values(
+                viral_score=0.8, updated_at=START + timedelta(days=1)
+            ))
+    if change == "null_created_at":
+        add_videos(db_engine, [0.4], start=10, created=False)
+
+    second = job.run()
+    assert list(second.values) == stored_scores(db_engine)
+    assert second.full_built_at != first.full_built_at
+
+
+def test_refresh_rebuilds_on_scoring_version_change(db_engine, tmp_path, monkeypatch):
+    job = PercentileRefreshJob(snapshot_path=str(tmp_path / "p.bin"), db_engine=db_engine)
+    add_videos(db_engine, [0.5, 0.1])
+    first = job.run()
+
+    monkeypatch.setattr(percentiles_module.lexicon_matcher, "version", "changed")
+    second = job.run()
+    assert second.scoring_version == "changed"
+    assert second.full_built_at != first.full_built_at
+
+
+def test_refresh_rebuilds_periodically(db_engine, tmp_path, monkeypatch):
+    job = PercentileRefreshJob(snapshot_path=str(tmp_path / "p.bin"), db_engine=db_engine)
+    add_videos(db_engine, [0.5, 0.1])
+    first = job.run()
+
+    monkeypatch.setattr(percentiles_module.settings, "SCORE_PERCENTILE_FULL_REBUILD_HOURS", 0)
+    assert job.run().full_built_at != first.full_built_at
+
+
+def test_workers_ignore_snapshots_of_another_scoring_version(tmp_path):
+    path = tmp_path / "p.bin"
+    PercentileIndex.from_scores([0.1, 0.2], scoring_version="other").save(path)
+    served = ScorePercentiles(snapshot_path=str(path))
+    assert not served.reload_if_changed()
+    assert served.percentile(0.15) is None
+
+    PercentileIndex.from_scores([0.1, 0.2], scoring_version=percentiles_module.lexicon_matcher.version).save(path)
+    # A rewrite is picked up even within the same mtime tick
+    served._snapshot_mtime = None
+    assert served.reload_if_changed()
+    assert served.percentile(0.15) == 50.0
+
+
+def test_reload_mid_batch_does_not_mix_snapshots(monkeypatch):
+    served = ScorePercentiles()
+    served.index = PercentileIndex.from_scores([-1.0])
+    monkeypatch.setattr(score, "score_percentiles", served)
+
+    class ReloadingEngine(BatchScoringEngine):
+        def score_values(self, items):
+            # A snapshot reload lands while the batch is being scored
+            served.index = PercentileIndex.from_scores([1e9])
+            return super().score_values(items)
+
+    titles = [score.ScoreRequest(title=title) for title in ("Cats", "Why Dogs Are Amazing", "How I Got 1M Views")]
+    response = asyncio.run(score.score_multiple_titles(titles, explain=False, batch_engine=ReloadingEngine()))
+    assert [result["percentile"] for result in response["results"]] == [100.0] * len(titles)
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import score
+from app.core.dependencies import get_batch_scoring_engine
+from app.services.batch_scoring import BatchScoringEngine
+
+TITLES = [
+    "The Shocking Truth About Cats Nobody Tells You",
+    "Short",
+    "Why Dogs Are Secretly Amazing... Watch Now!",
+    "Tiny",
+    "How I Got 1M Views In 24 Hours #viral",
+    "Small",
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Several engine calls even for small bodies
+    monkeypatch.setattr(score, "STREAM_CHUNK_SIZE", 2)
+    app = FastAPI()
+    app.include_router(score.router)
+    engine = BatchScoringEngine()
+    app.dependency_overrides[get_batch_scoring_engine] = lambda: engine
+    with TestClient(app) as client:
+        yield client
+
+
+def post_lines(client, lines, **params):
+    response = client.post("/score/batch/stream", params=params, content="\n".join(lines) + "\n")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def title_lines(titles):
+    return [json.dumps({"title": title}) for title in titles]
+
+
+def test_results_come_in_input_order_and_match_batch_scoring(client):
+    results = post_lines(client, title_lines(TITLES))
+    scores, reasons = BatchScoringEngine().score_batch([(title, [], [], None) for title in TITLES])
+    assert results == [
+        {"title": title, "viral_score": round(value, 3), "reasons": title_reasons}
+        for title, value, title_reasons in zip(TITLES, scores.tolist(), reasons)
+    ]
+
+
+def test_invalid_lines_produce_error_lines(client):
+    lines = title_lines(TITLES[:2])
+    lines[1:1] = ["not json", json.dumps({"tags": ["no title"]}), ""]
+    results = post_lines(client, lines, explain="false")
+
+    errors = [result for result in results if "error" in result]
+    assert [error["line"] for error in errors] == [2, 3]
+    assert [result["title"] for result in results if "error" not in result] == TITLES[:2]
+    assert all(set(result) == {"title", "viral_score"} for result in results if "error" not in result)
+
+
+def test_top_k_is_best_first_with_earliest_line_on_ties(client):
+    # Repeats guarantee ties between lines
+    titles = TITLES + TITLES[::-1]
+    everything = post_lines(client, title_lines(titles), explain="false")
+    ranked = sorted(enumerate(everything), key=lambda item: (-item[1]["viral_score"], item[0]))
+
+    for k in (1, 3, len(titles), len(titles) + 5):
+        top = post_lines(client, title_lines(titles), top_k=k, explain="false")
+        assert top == [result for _, result in ranked[:k]]
+
+
+class ChunkedRequest:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def read_lines(chunks):
+    async def run():
+        return [line async for line in score._read_ndjson_lines(ChunkedRequest(chunks))]
+
+    return asyncio.run(run())
+
+
+def test_lines_split_across_chunks_are_reassembled():
+    body = b'{"title": "a"}\n\n{"title": "' + b"x" * 1000 + b'"}\n  \n{"title": "tail"}'
+    expected = [b'{"title": "a"}', b'{"title": "' + b"x" * 1000 + b'"}', b'{"title": "tail"}']
+    for size in (1, 3, 7, 64, len(body)):
+        assert read_lines([body[i:i + size] for i in range(0, len(body), size)]) == expected
+
+
+def test_empty_body_yields_nothing():
+    assert read_lines([]) == []
+    assert read_lines([b"", b"\n", b"  "]) == []
@@ -0,0 +1,99 @@
+import pytest
+
+from app.services.scoring import SCORING_LEXICONS, LexiconMatcher, ScoringService, TitleFeatures, lexicon_matcher
+
+TITLES = [
+    "The Shocking Truth About Cats Nobody Tells You",
+    "Why Dogs Are Secretly Amazing... Watch Now!",
+    "How I Got 1M Views In 24 Hours #viral #fyp",
+    "mind-blowing wow omg",
+    "Untold hidden secrets revealed and exposed today",
+    "Short",
+    "A" * 120,
+    "",
+    "newest latest knowhow whoever",
+]
+
+
+def reference_features(title, tags=None, hashtags=None, topic=None) -> TitleFeatures:
+    """Features by testing every lexicon word against the text, as the original scorer did"""
+    title_lower = title.lower()
+    all_text = " ".join([title_lower, " ".join(tags or []).lower(), " ".join(hashtags or []).lower()])
+
+    def count(name, text):
+        return sum(1 for word in SCORING_LEXICONS[name] if word in text)
+
+    topic_lower = (topic or "").lower()
+    return TitleFeatures(
+        length=len(title),
+        emotional=count("emotional", title_lower),
+        question=count("question", title_lower),
+        mystery=count("mystery", title_lower),
+        ellipsis=count("ellipsis", title_lower),
+        title_trending=count("trending", title_lower),
+        total_trending=count("trending", all_text),
+        has_topic=bool(topic),
+        topic_in_title=bool(topic) and topic_lower in title_lower,
+        topic_words=sum(1 for word in topic_lower.split() if word in title_lower),
+        has_digits=any(char.isdigit() for char in title),
+        urgency=count("urgency", title_lower),
+        action=count("action", title_lower),
+    )
+
+
+def reference_score(service, features: TitleFeatures):
+    """Score and reasons by running every analyzer directly"""
+    results = [
+        service._analyze_title_length(features.length),
+        service._analyze_emotional_impact(features.emotional),
+        service._analyze_curiosity_gap(features.question, features.mystery, features.ellipsis),
+        service._analyze_trending_keywords(features.title_trending, features.total_trending),
+    ]
+    if features.has_topic:
+        results.append(service._analyze_topic_relevance(features.topic_in_title, features.topic_words))
+    results.append(service._analyze_engagement_triggers(features.has_digits, features.urgency, features.action))
+
+    score = 0.0
+    reasons = []
+    for analyzer_score, analyzer_reasons in results:
+        score += analyzer_score
+        reasons.extend(analyzer_reasons)
+    return min(score, 1.0), reasons
+
+
+@pytest.mark.parametrize("title", TITLES)
+def test_matcher_finds_exactly_the_contained_words(title):
+    text = title.lower()
+    expected = {word for group in SCORING_LEXICONS.values() for word in group if word in text}
+    assert lexicon_matcher.find_words(text) == expected
+
+
+def test_matcher_recovers_words_nested_in_longer_matches():
+    matcher = LexiconMatcher({"a": ("new", "newest"), "b": ("west",)})
+    assert matcher.find_words("the newest") == {"new", "newest", "west"}
+
+
+@pytest.mark.parametrize("title", TITLES)
+@pytest.mark.parametrize("tags,hashtags,topic", [
+    (None, None, None),
+    (["viral", "shorts"], ["#fyp", "#trending"], "cats"),
+    ([], ["#new"], "dogs are amazing"),
+])
+def test_features_and_scores_match_the_reference(title, tags, hashtags, topic):
+    service = ScoringService()
+    features = service.extract_features(title, tags, hashtags, topic)
+    assert features == reference_features(title, tags, hashtags, topic)
+
+    expected_score, expected_reasons = reference_score(service, features)
+    assert service.calculate_viral_score(title, tags, hashtags, topic) == (expected_score, expected_reasons)
+    assert service.calculate_score(title, tags, hashtags, topic) == expected_score
+
+
+def test_assembled_features_match_extract_features():
+    service = ScoringService()
+    title, tags, topic = "Why Cats Are Secretly Amazing Now", ["viral"], "cats"
+    scan = service.scan_title(title)
+    assembled = service.assemble_features(
+        len(title), scan, service.scan_tag_words(tags), True, service.topic_overlap(scan.title_lower, topic)
+    )
+    assert assembled == service.extract_features(title, tags, None, topic)
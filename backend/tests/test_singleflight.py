@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.singleflight import SingleFlight, call_lock_ttl
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(10)))
+
+    assert asyncio.run(run()) == [{"value": 1}] * 10
+    assert calls == 1
+    assert flights.stats()["local_shared"] == 9
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    flights = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        leader = asyncio.ensure_future(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("key", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "result"
+    assert calls == 1
+
+
+def test_call_finishes_when_every_caller_is_cancelled():
+    flights = SingleFlight()
+
+    async def run():
+        done = asyncio.Event()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            done.set()
+            return "result"
+
+        caller = asyncio.ensure_future(flights.do("key", fetch))
+        await asyncio.sleep(0.005)
+        caller.cancel()
+        await asyncio.wait_for(done.wait(), 1)
+        await asyncio.sleep(0)
+        return flights.stats()["in_flight"]
+
+    assert asyncio.run(run()) == 0
+
+
+def test_coalesces_across_workers_through_redis(fake_redis):
+    workers = [SingleFlight(redis_client=fake_redis, wait_seconds=2, poll_interval=0.01) for _ in range(2)]
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["a", "b"]
+
+    async def run():
+        first = asyncio.ensure_future(workers[0].do("key", fetch))
+        await asyncio.sleep(0.02)
+        return await asyncio.gather(first, workers[1].do("key", fetch))
+
+    assert asyncio.run(run()) == [["a", "b"], ["a", "b"]]
+    assert calls == 1
+    assert workers[1].stats()["remote_shared"] == 1
+
+
+def test_lock_outlives_the_upstream_call(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "AI_API_TIMEOUT", 60)
+    monkeypatch.setattr(settings, "AI_LIMITER_QUEUE_TIMEOUT_SECONDS", 10)
+    flights = SingleFlight(redis_client=fake_redis, wait_seconds=2)
+    assert flights.lock_ttl == call_lock_ttl() == 71
+
+    async def fetch():
+        return "result"
+
+    asyncio.run(flights.do("key", fetch))
+    assert set(fake_redis.ttls.values()) >= {71}
+
+
+def test_leader_does_not_release_a_lock_it_no_longer_holds(fake_redis):
+    flights = SingleFlight(redis_client=fake_redis, wait_seconds=2)
+
+    async def fetch():
+        # The lock expired mid-call and another worker took it
+        for key in list(fake_redis.values):
+            fake_redis.values[key] = "other-token"
+        return "result"
+
+    assert asyncio.run(flights.do("key", fetch)) == "result"
+    assert "other-token" in fake_redis.values.values()
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import generate
+from app.core.config import settings
+from app.core.dependencies import get_ai_generation_service
+from app.db.connection import get_db
+from app.models.topic import Topic
+from app.services.ai_generation import AI_ANALYSIS_SOURCE, FALLBACK_ANALYSIS_SOURCE, AIGenerationService
+from app.services.generation_cache import GenerationCache
+from app.services.singleflight import SingleFlight
+
+GOOD = {
+    "top_tags": [{"tag": "Cats", "score": 0.9}],
+    "top_hashtags": [{"hashtag": "#Cats", "score": 0.8}, "#Kittens"],
+    "viral_patterns": ["Why Cats Rule"],
+    "trending_keywords": ["cats"]
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "AI_PROVIDER", "local")
+    monkeypatch.setattr(settings, "LOCAL_AI_LATENCY_MS", 1)
+    return AIGenerationService(cache=GenerationCache(), flights=SingleFlight())
+
+
+def test_batch_parse_keeps_only_well_formed_analyses(service):
+    response = "```json\n" + json.dumps({
+        "CATS": {**GOOD, "extra": "dropped"},
+        "dogs": {**GOOD, "viral_patterns": "not a list"},
+        "birds": {**GOOD, "top_tags": [{"tag": 7, "score": 0.5}]},
+        "fish": {"top_tags": [], "top_hashtags": []},
+        "frogs": {**GOOD, "top_hashtags": [{"hashtag": "#Frogs", "score": "high"}]},
+    }) + "\n```"
+    analyses = service._parse_batch_analysis(response, ["cats", "dogs", "birds", "fish", "frogs", "mice"])
+
+    assert list(analyses) == ["cats"]
+    assert analyses["cats"] == {**GOOD, "source": AI_ANALYSIS_SOURCE}
+
+
+def test_batch_parse_defaults_missing_trending_keywords(service):
+    analysis = {key: value for key, value in GOOD.items() if key != "trending_keywords"}
+    analyses = service._parse_batch_analysis(json.dumps({"cats": analysis}), ["cats"])
+    assert analyses["cats"]["trending_keywords"] == []
+
+
+def test_single_parse_rejects_malformed_analyses(service):
+    assert service._parse_analysis(json.dumps(GOOD))["source"] == AI_ANALYSIS_SOURCE
+    with pytest.raises(ValueError):
+        service._parse_analysis(json.dumps({**GOOD, "top_tags": {"tag": "Cats"}}))
+    with pytest.raises(ValueError):
+        service._parse_analysis("[1, 2]")
+
+
+def test_analyses_are_marked_by_source(service, monkeypatch):
+    analyses = asyncio.run(service.aanalyze_topics(["cats", "dogs"]))
+    assert {analysis["source"] for analysis in analyses.values()} == {AI_ANALYSIS_SOURCE}
+
+    monkeypatch.setitem(service.provider_info, "available", False)
+    analyses = asyncio.run(service.aanalyze_topics(["cats"]))
+    assert analyses["cats"]["source"] == FALLBACK_ANALYSIS_SOURCE
+
+
+class FakeAnalysisService:
+    async def aanalyze_topics(self, topics):
+        return {
+            "cats": {**GOOD, "source": AI_ANALYSIS_SOURCE},
+            "dogs": {**GOOD, "viral_patterns": ["Made up"], "source": FALLBACK_ANALYSIS_SOURCE},
+        }
+
+
+def test_batch_endpoint_persists_only_llm_analyses(tmp_path):
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'topics.db'}")
+    Topic.__table__.create(db_engine)
+    Session = sessionmaker(bind=db_engine)
+    with Session() as db:
+        db.add(Topic(name="dogs", viral_patterns=["Real pattern"]))
+        db.commit()
+
+    def override_db():
+        with Session() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(generate.router)
+    app.dependency_overrides[get_ai_generation_service] = FakeAnalysisService
+    app.dependency_overrides[get_db] = override_db
+    with TestClient(app) as client:
+        response = client.post("/generate/analyze/batch", json={"topics": ["cats", "dogs"]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["saved"] is True
+    assert [result["source"] for result in body["results"]] == [AI_ANALYSIS_SOURCE, FALLBACK_ANALYSIS_SOURCE]
+
+    with Session() as db:
+        topics = {topic.name: topic for topic in db.query(Topic).all()}
+    assert topics["cats"].viral_patterns == ["Why Cats Rule"]
+    # The outage did not overwrite the stored analysis
+    assert topics["dogs"].viral_patterns == ["Real pattern"]
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.singleflight import SingleFlight
+from app.services.youtube_fetch import YouTubeService
+
+API_KEY = "secret-key-123"
+
+
+def video_item(video_id):
+    snippet = {
+        "title": f"Title {video_id}", "description": "", "channelId": "c", "channelTitle": "Channel",
+        "publishedAt": "2025-01-01T00:00:00Z", "thumbnails": {"medium": {"url": "u"}}
+    }
+    return {"id": video_id, "snippet": snippet, "statistics": {"viewCount": "10"},
+            "contentDetails": {"duration": "PT1M5S"}}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "YOUTUBE_API_KEY", API_KEY)
+    monkeypatch.setattr(settings, "YOUTUBE_API_RETRIES", 1)
+    monkeypatch.setattr(settings, "YOUTUBE_RETRY_BACKOFF_MS", 1)
+    return YouTubeService(flights=SingleFlight())
+
+
+def use_transport(service, handler):
+    service._client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+
+
+def test_details_merge_chunks_in_input_order_and_report_failed_ones(service, caplog):
+    requested = []
+
+    async def handler(request):
+        ids = request.url.params["id"].split(",")
+        requested.append(ids)
+        # Later chunks answer first, and items come back in reverse order
+        await asyncio.sleep(0.001 * (10 - len(requested)))
+        if "v60" in ids:
+            return httpx.Response(500)
+        return httpx.Response(200, json={"items": [video_item(video_id) for video_id in reversed(ids)]})
+
+    use_transport(service, handler)
+    video_ids = [f"v{i}" for i in range(120)]
+
+    async def run():
+        try:
+            return await service.aget_video_details(video_ids)
+        finally:
+            await service.aclose()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.youtube_fetch"):
+        details = asyncio.run(run())
+
+    failed = video_ids[50:100]
+    assert [video["video_id"] for video in details] == [i for i in video_ids if i not in failed]
+    assert details.failed_ids == failed
+    assert details[0]["duration"] == 65
+    assert service.stats()["failed_detail_chunks"] == 1
+    # The failed chunk was retried once; the key never reaches the logs
+    assert sum(1 for ids in requested if "v60" in ids) == 2
+    assert "chunk 1" in caplog.text
+    assert API_KEY not in caplog.text
+
+
+def test_all_chunks_failing_is_not_an_empty_result(service):
+    use_transport(service, lambda request: httpx.Response(503))
+
+    async def run():
+        try:
+            return await service.aget_video_details(["a", "b"])
+        finally:
+            await service.aclose()
+
+    details = asyncio.run(run())
+    assert details == []
+    assert details.failed_ids == ["a", "b"]
+
+
+def test_transport_errors_are_logged_without_the_api_key(service, caplog):
+    def handler(request):
+        raise httpx.ConnectError(f"Connection refused for {request.url}")
+
+    use_transport(service, handler)
+
+    async def run():
+        try:
+            return await service.asearch_shorts("cats")
+        finally:
+            await service.aclose()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.youtube_fetch"):
+        assert asyncio.run(run()) == []
+    assert "key=REDACTED" in caplog.text
+    assert API_KEY not in caplog.text
+
+
+def test_client_is_opened_once_and_closed(service):
+    service.open()
+    client = service.client
+    service.open()
+    assert service.client is client
+
+    asyncio.run(service.aclose())
+    assert client.is_closed
+    assert service._client is None